@@ -1,7 +1,17 @@
+import sys
 import json
+import time
 import ollama
 import re
 
+try:
+    import tiktoken
+    context_token_encoder = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    context_token_encoder = None  # Fall back to ~4 characters per token
+# Which counter count_tokens uses; token counts from different counters aren't comparable
+TOKEN_COUNTER = "cl100k_base" if context_token_encoder is not None else "chars_div_4"
+
 
 RED = "\033[31m"
 BOLD = "\033[1m"
@@ -38,6 +48,158 @@ def log(func_name):
     print(f"{color_code}[Debug] called {func_name}{RESET}")
 
 
+# ===== BEGINING OF - LLM CALL WRAPPER =====
+
+# Callbacks notified after every LLM call: listener(function_name, seconds, request_kwargs, response)
+llm_listeners = []
+
+
+def register_llm_listener(listener):
+    """Observe LLM calls (tracing, call/token accounting). Listener errors are ignored."""
+    if listener not in llm_listeners:
+        llm_listeners.append(listener)
+
+
+def unregister_llm_listener(listener):
+    if listener in llm_listeners:
+        llm_listeners.remove(listener)
+
+
+def llm_chat(**kwargs):
+    """ollama.chat, timed and reported to the registered listeners"""
+    started = time.perf_counter()
+    response = None
+    try:
+        response = ollama.chat(**kwargs)
+        return response
+    finally:
+        if llm_listeners:
+            elapsed = time.perf_counter() - started
+            caller = sys._getframe(1).f_code.co_name
+            for listener in list(llm_listeners):
+                try:
+                    listener(caller, elapsed, kwargs, response)
+                except Exception as e:
+                    print(f"[WARNING] LLM listener failed: {e}")
+
+# ===== END OF - LLM CALL WRAPPER =====
+
+
+# ===== BEGINING OF - CONVERSATION CONTEXT FUNCTIONS =====
+
+# Turns always kept verbatim; older turns are folded into a rolling summary
+CONTEXT_RECENT_TURNS = 8
+# Summarize in batches so the summary isn't regenerated on every turn
+CONTEXT_SUMMARY_BATCH = 4
+# Token budget for conversation context (summary + recent turns) per call site
+CONTEXT_BUDGETS = {
+    "intro_reply": 1500,
+    "dynamic_question": 1500,
+    "candidate_qna": 2000,
+    "final_summary": 4000,
+}
+# Token budget for the evaluation log (question, answer, labels and scores) per call site
+EVALUATION_LOG_BUDGETS = {
+    "candidate_qna": 1500,
+    "final_summary": 3000,
+}
+# Characters of question/answer text kept per log entry once a log is over budget
+EVALUATION_LOG_TEXT_CHARS = 240
+
+
+def count_tokens(text):
+    if context_token_encoder is not None:
+        return len(context_token_encoder.encode(text))
+    return len(text) // 4 + 1
+
+
+def summarize_conversation(previous_summary, turns):
+    """Fold `turns` into the running summary of older conversation"""
+    log("summarize_conversation")
+    transcript = "\n".join(f"{turn['role']}: {turn['content']}" for turn in turns)
+    prompt = f"""
+    You maintain a running summary of a job interview for the interviewer.
+
+    Current summary:
+    {previous_summary or "(empty)"}
+
+    New conversation turns:
+    {transcript}
+
+    Update the summary to include the new turns. Keep facts the interviewer needs later:
+    the candidate's background, questions already asked, how well each was answered,
+    and anything the candidate asked. Max 150 words. Only return the summary.
+    """
+    try:
+        response = llm_chat(model="llama3", messages=[{"role": "system", "content": prompt}])
+        return response["message"]["content"].strip()
+    except Exception as e:
+        print(f"[ERROR] summarize_conversation failed: {e}")
+        # Keep at least a truncated trace of the turns rather than dropping them
+        fallback = " | ".join(f"{turn['role']}: {turn['content'][:120]}" for turn in turns)
+        return f"{previous_summary} {fallback}".strip()
+
+
+def bound_conversation_history(conversation_history, summary="", budget=1500, recent_turns=CONTEXT_RECENT_TURNS):
+    """
+    Messages for a prompt: the summary of older turns (if any) plus the most recent
+    turns, dropping the oldest of those until everything fits in `budget` tokens.
+    The latest turn is always kept.
+    """
+    recent = list(conversation_history[-recent_turns:])
+    summary_message = []
+    if summary:
+        summary_message = [{"role": "system", "content": f"Summary of the earlier conversation: {summary}"}]
+
+    used = sum(count_tokens(m["content"]) for m in summary_message + recent)
+    while len(recent) > 1 and used > budget:
+        used -= count_tokens(recent.pop(0)["content"])
+    return summary_message + recent
+
+
+def compact_json(data):
+    """Compact JSON for prompts (indent=2 roughly doubles the tokens of nested logs)"""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def shorten_text(text, limit):
+    text = str(text)
+    return text if len(text) <= limit else text[:limit].rstrip() + "…"
+
+
+def bound_evaluation_log(evaluation_log, budget):
+    """
+    The evaluation log for a prompt, within `budget` tokens. Over budget, question and
+    answer text is shortened first (labels and scores are kept); if that is not enough,
+    the oldest entries are folded into a tally of their evaluation labels.
+    The latest entry is always kept.
+    """
+    entries = list(evaluation_log)
+    if count_tokens(compact_json(entries)) <= budget:
+        return entries
+
+    entries = [
+        {**entry, **{key: shorten_text(entry[key], EVALUATION_LOG_TEXT_CHARS)
+                     for key in ("question", "response") if key in entry}}
+        for entry in entries
+    ]
+    dropped = []
+
+    def with_tally():
+        if not dropped:
+            return entries
+        tally = {}
+        for entry in dropped:
+            label = str(entry.get("evaluation", "unknown"))
+            tally[label] = tally.get(label, 0) + 1
+        return [{"earlier_answers": len(dropped), "evaluations": tally}] + entries
+
+    while len(entries) > 1 and count_tokens(compact_json(with_tally())) > budget:
+        dropped.append(entries.pop(0))
+    return with_tally()
+
+# ===== END OF - CONVERSATION CONTEXT FUNCTIONS =====
+
 # ===== BEGINING OF - INTRO & EXPLAINING JOB DESCRIPTION IF NECESSARY FUNCTIONS USED =====
 
 
@@ -73,7 +235,7 @@ def generate_contextual_intro_reply(job_title, job_description, conversation_his
     messages.append({"role": "user", "content": user_input})
 
     try:
-        response = ollama.chat(model="llama3", messages=messages)
+        response = llm_chat(model="llama3", messages=messages)
         content = response["message"]["content"].strip()
         job_flag = False
         if "[[job_explained]]" in content:
@@ -107,7 +269,7 @@ def assess_intro_progress(conversation_history):
     """
 
     try:
-        response = ollama.chat(
+        response = llm_chat(
         model="llama3",
         messages=[{"role": "system", "content": prompt}]
         )
@@ -151,7 +313,7 @@ def assess_icebreaker_response(user_response, question):
 
 
     try:
-        response = ollama.chat(
+        response = llm_chat(
         model="llama3",
         messages=[{"role": "system", "content": prompt}]
         )
@@ -171,7 +333,7 @@ def generate_icebreaker_question(job_title):
             Only respond with the question.
             """
     try:
-        response = ollama.chat(model="llama3", messages=[{"role": "system", "content": prompt}])
+        response = llm_chat(model="llama3", messages=[{"role": "system", "content": prompt}])
         return response['message']['content'].strip()
 
     except Exception as e:
@@ -204,7 +366,7 @@ def assess_followup_response(question, user_response):
             {"role": "user", "content": question},
             {"role": "assistant", "content": user_response}
         ]
-        response = ollama.chat(model="llama3", messages=messages)
+        response = llm_chat(model="llama3", messages=messages)
         result = response["message"]["content"].strip().lower()
         return result if result in ["strong", "weak"] else "strong"
     except Exception as e:
@@ -237,7 +399,7 @@ def generate_dynamic_question(job_title, job_description, conversation_history):
     ]
 
     try:
-        response = ollama.chat(model="llama3", messages=messages)
+        response = llm_chat(model="llama3", messages=messages)
         return response['message']['content'].strip()
 
     except Exception as e:
@@ -267,7 +429,7 @@ def evaluate_resume_response(question, response):
     Only one word response.
     """
     try:
-        res = ollama.chat(model="llama3", messages=[{"role": "system", "content": prompt}])
+        res = llm_chat(model="llama3", messages=[{"role": "system", "content": prompt}])
         return res["message"]["content"].strip().lower()
 
     except Exception as e:
@@ -286,7 +448,7 @@ def generate_followup_question(original_question, weak_response):
     Only return the follow-up question.
     """
     try:
-        res = ollama.chat(model="llama3", messages=[{"role": "system", "content": prompt}])
+        res = llm_chat(model="llama3", messages=[{"role": "system", "content": prompt}])
         content = res["message"]["content"].strip()
         # Remove quotes from beginning and end if present
         if content.startswith('"') and content.endswith('"'):
@@ -296,6 +458,71 @@ def generate_followup_question(original_question, weak_response):
     except:
         return "Could you elaborate a bit more on that?"
 
+def parse_evaluation_with_followup(raw, labels):
+    """
+    Parse {"label": ..., "followup": ...} from a fused evaluate+follow-up call.
+    Returns (label, followup) or None if the output is unusable.
+    """
+    try:
+        data = json.loads(raw)
+    except Exception:
+        match = re.search(r"\{[\s\S]*\}", raw)
+        if not match:
+            return None
+        try:
+            data = json.loads(match.group(0))
+        except Exception:
+            return None
+
+    if not isinstance(data, dict):
+        return None
+    label = str(data.get("label", "")).strip().strip('".').lower()
+    if label not in labels:
+        return None
+    followup = str(data.get("followup") or "").strip()
+    if followup.startswith('"') and followup.endswith('"'):
+        followup = followup[1:-1]
+    return label, followup or None
+
+
+def evaluate_resume_response_with_followup(question, response):
+    """
+    Label a resume answer and, unless it is strong, write the follow-up question in the
+    same generation. Returns (label, followup); followup is None for strong answers and when
+    the model wrote none, and the caller only then generates one (generate_followup_question).
+    Falls back to evaluate_resume_response if the output can't be parsed.
+    """
+    log("evaluate_resume_response_with_followup")
+    prompt = f"""
+    You are an AI interviewer evaluating a candidate's response.
+
+    Question: "{question}"
+    Answer: "{response}"
+
+    1. Label the answer as exactly one of: strong, weak, confused, off_topic
+    2. If the label is NOT strong, write a polite, specific follow-up question to clarify.
+       If the label is strong, leave followup empty.
+
+    Return ONLY JSON:
+    {{"label": "...", "followup": "..."}}
+    """
+    labels = ["strong", "weak", "confused", "off_topic"]
+    try:
+        res = llm_chat(model="llama3", messages=[{"role": "system", "content": prompt}], format="json")
+        parsed = parse_evaluation_with_followup(res["message"]["content"], labels)
+    except Exception as e:
+        print(f"[ERROR] evaluate_resume_response_with_followup failed: {e}")
+        parsed = None
+
+    if parsed is None:
+        print("[WARNING] Fused resume evaluation unusable - falling back to separate calls")
+        return evaluate_resume_response(question, response), None
+
+    label, followup = parsed
+    if label == "strong":
+        return label, None
+    return label, followup
+
 # ===== END OF - RESUME DISCUSSION FUNCTIONS USED =====
 
 # ===== BEGINING OF - FUCNTIONS USED FOR CUSTOM QUESTIONS ====== 
@@ -319,7 +546,7 @@ def evaluate_custom_response(question, response):
     Only return one word.
     """
     try:
-        result = ollama.chat(model="llama3", messages=[{"role": "system", "content": prompt}])
+        result = llm_chat(model="llama3", messages=[{"role": "system", "content": prompt}])
         return result["message"]["content"].strip().lower()
 
     except Exception as e:
@@ -342,7 +569,7 @@ def generate_custom_followup(question, last_response):
     Just return the follow-up question only.
     """
     try:
-        result = ollama.chat(model="llama3", messages=[{"role": "system", "content": prompt}])
+        result = llm_chat(model="llama3", messages=[{"role": "system", "content": prompt}])
         content = result["message"]["content"].strip()
         # Remove quotes from beginning and end if present
         if content.startswith('"') and content.endswith('"'):
@@ -352,6 +579,49 @@ def generate_custom_followup(question, last_response):
     except Exception:
         return "Could you clarify your thinking or give an example?"
 
+def evaluate_custom_response_with_followup(question, response):
+    """
+    Classify a custom-question answer and, unless it is clear, write the follow-up in the
+    same generation. Returns (label, followup); followup is None for clear answers and when
+    the model wrote none, and the caller only then generates one (generate_custom_followup).
+    Falls back to evaluate_custom_response if the output can't be parsed.
+    """
+    log("evaluate_custom_response_with_followup")
+    prompt = f"""
+    You are an AI interviewer evaluating a candidate's response to a custom technical or behavioral question.
+
+    Question: "{question}"
+    Response: "{response}"
+
+    1. Classify the response using only ONE of the following:
+       - "clear" → well-explained, confident, relevant
+       - "weak" → relevant but vague or lacking detail
+       - "confused" → seems to misunderstand the question
+       - "no_answer" → says "I don't know", "not sure", etc.
+       - "off_topic" → unrelated, joke, or trolling
+    2. If the label is NOT clear, write a short follow-up question to go deeper or clarify,
+       focused on the candidate's conceptual grasp of the topic. If clear, leave followup empty.
+
+    Return ONLY JSON:
+    {{"label": "...", "followup": "..."}}
+    """
+    labels = ["clear", "weak", "confused", "no_answer", "off_topic"]
+    try:
+        result = llm_chat(model="llama3", messages=[{"role": "system", "content": prompt}], format="json")
+        parsed = parse_evaluation_with_followup(result["message"]["content"], labels)
+    except Exception as e:
+        print(f"[ERROR] evaluate_custom_response_with_followup failed: {e}")
+        parsed = None
+
+    if parsed is None:
+        print("[WARNING] Fused custom evaluation unusable - falling back to separate calls")
+        return evaluate_custom_response(question, response), None
+
+    label, followup = parsed
+    if label == "clear":
+        return label, None
+    return label, followup
+
 def generate_model_answer(question):
     log("generate_model_answer")
     prompt = f"""
@@ -369,7 +639,7 @@ def generate_model_answer(question):
         Only return the answer — no explanation or extra text.
         """
     try:
-        result = ollama.chat(model="llama3", messages=[{"role": "system", "content": prompt}])
+        result = llm_chat(model="llama3", messages=[{"role": "system", "content": prompt}])
         content = result["message"]["content"].strip()
         # Remove quotes from beginning and end if present
         if content.startswith('"') and content.endswith('"'):
@@ -403,7 +673,7 @@ def assess_candidate_has_question(user_input):
     Accept phrases like “no”, “not really”, “I'm good”, etc. as "no". Anything question-like = "yes".
     """
     try:
-        result = ollama.chat(model="llama3", messages=[{"role": "system", "content": prompt}])
+        result = llm_chat(model="llama3", messages=[{"role": "system", "content": prompt}])
         return result["message"]["content"].strip().lower()
 
     except Exception as e:
@@ -412,6 +682,7 @@ def assess_candidate_has_question(user_input):
 
 def generate_candidate_qna_response(user_question, conversation_history, evaluation_log, job_title, last_chance=False):
     log("generate_candidate_qna_response")
+    evaluation_log = bound_evaluation_log(evaluation_log, EVALUATION_LOG_BUDGETS["candidate_qna"])
     prompt = f"""
     You are an AI interviewer wrapping up an interview for the role of **{job_title}**.
 
@@ -419,10 +690,10 @@ def generate_candidate_qna_response(user_question, conversation_history, evaluat
     "{user_question}"
 
     Conversation so far:
-    {json.dumps(conversation_history, indent=2)}
+    {compact_json(conversation_history)}
 
     Candidate's performance log:
-    {json.dumps(evaluation_log, indent=2)}
+    {compact_json(evaluation_log)}
 
     Instructions:
     1. If they ask about next steps, company, or job → answer helpfully.
@@ -471,7 +742,7 @@ def generate_candidate_qna_response(user_question, conversation_history, evaluat
 
 
     try:
-        result = ollama.chat(model="llama3", messages=[{"role": "system", "content": prompt}])
+        result = llm_chat(model="llama3", messages=[{"role": "system", "content": prompt}])
         return result["message"]["content"].strip()
 
     except Exception as e:
@@ -484,90 +755,90 @@ def generate_candidate_qna_response(user_question, conversation_history, evaluat
 
 # ===== BEGINING OF - FUCNTIONS USED FOR EVALUATING CANDIDATE QUESTION====== 
 
-def analyze_individual_responses(evaluation_log, model="llama3"):
-    log("analyze_individual_responses")
-    analyzed = []
-
-    for item in evaluation_log:
-        q = item["question"]
-        a = item["response"]
-
-        prompt = f"""
-            Evaluate the following interview response:
-
-            Question: "{q}"
-            Candidate's Answer: "{a}"
-
-            Provide detailed evaluation metrics in JSON format.
-            For each metric, give a numeric score from 0 to 10, plus an emotion label.
-
-            Metrics to include:
-            1. knowledge_depth – understanding of the question
-            2. communication_clarity – organization and flow of ideas
-            3. confidence_tone – tone of communication (e.g., confident, nervous, neutral)
-            4. reasoning_ability – logical reasoning or problem-solving shown
-            5. relevance_to_question – how well it stays on-topic
-            6. motivation_indicator – enthusiasm, passion, or drive reflected in response
-
-            Respond ONLY in valid JSON:
-            {{
-            "knowledge_depth": 0–10,
-            "communication_clarity": 0–10,
-            "confidence_tone": 0–10,
-            "reasoning_ability": 0–10,
-            "relevance_to_question": 0–10,
-            "motivation_indicator": 0–10,
-            "emotion": "label"
-            }}
-            """
+def analyze_single_response(item, model="llama3"):
+    """Score one evaluation_log entry. Returns a copy of the entry with the metrics added."""
+    item = dict(item)  # Don't mutate the live log (may be scored on a background thread)
+    q = item["question"]
+    a = item["response"]
+
+    prompt = f"""
+        Evaluate the following interview response:
+
+        Question: "{q}"
+        Candidate's Answer: "{a}"
+
+        Provide detailed evaluation metrics in JSON format.
+        For each metric, give a numeric score from 0 to 10, plus an emotion label.
+
+        Metrics to include:
+        1. knowledge_depth – understanding of the question
+        2. communication_clarity – organization and flow of ideas
+        3. confidence_tone – tone of communication (e.g., confident, nervous, neutral)
+        4. reasoning_ability – logical reasoning or problem-solving shown
+        5. relevance_to_question – how well it stays on-topic
+        6. motivation_indicator – enthusiasm, passion, or drive reflected in response
+
+        Respond ONLY in valid JSON:
+        {{
+        "knowledge_depth": 0–10,
+        "communication_clarity": 0–10,
+        "confidence_tone": 0–10,
+        "reasoning_ability": 0–10,
+        "relevance_to_question": 0–10,
+        "motivation_indicator": 0–10,
+        "emotion": "label"
+        }}
+        """
 
+    try:
+        result = llm_chat(model=model, messages=[{"role": "system", "content": prompt}])
+        response_text = result["message"]["content"].strip()
+        
+        # Try to extract JSON from the response
         try:
-            result = ollama.chat(model=model, messages=[{"role": "system", "content": prompt}])
-            response_text = result["message"]["content"].strip()
-            
-            # Try to extract JSON from the response
-            try:
-                # First, try to parse the whole response
-                parsed = json.loads(response_text)
-            except json.JSONDecodeError:
-                # If that fails, try to extract JSON from the response
-                json_start = response_text.find('{')
-                json_end = response_text.rfind('}') + 1
-                
-                if json_start != -1 and json_end != 0:
-                    json_text = response_text[json_start:json_end]
-                    parsed = json.loads(json_text)
-                else:
-                    # If no JSON found, use default values
-                    raise Exception("No JSON found in response")
+            # First, try to parse the whole response
+            parsed = json.loads(response_text)
+        except json.JSONDecodeError:
+            # If that fails, try to extract JSON from the response
+            json_start = response_text.find('{')
+            json_end = response_text.rfind('}') + 1
             
-            item["knowledge_depth"] = parsed.get("knowledge_depth", 5)
-            item["communication_clarity"] = parsed.get("communication_clarity", 5)
-            item["confidence_tone"] = parsed.get("confidence_tone", 5)
-            item["reasoning_ability"] = parsed.get("reasoning_ability", 5)
-            item["relevance_to_question"] = parsed.get("relevance_to_question", 5)
-            item["motivation_indicator"] = parsed.get("motivation_indicator", 5)
-            item["emotion"] = parsed.get("emotion", "neutral")
+            if json_start != -1 and json_end != 0:
+                json_text = response_text[json_start:json_end]
+                parsed = json.loads(json_text)
+            else:
+                # If no JSON found, use default values
+                raise Exception("No JSON found in response")
+        
+        item["knowledge_depth"] = parsed.get("knowledge_depth", 5)
+        item["communication_clarity"] = parsed.get("communication_clarity", 5)
+        item["confidence_tone"] = parsed.get("confidence_tone", 5)
+        item["reasoning_ability"] = parsed.get("reasoning_ability", 5)
+        item["relevance_to_question"] = parsed.get("relevance_to_question", 5)
+        item["motivation_indicator"] = parsed.get("motivation_indicator", 5)
+        item["emotion"] = parsed.get("emotion", "neutral")
 
-            
-        except Exception as e:
-            print(f"[ERROR] analyze_individual_responses failed for question '{q[:50]}...': {e}")
-            print(f"[DEBUG] Response text: {response_text if 'response_text' in locals() else 'No response'}")
+        
+    except Exception as e:
+        print(f"[ERROR] analyze_single_response failed for question '{q[:50]}...': {e}")
+        print(f"[DEBUG] Response text: {response_text if 'response_text' in locals() else 'No response'}")
 
-            # Assign safe default values so JSON parsing errors don't break the flow
-            item["knowledge_depth"] = 5
-            item["communication_clarity"] = 5
-            item["confidence_tone"] = 5
-            item["reasoning_ability"] = 5
-            item["relevance_to_question"] = 5
-            item["motivation_indicator"] = 5
-            item["emotion"] = "unknown"
-            item["overall_score"] = 5.0  # Optional overall average placeholder
+        # Assign safe default values so JSON parsing errors don't break the flow
+        item["knowledge_depth"] = 5
+        item["communication_clarity"] = 5
+        item["confidence_tone"] = 5
+        item["reasoning_ability"] = 5
+        item["relevance_to_question"] = 5
+        item["motivation_indicator"] = 5
+        item["emotion"] = "unknown"
+        item["overall_score"] = 5.0  # Optional overall average placeholder
 
+    return item
 
-        analyzed.append(item)
 
-    return analyzed
+def analyze_individual_responses(evaluation_log, model="llama3"):
+    log("analyze_individual_responses")
+    return [analyze_single_response(item, model=model) for item in evaluation_log]
 
 
 def generate_final_summary_review(job_title, conversation_history, analyzed_log, model="llama3"):
@@ -609,11 +880,11 @@ def generate_final_summary_review(job_title, conversation_history, analyzed_log,
 
     Job Title: {job_title}
 
-    Here is the full conversation:
-    {json.dumps(conversation_history, indent=2)}
+    Here is the conversation (earlier turns summarized):
+    {compact_json(conversation_history)}
 
-    And here is the evaluated log:
-    {json.dumps(analyzed_log, indent=2)}
+    And here is the evaluated log (older answers may be shortened):
+    {compact_json(bound_evaluation_log(analyzed_log, EVALUATION_LOG_BUDGETS["final_summary"]))}
 
     EVALUATION STATISTICS:
     - Total Responses: {total_responses}
@@ -677,7 +948,7 @@ def generate_final_summary_review(job_title, conversation_history, analyzed_log,
     max_retries = 100
     for attempt in range(max_retries):
         try:
-            result = ollama.chat(model=model, messages=[{"role": "system", "content": prompt}])
+            result = llm_chat(model=model, messages=[{"role": "system", "content": prompt}])
             response_text = result["message"]["content"].strip()
 
             # Try to extract JSON
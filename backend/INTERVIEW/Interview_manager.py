@@ -1,6 +1,8 @@
+import os
 import json
 import random
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from Interview_functions import (
     log,
@@ -12,27 +14,92 @@ from Interview_functions import (
     assess_icebreaker_response,
     assess_followup_response,
     generate_dynamic_question,
-    evaluate_resume_response,
     generate_followup_question,
-    evaluate_custom_response,
     generate_custom_followup,
+    evaluate_resume_response_with_followup,
+    evaluate_custom_response_with_followup,
     generate_model_answer,
     assess_candidate_has_question,
-    generate_candidate_qna_response
+    generate_candidate_qna_response,
+    summarize_conversation,
+    bound_conversation_history,
+    CONTEXT_BUDGETS,
+    CONTEXT_RECENT_TURNS,
+    CONTEXT_SUMMARY_BATCH,
+    analyze_single_response
     # ✅ REMOVED: generate_key_strengths_and_improvements - no longer needed
 )
 
+# Sent by the client (or the pre-warm endpoint) to get the opening greeting before the candidate speaks
+START_INTERVIEW_COMMAND = "START_INTERVIEW"
+OPENING_PROMPT = "To start, could you tell me a little about yourself?"
+
+def opening_greeting(job_title):
+    return f"Welcome to the interview for the role of {job_title}. Let’s get started!"
+
+
+# Transitions before the next question (module level so their audio can be pre-rendered)
+RESUME_TRANSITIONS = [
+    "Great, let’s move forward.",
+    "Alright, here’s another one.",
+    "Sounds good — next question coming up.",
+    "Thanks for that! Let’s continue.",
+    "Got it. Let’s dive into the next one.",
+    "That makes sense. Here's the next one.",
+    "Perfect — moving on.",
+    "Appreciate that. Let’s go ahead.",
+    "Cool. Let’s tackle the next question.",
+    "Awesome. Here comes another one."
+]
+
+CUSTOM_TRANSITIONS = [
+    "Great insight! Let’s try the next one.",
+    "Understood — here's the next question.",
+    "Appreciate that. Let’s keep going.",
+    "Alright, moving on to the next one.",
+    "Clear answer. Here's something else for you.",
+    "Got it! Let’s continue the conversation.",
+    "Thanks! I have another question for you.",
+    "Sounds good — next up!",
+    "Cool. Let’s keep it flowing.",
+    "That works. Let’s move forward."
+]
+
+TAKE_YOUR_TIME_MESSAGE = "Take your time. I’m listening!"
+
+# Fixed lead-ins that start a "<lead-in>\n\n<question>" message (pre-rendered to audio with the questions)
+FIXED_LEAD_INS = [
+    "Thanks for sharing that!",
+    "Let’s move on anyway. Thanks!",
+    "Thanks for sharing that! Let’s continue with your resume.",
+    "Thanks! Let’s continue with your resume.",
+    "Thanks! That wraps up the resume part.",
+    "No worries — let’s move on to the next question.",
+    TAKE_YOUR_TIME_MESSAGE,
+    "Thanks! That wraps up the resume part. Appreciate your answers.",
+    "Thanks for the answers! Before we wrap up, do you have any questions for me?",
+    "I think we’ve reached the end of this interview. Do you have any questions for me before we wrap up?",
+    "Please press the END interview button to end the interview.",
+]
+
+# Answers are scored in the background as they are recorded, so wrap-up only aggregates
+INTERVIEW_SCORING_WORKERS = int(os.getenv("INTERVIEW_SCORING_WORKERS", "2"))
+scoring_executor = ThreadPoolExecutor(max_workers=INTERVIEW_SCORING_WORKERS, thread_name_prefix="answer-scoring")
+
 
 class InterviewManager:
-    def __init__(self, model="llama3", config_path="interview_config.json"):
+    def __init__(self, model="llama3", config_path="interview_config.json", config=None):
         self.model = model
         self.api_call_count = 0
         self.stage = "introduction"
         self.conversation_history = []
+        self.history_summary = ""            # Rolling summary of turns older than the recent window
+        self.history_summarized_count = 0    # How many leading turns the summary covers
 
-        # Load config
-        with open(config_path, "r") as f:
-            config = json.load(f)
+        # Load config (a dict passed directly takes precedence over the file)
+        if config is None:
+            with open(config_path, "r") as f:
+                config = json.load(f)
 
         self.job_title = config.get("job_title", "this role")
         self.job_description = config.get("job_description", "")
@@ -94,12 +161,136 @@ class InterviewManager:
 
         # Candidate evaluation
         self.evaluation_log = []
+        self.response_scores = {}  # str(index in evaluation_log) -> scored entry
+        self.defer_wrapup = False  # True: final evaluation runs later via run_wrapup_evaluation()
+        self.wrapup_completed = False
 
 
         # === Initial greeting ===
-        greeting = f"Welcome to the interview for the role of {self.job_title}. Let’s get started!"
+        greeting = opening_greeting(self.job_title)
         print(f"\n {greeting}\n")
         self.conversation_history.append({"role": "assistant", "content": greeting})
+        self.opening_sent = False
+
+    # ========= Session State ==================
+
+    def to_state(self):
+        """
+        JSON-serializable snapshot of the interview. Attributes starting with "_" are
+        runtime-only (locks, executors, ...) and are not persisted.
+        """
+        self.harvest_response_scores()
+        return {key: value for key, value in vars(self).items() if not key.startswith("_")}
+
+    @classmethod
+    def from_state(cls, state):
+        """Rebuild a manager from to_state() without re-reading config or re-greeting"""
+        manager = cls.__new__(cls)
+        manager.__dict__.update(state)
+        return manager
+
+    # ========= Conversation Context ==================
+
+    def update_history_summary(self):
+        """
+        Fold turns that have left the recent window into history_summary. Runs once
+        CONTEXT_SUMMARY_BATCH turns have aged out, so it costs one LLM call per batch.
+        """
+        summarized = getattr(self, "history_summarized_count", 0)  # Sessions saved before this field
+        cutoff = len(self.conversation_history) - CONTEXT_RECENT_TURNS
+        if cutoff - summarized < CONTEXT_SUMMARY_BATCH:
+            return
+        self.history_summary = summarize_conversation(
+            getattr(self, "history_summary", ""),
+            self.conversation_history[summarized:cutoff]
+        )
+        self.history_summarized_count = cutoff
+        print(f"[DEBUG] Conversation summary now covers {cutoff} turn(s)")
+
+    def context_messages(self, call_site):
+        """Bounded conversation context for one LLM call site (see CONTEXT_BUDGETS)"""
+        self.update_history_summary()
+        return bound_conversation_history(
+            self.conversation_history,
+            summary=getattr(self, "history_summary", ""),
+            budget=CONTEXT_BUDGETS[call_site]
+        )
+
+    # ========= Incremental Answer Scoring ==================
+
+    def record_evaluation(self, entry):
+        """Append an answer to evaluation_log and start scoring it in the background"""
+        self.evaluation_log.append(entry)
+        index = len(self.evaluation_log) - 1
+        if not hasattr(self, "_scoring_futures"):
+            self._scoring_futures = {}  # Runtime only; missing after a reload from the session store
+        future = scoring_executor.submit(analyze_single_response, entry, self.model)
+        future.add_done_callback(lambda done, index=index: self.persist_response_score(index, done))
+        self._scoring_futures[index] = future
+        self.harvest_response_scores()
+
+    def persist_response_score(self, index, future):
+        """
+        Done-callback for a background score: write it to the session store right away,
+        so the wrap-up finds it even when it runs on another worker. Doesn't touch the
+        manager's own state (the request thread may be serializing it).
+        """
+        store = getattr(self, "_score_store", None)
+        if store is None or future.cancelled() or future.exception() is not None:
+            return
+        store_obj, key = store
+        try:
+            store_obj.save_response_score(key, index, future.result())
+        except Exception as e:
+            print(f"[WARNING] Could not persist score for answer {index}: {e}")
+
+    def harvest_response_scores(self):
+        """
+        Move finished background scores into response_scores. Only called from the
+        request thread, so response_scores is never mutated while being serialized.
+        """
+        futures = getattr(self, "_scoring_futures", {})
+        if not hasattr(self, "response_scores"):
+            self.response_scores = {}
+        for index in [i for i, future in futures.items() if future.done()]:
+            future = futures.pop(index)
+            try:
+                self.response_scores[str(index)] = future.result()
+            except Exception as e:
+                print(f"[WARNING] Background scoring failed for answer {index}: {e}")
+
+    def collect_response_scores(self):
+        """
+        Scored copy of evaluation_log: precomputed scores where available (also those
+        persisted by other workers), waiting on in-flight ones, and scoring anything
+        still missing in parallel.
+        """
+        self.harvest_response_scores()
+        store = getattr(self, "_score_store", None)
+        if store is not None:
+            store_obj, key = store
+            try:
+                for index, scored in store_obj.get_response_scores(key).items():
+                    self.response_scores.setdefault(index, scored)
+            except Exception as e:
+                print(f"[WARNING] Could not load persisted answer scores: {e}")
+        futures = getattr(self, "_scoring_futures", {})
+        precomputed = 0
+        pending = {}
+        for index, entry in enumerate(self.evaluation_log):
+            scored = self.response_scores.get(str(index))
+            if scored is not None and scored.get("question") == entry["question"] and scored.get("response") == entry["response"]:
+                precomputed += 1
+            elif index in futures:
+                pending[index] = futures.pop(index)
+            else:
+                pending[index] = scoring_executor.submit(analyze_single_response, entry, self.model)
+
+        for index, future in pending.items():
+            self.response_scores[str(index)] = future.result()
+
+        print(f"[INFO] Answer scores: {precomputed} precomputed, {len(pending)} computed at wrap-up")
+        return [self.response_scores[str(index)] for index in range(len(self.evaluation_log))]
 
     def is_time_exceeded(self):
         if self.start_time is None:
@@ -108,7 +299,29 @@ class InterviewManager:
         return elapsed >= self.time_limit_seconds
 
 
+    def opening_turn(self):
+        """
+        Greeting + first prompt, with no LLM call. Doesn't start the interview timer, so
+        it can be produced ahead of time (pre-warm) and replayed when the candidate joins.
+        """
+        greeting = self.conversation_history[0]["content"] if self.conversation_history else ""
+        if not getattr(self, "opening_sent", False):
+            self.conversation_history.append({"role": "assistant", "content": OPENING_PROMPT})
+            self.opening_sent = True
+        return {
+            "stage": "introduction",
+            "message": f"{greeting}\n\n{OPENING_PROMPT}".strip()
+        }
+
     def receive_input(self, user_input: str):
+        if user_input.strip().upper() == START_INTERVIEW_COMMAND:
+            if self.start_time is None:
+                print("[INFO] Opening turn requested - returning greeting without an LLM call")
+                return self.opening_turn()
+            # Page reloaded mid-interview: repeat the current prompt instead of treating this as an answer
+            last_prompt = next((m["content"] for m in reversed(self.conversation_history) if m["role"] == "assistant"), "")
+            return {"stage": self.stage, "message": last_prompt}
+
         self.api_call_count += 1
         print(f"[INFO] API call #{self.api_call_count} | Stage: {self.stage}")
         
@@ -165,7 +378,7 @@ class InterviewManager:
         self.conversation_history.append({"role": "user", "content": user_input})
 
         # === Always generate contextual reply (handles job + intro flow) ===
-        result = generate_contextual_intro_reply(self.job_title,self.job_description,self.conversation_history,user_input)
+        result = generate_contextual_intro_reply(self.job_title,self.job_description,self.context_messages("intro_reply"),user_input)
         reply = result["message"]
         self.conversation_history.append({"role": "assistant", "content": reply})
 
@@ -237,7 +450,7 @@ class InterviewManager:
             self.icebreaker_done = True
             self.stage = "intro_followup"
             
-            followup_q = generate_dynamic_question(self.job_title, self.job_description, self.conversation_history)
+            followup_q = generate_dynamic_question(self.job_title, self.job_description, self.context_messages("dynamic_question"))
             self.current_followup_question = followup_q
             self.conversation_history.append({"role": "assistant", "content": followup_q})
 
@@ -254,7 +467,7 @@ class InterviewManager:
             self.stage = "intro_followup"
             
             # Immediately trigger follow-up question
-            followup_q = generate_dynamic_question(self.job_title, self.job_description, self.conversation_history)
+            followup_q = generate_dynamic_question(self.job_title, self.job_description, self.context_messages("dynamic_question"))
             self.current_followup_question = followup_q
             self.conversation_history.append({"role": "assistant", "content": followup_q})
 
@@ -278,7 +491,7 @@ class InterviewManager:
 
             # If no input from candidate, ask a follow-up question based on history
             if not user_input.strip():
-                question = generate_dynamic_question(self.job_title, self.job_description, self.conversation_history)
+                question = generate_dynamic_question(self.job_title, self.job_description, self.context_messages("dynamic_question"))
                 self.current_followup_question = question
                 self.conversation_history.append({"role": "assistant", "content": question})
                 return {"stage": "intro_followup", "message": question}
@@ -353,7 +566,7 @@ class InterviewManager:
                 }
 
             # Retry with a new question
-            question = generate_dynamic_question(self.job_title, self.job_description, self.conversation_history)
+            question = generate_dynamic_question(self.job_title, self.job_description, self.context_messages("dynamic_question"))
             self.current_followup_question = question
             self.conversation_history.append({"role": "assistant", "content": question})
             return {"stage": "intro_followup", "message": question}
@@ -389,12 +602,13 @@ class InterviewManager:
 
         # 2. Waiting for answer
         if not user_input.strip():
-            return {"stage": "resume_discussion", "message": "Take your time. I’m listening!"}
+            return {"stage": "resume_discussion", "message": TAKE_YOUR_TIME_MESSAGE}
 
         self.conversation_history.append({"role": "user", "content": user_input})
 
-        result = evaluate_resume_response(self.current_resume_question, user_input)
-        self.evaluation_log.append({
+        # One LLM call for the verdict and (for non-strong answers) the follow-up
+        result, fused_followup = evaluate_resume_response_with_followup(self.current_resume_question, user_input)
+        self.record_evaluation({
             "stage": "resume",
             "question": self.current_resume_question,
             "response": user_input,
@@ -421,19 +635,7 @@ class InterviewManager:
                 # print(f"[DEBUG] Coding Requirement: {self.coding_requirement}")
                 self.resume_followup_retry_count = 0
 
-                transitions = [
-                    "Great, let’s move forward.",
-                    "Alright, here’s another one.",
-                    "Sounds good — next question coming up.",
-                    "Thanks for that! Let’s continue.",
-                    "Got it. Let’s dive into the next one.",
-                    "That makes sense. Here's the next one.",
-                    "Perfect — moving on.",
-                    "Appreciate that. Let’s go ahead.",
-                    "Cool. Let’s tackle the next question.",
-                    "Awesome. Here comes another one."
-                ]
-                transition = random.choice(transitions)
+                transition = random.choice(RESUME_TRANSITIONS)
 
                 self.conversation_history.append({"role": "assistant", "content": self.current_resume_question})
                 return {
@@ -505,7 +707,7 @@ class InterviewManager:
 
 
         # 4. Ask follow-up
-        followup = generate_followup_question(self.current_resume_question, user_input)
+        followup = fused_followup or generate_followup_question(self.current_resume_question, user_input)
         self.conversation_history.append({"role": "assistant", "content": followup})
         return {"stage": "resume_discussion", "message": followup, "requires_code": self.current_coding_requirement}
     
@@ -535,13 +737,13 @@ class InterviewManager:
         # Step 2: Evaluate the candidate's response
         # Step 2: Evaluate the candidate's response
         if not user_input.strip():
-            return {"stage": "custom_questions", "message": "Take your time. I'm listening!"}
+            return {"stage": "custom_questions", "message": TAKE_YOUR_TIME_MESSAGE}
 
         self.conversation_history.append({"role": "user", "content": user_input})
         self.last_custom_response = user_input
-        evaluation = evaluate_custom_response(self.current_custom_question, user_input)
+        evaluation, fused_followup = evaluate_custom_response_with_followup(self.current_custom_question, user_input)
 
-        self.evaluation_log.append({
+        self.record_evaluation({
             "stage": "custom",
             "question": self.current_custom_question,
             "response": user_input,
@@ -559,19 +761,7 @@ class InterviewManager:
                 self.custom_followup_retry_count = 0
                 self.custom_followup_evaluations = []
 
-                transitions = [
-                    "Great insight! Let’s try the next one.",
-                    "Understood — here's the next question.",
-                    "Appreciate that. Let’s keep going.",
-                    "Alright, moving on to the next one.",
-                    "Clear answer. Here's something else for you.",
-                    "Got it! Let’s continue the conversation.",
-                    "Thanks! I have another question for you.",
-                    "Sounds good — next up!",
-                    "Cool. Let’s keep it flowing.",
-                    "That works. Let’s move forward."
-                ]
-                transition = random.choice(transitions)
+                transition = random.choice(CUSTOM_TRANSITIONS)
 
                 self.conversation_history.append({"role": "assistant", "content": self.current_custom_question})
                 return {
@@ -604,7 +794,7 @@ class InterviewManager:
             return {"stage": "custom_questions", "message": reply}
 
         # Step 5: Ask follow-up question
-        followup = generate_custom_followup(self.current_custom_question, user_input)
+        followup = fused_followup or generate_custom_followup(self.current_custom_question, user_input)
         self.conversation_history.append({"role": "assistant", "content": followup})
         return {"stage": "custom_questions", "message": followup}
 
@@ -627,7 +817,7 @@ class InterviewManager:
             if decision == "yes":
                 reply = generate_candidate_qna_response(
                     user_question=user_input,
-                    conversation_history=self.conversation_history,
+                    conversation_history=self.context_messages("candidate_qna"),
                     evaluation_log=self.evaluation_log,
                     job_title=self.job_title,
                     last_chance=True
@@ -663,7 +853,7 @@ class InterviewManager:
         last_chance = self.candidate_question_count == self.max_candidate_questions - 2
         reply = generate_candidate_qna_response(
             user_question=user_input,
-            conversation_history=self.conversation_history,
+            conversation_history=self.context_messages("candidate_qna"),
             evaluation_log=self.evaluation_log,
             job_title=self.job_title,
             last_chance=last_chance
@@ -713,20 +903,43 @@ class InterviewManager:
     def handle_wrapup_evaluation(self):
         log("handle_wrapup_evaluation")
 
+        if getattr(self, "defer_wrapup", False):
+            # Background finalization will call run_wrapup_evaluation()
+            print("[INFO] Final evaluation deferred to background finalization.")
+            return {
+                "stage": "done",
+                "message": "Thanks again — this concludes the interview. Your evaluation is being prepared.",
+                "interview_done": True,
+                "evaluation_pending": True
+            }
+
+        evaluation_result = self.run_wrapup_evaluation()
+
+        return {
+            "stage": "done",
+            "message": "Thanks again — this concludes the interview. Final evaluation saved.",
+            "interview_done": True,
+            "summary": evaluation_result['summary'],
+            "key_strengths": evaluation_result['key_strengths'],
+            "improvement_areas": evaluation_result['improvement_areas'],
+            "overall_rating": evaluation_result['overall_rating']
+        }
+
+    def run_wrapup_evaluation(self):
+        """Analyze responses and build the final summary; stores results on the manager"""
         from Interview_functions import (
-            analyze_individual_responses,
             generate_final_summary_review  # ✅ Only need this one function now
         )
 
         print("Interview Assistant: Thank you! Let me summarize your interview.")
 
-        # 1. Analyze individual responses
-        detailed_log = analyze_individual_responses(self.evaluation_log, model=self.model)
+        # 1. Individual response scores (mostly computed in the background during the interview)
+        detailed_log = self.collect_response_scores()
         
         # 2. Generate comprehensive evaluation (summary + strengths + improvements)
         evaluation_result = generate_final_summary_review(
             self.job_title,
-            self.conversation_history,
+            self.context_messages("final_summary"),
             detailed_log,
             model=self.model
         )
@@ -744,14 +957,6 @@ class InterviewManager:
         print(f"\nImprovement Areas:\n{evaluation_result['improvement_areas']}")
         print(f"\nOverall Rating: {evaluation_result['overall_rating']:.1f}/10")
         print("[INFO] Interview evaluation completed - data ready for database storage.")
-        
-        return {
-            "stage": "done",
-            "message": "Thanks again — this concludes the interview. Final evaluation saved.",
-            "interview_done": True,
-            "summary": evaluation_result['summary'],
-            "key_strengths": evaluation_result['key_strengths'],
-            "improvement_areas": evaluation_result['improvement_areas'],
-            "overall_rating": evaluation_result['overall_rating']
-        }
+        self.wrapup_completed = True
+        return evaluation_result
 
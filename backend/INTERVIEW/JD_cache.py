@@ -0,0 +1,131 @@
+import os
+import re
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+# === CONFIGURATION ===
+JD_CACHE_PATH = os.getenv(
+    "JD_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "jd_cache.db")
+)
+JD_CACHE_TTL_SECONDS = int(os.getenv("JD_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+JD_CACHE_MEMORY_SIZE = int(os.getenv("JD_CACHE_MEMORY_SIZE", "500"))  # Entries kept in memory (LRU); SQLite keeps the rest
+
+
+def normalize_jd_text(text):
+    """Lower-case and collapse whitespace so re-saved/re-exported copies of a JD hash the same"""
+    return re.sub(r"\s+", " ", (text or "").strip().lower())
+
+
+def jd_text_key(text):
+    """Cache key for a raw job description document"""
+    return "file:" + hashlib.sha256(normalize_jd_text(text).encode("utf-8")).hexdigest()
+
+
+def classification_key(job_title, job_description):
+    """Cache key for the technical-role classification of a title + description pair"""
+    combined = normalize_jd_text(job_title) + "\n" + normalize_jd_text(job_description)
+    return "classify:" + hashlib.sha256(combined.encode("utf-8")).hexdigest()
+
+
+class JDCache:
+    """
+    Two-level cache (in-memory LRU in front of SQLite) for parsed job descriptions
+    and technical-role classifications. Values are small JSON dicts:
+    {"job_title": ..., "job_description": ..., "is_technical": ...}
+    """
+
+    def __init__(self, db_path=JD_CACHE_PATH, ttl_seconds=JD_CACHE_TTL_SECONDS, memory_size=JD_CACHE_MEMORY_SIZE):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.memory_size = memory_size
+        self.memory = OrderedDict()  # cache_key -> (value, created_at), least recently used first
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_db(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jd_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+
+    def _remember(self, key, entry):
+        """Store in the memory layer and evict the least recently used entries (call with self.lock held)"""
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def _expired(self, created_at):
+        return self.ttl_seconds > 0 and time.time() - created_at > self.ttl_seconds
+
+    def get(self, key):
+        with self.lock:
+            entry = self.memory.get(key)
+        if entry is None:
+            try:
+                with self._connect() as conn:
+                    row = conn.execute(
+                        "SELECT value, created_at FROM jd_cache WHERE cache_key = ?", (key,)
+                    ).fetchone()
+            except Exception as e:
+                print(f"[WARNING] JD cache read failed: {e}")
+                row = None
+            if row:
+                entry = (json.loads(row[0]), row[1])
+
+        if entry is None or self._expired(entry[1]):
+            with self.lock:
+                self.misses += 1
+                self.memory.pop(key, None)
+            return None
+
+        with self.lock:
+            self._remember(key, entry)
+            self.hits += 1
+        return dict(entry[0])
+
+    def set(self, key, value):
+        created_at = time.time()
+        with self.lock:
+            self._remember(key, (dict(value), created_at))
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO jd_cache (cache_key, value, created_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), created_at)
+                )
+        except Exception as e:
+            print(f"[WARNING] JD cache write failed: {e}")
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "memory_entries": len(self.memory)}
+
+
+jd_cache = None
+jd_cache_lock = threading.Lock()
+
+
+def get_jd_cache():
+    """Shared JDCache instance (created on first use)"""
+    global jd_cache
+    with jd_cache_lock:
+        if jd_cache is None:
+            jd_cache = JDCache()
+        return jd_cache
@@ -0,0 +1,328 @@
+import os
+import re
+import json
+import csv
+import sqlite3
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from Question_dedup import (
+    DEFAULT_SIMILARITY_THRESHOLD, embed_texts, normalize_question_text, filter_new_questions, question_text
+)
+
+try:
+    import faiss
+except ImportError:
+    faiss = None  # numpy search is fine for bank sizes we expect; faiss is used when installed
+
+
+# === CONFIGURATION ===
+QUESTION_BANK_PATH = os.getenv(
+    "QUESTION_BANK_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "question_bank.db")
+)
+MIN_RETRIEVAL_SCORE = 0.35  # Below this a bank question is not relevant enough to reuse
+ANSWER_STRENGTHS = ["weak", "medium", "strong"]
+
+
+def extract_resume_skills(structured_resume):
+    """Flatten resume skills and tools_and_technologies into a unique, lower-cased list"""
+    skills = []
+    if not isinstance(structured_resume, dict):
+        return skills
+
+    for skill in structured_resume.get("skills", []) or []:
+        if isinstance(skill, str):
+            skills.append(skill)
+
+    tools = structured_resume.get("tools_and_technologies", {}) or {}
+    if isinstance(tools, dict):
+        for values in tools.values():
+            if isinstance(values, list):
+                skills.extend(v for v in values if isinstance(v, str))
+
+    seen = set()
+    unique = []
+    for skill in skills:
+        key = skill.strip().lower()
+        if key and len(key) <= 40 and key not in seen:
+            seen.add(key)
+            unique.append(key)
+    return unique
+
+
+def tag_question_skills(text, skills):
+    """Skills from `skills` that are mentioned in the question text"""
+    lowered = f" {(text or '').lower()} "
+    tags = []
+    for skill in skills:
+        # Word-ish boundaries so "c" doesn't match every question, but "c++"/"node.js" still work
+        if re.search(rf"(?<![a-z0-9]){re.escape(skill)}(?![a-z0-9])", lowered):
+            tags.append(skill)
+    return tags
+
+
+class QuestionBank:
+    """
+    Persistent store of generated questions (SQLite) with an in-memory vector index.
+    Each row keeps difficulty, weight, skill tags and the weak/medium/strong answers so
+    a retrieved question can be reused without any LLM call.
+    """
+
+    def __init__(self, db_path=QUESTION_BANK_PATH):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.index = None
+        self.index_ids = []
+        self.index_dirty = True
+        self._init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_db(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS questions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    question TEXT NOT NULL,
+                    question_norm TEXT NOT NULL UNIQUE,
+                    difficulty TEXT NOT NULL,
+                    weight INTEGER NOT NULL,
+                    skills TEXT NOT NULL DEFAULT '[]',
+                    answers TEXT NOT NULL DEFAULT '{}',
+                    requires_code INTEGER NOT NULL DEFAULT 0,
+                    job_title TEXT,
+                    embedding BLOB,
+                    times_used INTEGER NOT NULL DEFAULT 0,
+                    created_at TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_questions_difficulty ON questions (difficulty)")
+
+    # === WRITE ===
+
+    def add_questions(self, questions, skills=None, job_title=None):
+        """
+        Store questions (dicts with question/difficulty/weight and optional answers).
+        Exact and near-duplicates of questions already in the bank are skipped. Only the
+        candidates are embedded; they are matched against the stored vector index, and
+        exact repeats are found through question_norm. Returns the number of rows inserted.
+        """
+        skills = [s.lower() for s in (skills or [])]
+        candidates = [q for q in questions if question_text(q).strip() and not q.get("from_bank")]
+        stored = self._stored_norms([normalize_question_text(question_text(q)) for q in candidates])
+        candidates = [q for q in candidates if normalize_question_text(question_text(q)) not in stored]
+        # Paraphrases inside the batch; the batch is small, so the pairwise check stays cheap
+        fresh = filter_new_questions(candidates, [])
+        if not fresh:
+            return 0
+
+        vectors = embed_texts([question_text(q) for q in fresh])
+        if vectors is not None:
+            nearest = self._nearest_scores(vectors)
+            keep = []
+            for i, q in enumerate(fresh):
+                if nearest[i] >= DEFAULT_SIMILARITY_THRESHOLD:
+                    print(f"[DEBUG] Dropping near-duplicate question: {question_text(q)[:80]}...")
+                    continue
+                keep.append(i)
+            fresh = [fresh[i] for i in keep]
+            vectors = vectors[keep]
+            if not fresh:
+                return 0
+        now = datetime.utcnow().isoformat()
+        inserted = 0
+        with self.lock, self._connect() as conn:
+            for i, q in enumerate(fresh):
+                text = question_text(q).strip()
+                embedding = vectors[i].astype(np.float32).tobytes() if vectors is not None else None
+                cursor = conn.execute(
+                    """INSERT OR IGNORE INTO questions
+                       (question, question_norm, difficulty, weight, skills, answers, requires_code, job_title, embedding, created_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (
+                        text,
+                        normalize_question_text(text),
+                        q.get("difficulty", "medium"),
+                        int(q.get("weight", 3) or 3),
+                        json.dumps(tag_question_skills(text, skills)),
+                        json.dumps(q.get("answers", {})),
+                        1 if q.get("requires_code") else 0,
+                        job_title,
+                        embedding,
+                        now,
+                    )
+                )
+                inserted += cursor.rowcount
+            self.index_dirty = True
+
+        print(f"[INFO] Question bank: stored {inserted} new question(s)")
+        return inserted
+
+    def add_from_answers_csv(self, csv_path, skills=None, job_title=None):
+        """Store the questions and answers from a pipeline interview_output.csv"""
+        if not os.path.exists(csv_path):
+            print(f"[WARNING] Question bank: CSV not found: {csv_path}")
+            return 0
+
+        weights = {"beginner": 1, "medium": 3, "hard": 5}
+        grouped = {}
+        with open(csv_path, "r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                text = row.get("question", "")
+                entry = grouped.setdefault(text, {
+                    "question": text,
+                    "difficulty": row.get("level", "medium"),
+                    "weight": weights.get(row.get("level"), 3),
+                    "requires_code": row.get("requires_code", "false").lower() == "true",
+                    "answers": {}
+                })
+                if row.get("strength") and row.get("answer"):
+                    entry["answers"][row["strength"]] = row["answer"]
+
+        # Only questions with a full answer set are worth reusing
+        complete = [q for q in grouped.values() if all(s in q["answers"] for s in ANSWER_STRENGTHS)]
+        return self.add_questions(complete, skills=skills, job_title=job_title)
+
+    # === READ ===
+
+    def _load_rows(self, columns="*", where="", params=()):
+        with self._connect() as conn:
+            return conn.execute(f"SELECT {columns} FROM questions {where}", params).fetchall()
+
+    def _stored_norms(self, norms):
+        """The subset of normalized question texts that are already in the bank"""
+        norms = list(set(norms))
+        stored = set()
+        for start in range(0, len(norms), 500):  # Stay under SQLite's bound-parameter limit
+            chunk = norms[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            rows = self._load_rows(columns="question_norm", where=f"WHERE question_norm IN ({placeholders})",
+                                   params=tuple(chunk))
+            stored.update(row[0] for row in rows)
+        return stored
+
+    def _ensure_index(self):
+        """(Re)build the vector index from stored embeddings when the bank has changed"""
+        with self.lock:
+            if not self.index_dirty:
+                return
+            rows = self._load_rows(columns="id, embedding", where="WHERE embedding IS NOT NULL")
+            self.index_ids = [row[0] for row in rows]
+            if not rows:
+                self.index = None
+            else:
+                matrix = np.vstack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+                if faiss is not None:
+                    self.index = faiss.IndexFlatIP(matrix.shape[1])
+                    self.index.add(matrix)
+                else:
+                    self.index = matrix
+            self.index_dirty = False
+
+    def _vector_scores(self, query_text):
+        """Map of question id -> cosine similarity to the query"""
+        self._ensure_index()
+        if self.index is None:
+            return {}
+        query = embed_texts([query_text])
+        if query is None:
+            return {}
+        query = query.astype(np.float32)
+
+        if faiss is not None:
+            scores, positions = self.index.search(query, len(self.index_ids))
+            return {self.index_ids[p]: float(s) for s, p in zip(scores[0], positions[0]) if p >= 0}
+        scores = self.index @ query[0]
+        return {qid: float(s) for qid, s in zip(self.index_ids, scores)}
+
+    def _nearest_scores(self, vectors):
+        """Highest cosine similarity of each vector to any stored question (0 when the index is empty)"""
+        self._ensure_index()
+        vectors = vectors.astype(np.float32)
+        if self.index is None:
+            return np.zeros(len(vectors))
+        if faiss is not None:
+            scores, _ = self.index.search(vectors, 1)
+            return scores[:, 0]
+        return (self.index @ vectors.T).max(axis=0)
+
+    def retrieve(self, difficulty, count, skills=None, query_text="", requires_code=False, exclude=None):
+        """
+        Return up to `count` bank questions for a difficulty level, ranked by skill overlap
+        and vector similarity to `query_text`. Questions in `exclude` are never returned.
+        """
+        if count <= 0:
+            return []
+
+        skills = set(s.lower() for s in (skills or []))
+        rows = self._load_rows(
+            columns="id, question, difficulty, weight, skills, answers, requires_code",
+            where="WHERE difficulty = ? AND requires_code = ?",
+            params=(difficulty, 1 if requires_code else 0)
+        )
+        if not rows:
+            return []
+
+        vector_scores = self._vector_scores(query_text) if query_text else {}
+        excluded = set(normalize_question_text(question_text(q)) for q in (exclude or []))
+
+        ranked = []
+        for qid, text, level, weight, skills_json, answers_json, code_flag in rows:
+            if normalize_question_text(text) in excluded:
+                continue
+            tags = set(json.loads(skills_json or "[]"))
+            overlap = len(tags & skills) / len(tags) if tags else 0.0
+            if tags and not overlap:
+                continue  # Tagged for skills this candidate doesn't have
+            score = 0.5 * overlap + 0.5 * vector_scores.get(qid, 0.0)
+            if score < MIN_RETRIEVAL_SCORE:
+                continue
+            ranked.append((score, qid, {
+                "question": text,
+                "difficulty": level,
+                "weight": weight,
+                "requires_code": bool(code_flag),
+                "answers": json.loads(answers_json or "{}"),
+                "skills": sorted(tags),
+                "from_bank": True,
+            }))
+
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        selected = []
+        for score, qid, q in ranked:
+            # Two bank questions can still be paraphrases of each other
+            if filter_new_questions([q], selected):
+                selected.append(q)
+            if len(selected) >= count:
+                break
+
+        if selected:
+            with self._connect() as conn:
+                conn.executemany(
+                    "UPDATE questions SET times_used = times_used + 1 WHERE question_norm = ?",
+                    [(normalize_question_text(q["question"]),) for q in selected]
+                )
+        print(f"[INFO] Question bank: reused {len(selected)}/{count} {difficulty} question(s)")
+        return selected
+
+    def stats(self):
+        rows = self._load_rows(columns="difficulty, COUNT(*), SUM(times_used)", where="GROUP BY difficulty")
+        return {level: {"questions": total, "times_used": used or 0} for level, total, used in rows}
+
+
+question_bank = None
+question_bank_lock = threading.Lock()
+
+
+def get_question_bank():
+    """Shared QuestionBank instance (created on first use)"""
+    global question_bank
+    with question_bank_lock:
+        if question_bank is None:
+            question_bank = QuestionBank()
+        return question_bank
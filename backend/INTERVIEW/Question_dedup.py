@@ -0,0 +1,122 @@
+import re
+from difflib import SequenceMatcher
+
+import numpy as np
+
+
+# === CONFIGURATION ===
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"  # Same model the support bot uses for FAQ retrieval
+DEFAULT_SIMILARITY_THRESHOLD = 0.88
+
+# Loaded lazily so importing the parser doesn't pull the model into memory
+embedding_model = None
+embedding_model_failed = False
+
+
+def get_embedding_model():
+    """Load the sentence-transformer model once; returns None if it is unavailable"""
+    global embedding_model, embedding_model_failed
+    if embedding_model is None and not embedding_model_failed:
+        try:
+            from sentence_transformers import SentenceTransformer
+            print(f"[INFO] Loading embedding model for question dedup: {EMBEDDING_MODEL_NAME}")
+            embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+        except Exception as e:
+            print(f"[WARNING] Embedding model unavailable ({e}). Falling back to lexical similarity.")
+            embedding_model_failed = True
+    return embedding_model
+
+
+def normalize_question_text(text):
+    text = (text or "").lower()
+    text = re.sub(r"[^a-z0-9\s]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def question_text(question):
+    """Questions are dicts from the generators ({"question": ...}) or DB rows ({"question_text": ...})"""
+    if isinstance(question, dict):
+        return question.get("question") or question.get("question_text") or ""
+    return str(question or "")
+
+
+def embed_texts(texts):
+    """
+    Return an (n, dim) array of L2-normalized embeddings, or None when no
+    embedding model is available.
+    """
+    model = get_embedding_model()
+    if model is None or not texts:
+        return None
+    return model.encode(list(texts), convert_to_numpy=True, normalize_embeddings=True)
+
+
+def similarity_matrix(texts_a, texts_b):
+    """Cosine similarity between two lists of texts (lexical ratio if embeddings are unavailable)"""
+    if not texts_a or not texts_b:
+        return np.zeros((len(texts_a), len(texts_b)))
+
+    vectors = embed_texts(list(texts_a) + list(texts_b))
+    if vectors is not None:
+        a, b = vectors[:len(texts_a)], vectors[len(texts_a):]
+        return a @ b.T
+
+    norm_a = [normalize_question_text(t) for t in texts_a]
+    norm_b = [normalize_question_text(t) for t in texts_b]
+    return np.array([[SequenceMatcher(None, x, y).ratio() for y in norm_b] for x in norm_a])
+
+
+def filter_new_questions(candidates, existing, threshold=DEFAULT_SIMILARITY_THRESHOLD):
+    """
+    Keep only the candidates that are not near-duplicates of `existing`
+    or of an earlier candidate in the same batch.
+    """
+    candidates = [q for q in candidates if question_text(q).strip()]
+    if not candidates:
+        return []
+
+    candidate_texts = [question_text(q) for q in candidates]
+    existing_texts = [question_text(q) for q in existing if question_text(q).strip()]
+    all_texts = existing_texts + candidate_texts
+    sims = similarity_matrix(candidate_texts, all_texts)
+
+    kept = []
+    kept_indices = list(range(len(existing_texts)))
+    for i, q in enumerate(candidates):
+        if kept_indices and max(sims[i][j] for j in kept_indices) >= threshold:
+            print(f"[DEBUG] Dropping near-duplicate question: {candidate_texts[i][:80]}...")
+            continue
+        kept.append(q)
+        kept_indices.append(len(existing_texts) + i)
+    return kept
+
+
+def deduplicate_questions_by_level(questions_by_level, levels=("beginner", "medium", "hard"),
+                                   threshold=DEFAULT_SIMILARITY_THRESHOLD):
+    """
+    Remove semantic duplicates across all levels in one pass. The first occurrence
+    wins, so easier levels keep their questions. Returns (deduped, missing_counts).
+    """
+    seen = []
+    deduped = {}
+    missing = {}
+    for level in levels:
+        questions = questions_by_level.get(level, [])
+        kept = filter_new_questions(questions, seen, threshold)
+        deduped[level] = kept
+        missing[level] = len(questions) - len(kept)
+        seen.extend(kept)
+    return deduped, missing
+
+
+def build_avoid_block(questions, limit=30):
+    """Prompt suffix listing questions the model must not repeat"""
+    texts = [question_text(q) for q in questions if question_text(q).strip()]
+    if not texts:
+        return ""
+    listed = "\n".join(f"- {t}" for t in texts[-limit:])
+    return f"""
+
+ALREADY ASKED (do NOT repeat or paraphrase any of these):
+{listed}
+"""
@@ -1,18 +1,29 @@
 
 import argparse
 import os
+import sys
 import json
 import textract
 import ollama
 import re
+import time
 from datetime import datetime
 from collections import defaultdict
+from contextlib import nullcontext
 import csv
 from io import StringIO
 from textract import process
 import PyPDF2
 import docx
 from colorama import Fore, Style, init
+
+# Allow running from the INTERVIEW folder directly (app.py already has backend/ on the path)
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+from common.tracing import percentile
+from Question_dedup import filter_new_questions, deduplicate_questions_by_level, build_avoid_block
+from Question_bank import get_question_bank, extract_resume_skills
 init(autoreset=True)
 
 ENABLE_LOGGING = False
@@ -31,6 +42,12 @@ RESUME_PATH = "C:\\Users\\neera\\Downloads\\iimjobs_srinivas.pdf"  # <-- Update
 CONFIG_PATH = "E:\\many\\SEPERATE_RESUME\\RESUME\\interview_config.json"
 PARSED_RESUME_PATH = "E:\\many\\SEPERATE_RESUME\\RESUME\\parsed_resume.json"
 
+# Set in batch worker processes to cap concurrent LLM calls (see init_batch_worker)
+llm_semaphore = None
+
+# Difficulty level -> question weight (same mapping the generators and coding merge use)
+LEVEL_WEIGHTS = {"beginner": 1, "medium": 3, "hard": 5}
+
 def sanitize_json_string(s):
     # Remove all control characters except newline (\n), tab (\t), carriage return (\r)
     s = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F]', '', s)
@@ -382,18 +399,9 @@ def extract_json_array(text):
     return []
 
 
-def generate_core_questions(structured_resume, job_title, job_description, beginner_count=2, medium_count=2, hard_count=2, model="llama3"):
-    def generate_questions_by_level(level, count, weight, max_retries=100000):
-        # Map the level to the correct database constraint values
-        level_mapping = {
-            'beginner': 'easy',
-            'medium': 'medium', 
-            'hard': 'hard'
-        }
-        db_level = level_mapping.get(level, level)
-        
-        for attempt in range(max_retries):
-            prompt = f"""
+def build_core_question_prompt(structured_resume, job_title, job_description, level, count, weight):
+    """Prompt for resume-based theory questions at one difficulty level"""
+    return f"""
 You are an expert interview question generator.
 
 Your task is to create THEORY-BASED interview questions for a candidate applying to the role of **{job_title}**.
@@ -463,178 +471,13 @@ Provide ONLY a pure JSON array with EXACTLY {count} items:
 
 No markdown, no extra text, no explanation.
 """
-            try:
-                response = try_ollama_chat(prompt.strip(), model=model)
-                raw = response["message"]["content"]
-                questions = extract_json_array(raw)
-                if len(questions) == count:
-                    return questions
-                else:
-                    print(f"[WARNING] Got {len(questions)} {level} questions instead of {count}. Retrying...")
-            except Exception as e:
-                print(f"[ERROR] Failed to generate {level} questions: {e}")
-        print(f"[ERROR] Failed to get valid {level} questions after {max_retries} attempts.")
-        return []
-
-    print("[INFO] Generating core questions by difficulty...")
-    beginner_qs = generate_questions_by_level("beginner", beginner_count, 1)
-    medium_qs = generate_questions_by_level("medium", medium_count, 3)
-    hard_qs = generate_questions_by_level("hard", hard_count, 5)
-
-    print(f"[DEBUG] Beginner: {len(beginner_qs)} | Medium: {len(medium_qs)} | Hard: {len(hard_qs)}")
-
-    return {
-        "beginner": beginner_qs,
-        "medium": medium_qs,
-        "hard": hard_qs
-    }
-
-# === CODING QUESTIONS GENERATION ===
-
-def generate_coding_questions(structured_resume, job_title, job_description, coding_count=0, model="llama3"):
-    """
-    Generate coding/programming interview questions based on resume and job description.
-    Questions will be categorized by weight (1=beginner, 3=medium, 5=hard).
-    
-    Args:
-        structured_resume: Parsed resume data (dict)
-        job_title: Job title string
-        job_description: Job description string
-        coding_count: Number of coding questions to generate (0-5)
-        model: LLM model to use
-    
-    Returns:
-        List of coding questions with varying weights
-    """
-    if coding_count <= 0:
-        return []
-    
-    def generate_coding_questions_internal(count, max_retries=100000):
-        for attempt in range(max_retries):
-            prompt = f"""
-You are an expert technical interviewer.
-
-Your job is to generate CLEAR, PRECISE, IMPLEMENTABLE coding tasks for the candidate.
-
-THESE ARE NOT THEORY QUESTIONS.
-THESE ARE REAL CODING PROBLEMS THAT REQUIRE WRITING ACTUAL CODE.
-
-=====================================================================
-RESUME — extract ONLY relevant coding signals from this:
-- Programming languages the candidate claims (Python, Java, SQL, JS, etc.)
-- Technical skills (APIs, data structures, parsing, automation scripting)
-- Tools/libraries that involve coding (requests, pandas, SQL, regex, etc.)
-
-RESUME (Structured JSON):
-{json.dumps(structured_resume, indent=2)}
-
-=====================================================================
-JOB DESCRIPTION — use ONLY skill expectations, NOT responsibilities:
-- Required languages
-- Required data handling
-- Required API or automation logic
-- Required algorithms or processing steps
-
-JOB DESCRIPTION:
-{job_description}
-
-=====================================================================
-MANDATORY RULES FOR CODING QUESTIONS
-=====================================================================
-
-1. Every question MUST be a direct coding task:
-   - "Write a function that…"
-   - "Given X, return Y…"
-   - "Write SQL query to…"
-   - "Parse this…"
-   - "Transform this data…"
-
-2. Questions MUST match BOTH resume & JD skill intersection:
-   - If resume = Python + SQL and JD = Python + APIs → ask Python/API/SQL tasks.
-   - If resume = JavaScript and JD = React → ask JS/array/object tasks.
-   - If resume = Python only and JD = cloud engineer → ask Python logic tasks.
-
-3. Tasks MUST be unambiguous:
-   - One correct output expectation
-   - Provide example input/output when helpful
-
-4. Difficulty:
-   - EASY (weight 1):
-       * Reverse a string
-       * Remove duplicates
-       * Parse a simple JSON
-       * Basic SQL SELECT + WHERE
-   - MEDIUM (weight 3):
-       * Parse CSV/JSON and transform it
-       * API GET + filter response
-       * SQL JOIN with grouped aggregation
-       * Regex extraction tasks
-   - HARD (weight 5):
-       * Build mini utility (retry API call, pagination, file processor)
-       * Complex SQL query (window functions, multi-table)
-       * Multi-step data transformation
-       * Error handling + logic branching
-
-5. DO NOT create:
-   - Vague theoretical discussion questions
-   - System design questions
-   - LeetCode-style puzzles unrelated to resume/JD
-   - Overly long projects
-
-6. If resume language and JD language mismatch:
-   - PRIORITIZE resume language.
-   - Include JD-style logic in the task.
-
-=====================================================================
-OUTPUT FORMAT
-=====================================================================
-
-Return ONLY a pure JSON array with EXACTLY {count} items:
-
-[
-  {{
-    "question": "Write a Python function that takes a list of user dicts and returns only those whose 'active' field is true.",
-    "difficulty": "coding",
-    "weight": 1
-  }}
-]
-
-NO extras. NO markdown. JSON ONLY.
-"""
-            try:
-                response = try_ollama_chat(prompt.strip(), model=model)
-                raw = response["message"]["content"]
-                questions = extract_json_array(raw)
-                if len(questions) == count:
-                    return questions
-                else:
-                    print(f"[WARNING] Got {len(questions)} coding questions instead of {count}. Retrying...")
-            except Exception as e:
-                print(f"[ERROR] Failed to generate coding questions: {e}")
-        print(f"[ERROR] Failed to get valid coding questions after {max_retries} attempts.")
-        return []
-    
-    print(f"[INFO] Generating {coding_count} coding questions...")
-    coding_qs = generate_coding_questions_internal(coding_count)
-    print(f"[DEBUG] Coding questions generated: {len(coding_qs)}")
-    
-    return coding_qs
-
-# === END OF CODING QUESTIONS GENERATION ===
 
-# === CORE QUESTION GENERATION WITH SPLIT INTEGRATED ===
 
-def generate_split_questions(structured_resume, job_title, job_description,
-                             beginner_count=2, medium_count=2, hard_count=2,
-                             resume_pct=50, jd_pct=50, model="llama3"):
-    def generate_questions_by_source(level, count, weight, source, max_retries=100000):
-        if count <= 0:
-            return []
-        """Helper: generate questions from either resume or JD context"""
-        for attempt in range(max_retries):
-            if source == "resume":
-                # Resume-source prompt - MUST force resume-based theory questions
-                prompt = f"""
+def build_split_question_prompt(structured_resume, job_title, job_description, level, count, weight, source, resume_pct, jd_pct):
+    """Split mode prompt for one bucket (source: "resume" or "jd")"""
+    if source == "resume":
+        # Resume-source prompt - MUST force resume-based theory questions
+        return f"""
 You are an expert interview question generator for the role of **{job_title}**.
 
 Generate theory-based interview questions that come ONLY from the candidate's RESUME.
@@ -680,9 +523,9 @@ Return ONLY a pure JSON array with EXACTLY {count} items:
 
 No explanations or text outside JSON.
 """
-            else:  # JD source
-                # JD-source prompt - MUST force JD-based theory questions but aligned with resume
-                prompt = f"""
+    else:  # JD source
+        # JD-source prompt - MUST force JD-based theory questions but aligned with resume
+        return f"""
 You are an expert interview question generator for the role of **{job_title}**.
 
 Generate theory-based interview questions that come ONLY from the JOB DESCRIPTION.
@@ -727,99 +570,11 @@ Return ONLY a JSON array with EXACTLY {count} items:
 
 No explanations or extra text.
 """
-            try:
-                response = try_ollama_chat(prompt.strip(), model=model)
-                raw = response["message"]["content"]
-                questions = extract_json_array(raw)
-                if len(questions) == count:
-                    return questions
-                else:
-                    print(f"[WARNING] Got {len(questions)} {level}-{source} questions instead of {count}. Retrying...")
-            except Exception as e:
-                print(f"[ERROR] Failed to generate {level}-{source} questions: {e}")
-        return []
-
-    # === Calculate totals ===
-    total = beginner_count + medium_count + hard_count
-    if total == 0:
-        return {"beginner": [], "medium": [], "hard": []}
-
-    resume_total = round(total * resume_pct / 100)
-    jd_total = total - resume_total
-
-    print(f"\n{Fore.BLUE}=== SPLIT MODE DEBUG ==={Style.RESET_ALL}")
-    print(f"{Fore.CYAN}[REQUESTED]{Style.RESET_ALL} Resume={resume_pct}% ({resume_total}), JD={jd_pct}% ({jd_total})")
-
-    # === Proportional split per difficulty ===
-    def distribute(bucket_total, total):
-        if bucket_total == 0:
-            return (0, 0, 0)
-        b = round(bucket_total * (beginner_count / total))
-        m = round(bucket_total * (medium_count / total))
-        h = round(bucket_total * (hard_count / total))
-        # Fix rounding drift
-        while b + m + h < bucket_total:
-            b += 1
-        while b + m + h > bucket_total:
-            if b > 0: b -= 1
-            elif m > 0: m -= 1
-            else: h -= 1
-        return (b, m, h)
-
-    resume_dist = list(distribute(resume_total, total))
-    jd_dist = list(distribute(jd_total, total))
-
-    print(f"{Fore.CYAN}[BALANCED]{Style.RESET_ALL}")
-    print(f"  {Fore.YELLOW}Resume -> Beginner={resume_dist[0]}, Medium={resume_dist[1]}, Hard={resume_dist[2]}{Style.RESET_ALL}")
-    print(f"  {Fore.GREEN}JD     -> Beginner={jd_dist[0]}, Medium={jd_dist[1]}, Hard={jd_dist[2]}{Style.RESET_ALL}")
-    print(f"{Fore.BLUE}=========================={Style.RESET_ALL}\n")
-
-    # === Generate questions ===
-    beginner_qs, medium_qs, hard_qs = [], [], []
-
-    beginner_qs.extend(generate_questions_by_source("beginner", resume_dist[0], 1, "resume"))
-    beginner_qs.extend(generate_questions_by_source("beginner", jd_dist[0], 1, "jd"))
-
-    medium_qs.extend(generate_questions_by_source("medium", resume_dist[1], 3, "resume"))
-    medium_qs.extend(generate_questions_by_source("medium", jd_dist[1], 3, "jd"))
-
-    hard_qs.extend(generate_questions_by_source("hard", resume_dist[2], 5, "resume"))
-    hard_qs.extend(generate_questions_by_source("hard", jd_dist[2], 5, "jd"))
-
-    print(f"[DONE] Final counts -> Beginner: {len(beginner_qs)}, Medium: {len(medium_qs)}, Hard: {len(hard_qs)}")
-
-    return {
-        "beginner": beginner_qs,
-        "medium": medium_qs,
-        "hard": hard_qs
-    }
-
-# === END OF CORE QUESTION GENERATION WITH SPLIT INTEGRATED ===
-
 
 
-# === CORE QUESTION GENERATION WITH BLEND INTEGRATED ===
-
-def generate_blend_questions(structured_resume, job_title, job_description,
-                             beginner_count=2, medium_count=2, hard_count=2,
-                             blend_pct_resume=50, blend_pct_jd=50, model="llama3"):
-    """
-    Generate interview questions where each question blends resume and JD info
-    according to given percentages.
-    """
-
-    def generate_questions_blend(level, count, weight, max_retries=100000):
-        if count <= 0: 
-            return []
-        level_mapping = {
-            'beginner': 'easy',
-            'medium': 'medium',
-            'hard': 'hard'
-        }
-        db_level = level_mapping.get(level, level)
-
-        for attempt in range(max_retries):
-            prompt = f"""
+def build_blend_question_prompt(structured_resume, job_title, job_description, level, count, weight, blend_pct_resume, blend_pct_jd):
+    """Blend mode prompt: every question mixes resume and JD by the blend weights"""
+    return f"""
 You are an expert interview question generator.
 
 Your task is to generate THEORY-BASED interview questions for the role of **{job_title}** that blend BOTH:
@@ -893,27 +648,512 @@ Return ONLY a JSON array with EXACTLY {count} questions:
 
 No markdown, no explanation, no extra text.
 """
-            try:
-                response = try_ollama_chat(prompt.strip(), model=model)
-                raw = response["message"]["content"]
-                questions = extract_json_array(raw)
-                if len(questions) == count:
-                    return questions
-                else:
-                    print(f"[WARNING] Got {len(questions)} {level}-blend questions instead of {count}. Retrying...")
-            except Exception as e:
-                print(f"[ERROR] Failed to generate {level}-blend questions: {e}")
-        return []
 
-    print(f"[INFO] Generating blended questions (Resume {blend_pct_resume}% | JD {blend_pct_jd}%)")
 
-    beginner_qs, medium_qs, hard_qs = [], [], []
+def build_hybrid_question_prompt(structured_resume, job_title, job_description, level, count, weight, source,
+                                 resume_pct, jd_pct, blend_pct_resume, blend_pct_jd):
+    """Hybrid mode prompt for one bucket (source: "resume", "jd" or "blend")"""
+    if source == "blend":
+        return f"""
+You are an expert interview question generator.
 
-    if beginner_count > 0:
-        beginner_qs = generate_questions_blend("beginner", beginner_count, 1)
-    if medium_count > 0:
-        medium_qs = generate_questions_blend("medium", medium_count, 3)
-    if hard_count > 0:
+This question belongs to the **BLENDED bucket** of Hybrid Mode.
+
+Blend Ratio:
+- {blend_pct_resume}% Resume grounding
+- {blend_pct_jd}% JD grounding
+
+==============================
+RESUME (Structured JSON)
+==============================
+{json.dumps(structured_resume, indent=2)}
+
+==============================
+JOB DESCRIPTION
+==============================
+{job_description}
+
+HYBRID MODE BLEND RULES:
+- EACH question must integrate BOTH resume + JD meaningfully.
+- Follow blend weighting:
+  - {blend_pct_resume}% → resume projects, tools, workflows, responsibilities
+  - {blend_pct_jd}% → JD role expectations, skills, methodologies
+- NO coding questions.
+- NO generic questions.
+- Each question must reference BOTH resume content and JD expectations.
+
+DIFFICULTY:
+- BEGINNER: simple blended conceptual questions
+- MEDIUM: resume implementation + JD responsibilities
+- HARD: deep reasoning using resume experience to meet JD needs
+
+OUTPUT: Pure JSON array of {count} items:
+[
+  {{
+    "question": "...",
+    "difficulty": "{level}",
+    "weight": {weight}
+  }}
+]
+"""
+
+    if source == "resume":
+        # Resume Bucket Prompt for Hybrid Mode
+        return f"""
+You are an expert interview question generator.
+
+This question belongs to the **RESUME-ONLY bucket** of Hybrid Mode.
+
+==============================
+RESUME (Structured JSON)
+==============================
+{json.dumps(structured_resume, indent=2)}
+
+==============================
+JOB DESCRIPTION (Context Only)
+==============================
+{job_description}
+
+HYBRID MODE RULES:
+- Resume-only bucket weight: {resume_pct}% of total hybrid questions.
+- Every question MUST be deeply grounded in resume specifics.
+- Use candidate's:
+  - projects
+  - tools / technologies
+  - responsibilities
+  - domain exposure
+  - achievements
+- DO NOT generate JD-generic or textbook questions.
+- DO NOT generate coding questions.
+
+DIFFICULTY:
+- BEGINNER: simple concepts from resume
+- MEDIUM: implementation details from resume
+- HARD: reasoning, tradeoffs, challenges from resume
+
+OUTPUT: Pure JSON array of {count} items:
+[
+  {{
+    "question": "...",
+    "difficulty": "{level}",
+    "weight": {weight}
+  }}
+]
+"""
+    else:  # JD source
+        # JD Bucket Prompt for Hybrid Mode
+        return f"""
+You are an expert interview question generator.
+
+This question belongs to the **JD-ONLY bucket** of Hybrid Mode.
+
+==============================
+JOB DESCRIPTION
+==============================
+{job_description}
+
+==============================
+RESUME (Used ONLY for alignment)
+==============================
+{json.dumps(structured_resume, indent=2)}
+
+HYBRID MODE RULES:
+- JD-only bucket weight: {jd_pct}% of hybrid questions.
+- Focus on required tools, responsibilities, domain skills from the JD.
+- ALIGN questions with resume when possible.
+- DO NOT generate resume-centric questions.
+- DO NOT generate coding questions.
+
+DIFFICULTY:
+- BEGINNER: basic JD-aligned concepts
+- MEDIUM: process/methodology questions tied to JD
+- HARD: deeper conceptual or architectural reasoning tied to JD
+
+OUTPUT: Pure JSON array of {count} items:
+[
+  {{
+    "question": "...",
+    "difficulty": "{level}",
+    "weight": {weight}
+  }}
+]
+"""
+
+
+def collect_unique_questions(build_prompt, count, label, model="llama3", max_retries=100000, existing=None):
+    """
+    Ask the LLM for `count` questions, dropping near-duplicates of `existing` and of
+    each other. Retries only request the missing items instead of the whole batch.
+    """
+    if count <= 0:
+        return []
+
+    existing = list(existing or [])
+    collected = []
+    for attempt in range(max_retries):
+        missing = count - len(collected)
+        if missing <= 0:
+            break
+
+        prompt = build_prompt(missing).strip() + build_avoid_block(existing + collected)
+        try:
+            response = try_ollama_chat(prompt, model=model)
+            batch = extract_json_array(response["message"]["content"])
+        except Exception as e:
+            print(f"[ERROR] Failed to generate {label} questions: {e}")
+            continue
+
+        fresh = filter_new_questions(batch, existing + collected)
+        collected.extend(fresh[:missing])
+        if len(collected) < count:
+            print(f"[WARNING] Got {len(collected)}/{count} unique {label} questions. Requesting {count - len(collected)} more...")
+
+    if len(collected) < count:
+        print(f"[ERROR] Could only generate {len(collected)}/{count} unique {label} questions")
+    return collected
+
+
+def tag_question_source(questions, source):
+    """Record which prompt produced each question, so top-ups can reuse the same prompt"""
+    for q in questions:
+        q.setdefault("source", source)
+    return questions
+
+
+def question_prompt_builder(mode, structured_resume, job_title, job_description,
+                            resume_pct=50, jd_pct=50, blend_pct_resume=50, blend_pct_jd=50):
+    """
+    Prompt builder for the active generation mode ("core", "split", "blend", "hybrid"),
+    called as build(level, count, weight, source) with the source a question was tagged with.
+    """
+    def build(level, count, weight, source):
+        if mode == "hybrid":
+            return build_hybrid_question_prompt(structured_resume, job_title, job_description, level, count, weight,
+                                                source if source in ("resume", "jd", "blend") else "blend",
+                                                resume_pct, jd_pct, blend_pct_resume, blend_pct_jd)
+        if mode == "split":
+            return build_split_question_prompt(structured_resume, job_title, job_description, level, count, weight,
+                                               source if source in ("resume", "jd") else "resume", resume_pct, jd_pct)
+        if mode == "blend":
+            return build_blend_question_prompt(structured_resume, job_title, job_description, level, count, weight,
+                                               blend_pct_resume, blend_pct_jd)
+        return build_core_question_prompt(structured_resume, job_title, job_description, level, count, weight)
+    return build
+
+
+def dedupe_and_top_up_questions(questions_by_level, build_prompt, model="llama3", max_retries=3):
+    """
+    Remove semantic duplicates across difficulty levels, then regenerate only the
+    questions each level lost, each with the prompt (mode and source) that produced
+    the removed question. build_prompt comes from question_prompt_builder().
+    """
+    deduped, missing_counts = deduplicate_questions_by_level(questions_by_level, LEVEL_WEIGHTS.keys())
+    for level, missing in missing_counts.items():
+        if missing <= 0:
+            continue
+        kept_ids = {id(q) for q in deduped[level]}
+        removed_sources = defaultdict(int)
+        for q in questions_by_level.get(level, []):
+            if id(q) not in kept_ids:
+                removed_sources[q.get("source", "core") if isinstance(q, dict) else "core"] += 1
+
+        print(f"[INFO] Removed {missing} cross-level duplicate(s) from {level} "
+              f"({dict(removed_sources)}). Topping up...")
+        weight = LEVEL_WEIGHTS[level]
+        for source, count in removed_sources.items():
+            all_questions = [q for qs in deduped.values() for q in qs]
+            extra = collect_unique_questions(
+                lambda n, level=level, weight=weight, source=source: build_prompt(level, n, weight, source),
+                count, f"{level}-{source}", model=model, max_retries=max_retries, existing=all_questions
+            )
+            deduped[level].extend(tag_question_source(extra, source))
+
+    # Keep any non-level keys (e.g. coding) untouched
+    for key, value in questions_by_level.items():
+        if key not in deduped:
+            deduped[key] = value
+    return deduped
+
+
+def generate_core_questions(structured_resume, job_title, job_description, beginner_count=2, medium_count=2, hard_count=2, model="llama3", use_question_bank=False):
+    """
+    Generate theory questions per difficulty. With use_question_bank=True, matching
+    questions (and their answers) are pulled from the question bank first and the LLM
+    only generates the remainder.
+    """
+    resume_skills = extract_resume_skills(structured_resume)
+    bank_query = f"{job_title}. Skills: {', '.join(resume_skills[:30])}"
+
+    def generate_questions_by_level(level, count, weight, max_retries=100000):
+        # Map the level to the correct database constraint values
+        level_mapping = {
+            'beginner': 'easy',
+            'medium': 'medium', 
+            'hard': 'hard'
+        }
+        db_level = level_mapping.get(level, level)
+
+        def build_prompt(count):
+            return build_core_question_prompt(structured_resume, job_title, job_description, level, count, weight)
+
+        reused = []
+        if use_question_bank:
+            try:
+                reused = get_question_bank().retrieve(level, count, skills=resume_skills, query_text=bank_query)
+            except Exception as e:
+                print(f"[WARNING] Question bank lookup failed for {level}: {e}")
+
+        generated = collect_unique_questions(build_prompt, count - len(reused), level, model=model,
+                                             max_retries=max_retries, existing=reused)
+        return tag_question_source(reused + generated, "core")
+
+    print("[INFO] Generating core questions by difficulty...")
+    beginner_qs = generate_questions_by_level("beginner", beginner_count, 1)
+    medium_qs = generate_questions_by_level("medium", medium_count, 3)
+    hard_qs = generate_questions_by_level("hard", hard_count, 5)
+
+    print(f"[DEBUG] Beginner: {len(beginner_qs)} | Medium: {len(medium_qs)} | Hard: {len(hard_qs)}")
+
+    return {
+        "beginner": beginner_qs,
+        "medium": medium_qs,
+        "hard": hard_qs
+    }
+
+# === CODING QUESTIONS GENERATION ===
+
+def generate_coding_questions(structured_resume, job_title, job_description, coding_count=0, model="llama3"):
+    """
+    Generate coding/programming interview questions based on resume and job description.
+    Questions will be categorized by weight (1=beginner, 3=medium, 5=hard).
+    
+    Args:
+        structured_resume: Parsed resume data (dict)
+        job_title: Job title string
+        job_description: Job description string
+        coding_count: Number of coding questions to generate (0-5)
+        model: LLM model to use
+    
+    Returns:
+        List of coding questions with varying weights
+    """
+    if coding_count <= 0:
+        return []
+    
+    def generate_coding_questions_internal(count, max_retries=100000):
+        def build_prompt(count):
+            return f"""
+You are an expert technical interviewer.
+
+Your job is to generate CLEAR, PRECISE, IMPLEMENTABLE coding tasks for the candidate.
+
+THESE ARE NOT THEORY QUESTIONS.
+THESE ARE REAL CODING PROBLEMS THAT REQUIRE WRITING ACTUAL CODE.
+
+=====================================================================
+RESUME — extract ONLY relevant coding signals from this:
+- Programming languages the candidate claims (Python, Java, SQL, JS, etc.)
+- Technical skills (APIs, data structures, parsing, automation scripting)
+- Tools/libraries that involve coding (requests, pandas, SQL, regex, etc.)
+
+RESUME (Structured JSON):
+{json.dumps(structured_resume, indent=2)}
+
+=====================================================================
+JOB DESCRIPTION — use ONLY skill expectations, NOT responsibilities:
+- Required languages
+- Required data handling
+- Required API or automation logic
+- Required algorithms or processing steps
+
+JOB DESCRIPTION:
+{job_description}
+
+=====================================================================
+MANDATORY RULES FOR CODING QUESTIONS
+=====================================================================
+
+1. Every question MUST be a direct coding task:
+   - "Write a function that…"
+   - "Given X, return Y…"
+   - "Write SQL query to…"
+   - "Parse this…"
+   - "Transform this data…"
+
+2. Questions MUST match BOTH resume & JD skill intersection:
+   - If resume = Python + SQL and JD = Python + APIs → ask Python/API/SQL tasks.
+   - If resume = JavaScript and JD = React → ask JS/array/object tasks.
+   - If resume = Python only and JD = cloud engineer → ask Python logic tasks.
+
+3. Tasks MUST be unambiguous:
+   - One correct output expectation
+   - Provide example input/output when helpful
+
+4. Difficulty:
+   - EASY (weight 1):
+       * Reverse a string
+       * Remove duplicates
+       * Parse a simple JSON
+       * Basic SQL SELECT + WHERE
+   - MEDIUM (weight 3):
+       * Parse CSV/JSON and transform it
+       * API GET + filter response
+       * SQL JOIN with grouped aggregation
+       * Regex extraction tasks
+   - HARD (weight 5):
+       * Build mini utility (retry API call, pagination, file processor)
+       * Complex SQL query (window functions, multi-table)
+       * Multi-step data transformation
+       * Error handling + logic branching
+
+5. DO NOT create:
+   - Vague theoretical discussion questions
+   - System design questions
+   - LeetCode-style puzzles unrelated to resume/JD
+   - Overly long projects
+
+6. If resume language and JD language mismatch:
+   - PRIORITIZE resume language.
+   - Include JD-style logic in the task.
+
+=====================================================================
+OUTPUT FORMAT
+=====================================================================
+
+Return ONLY a pure JSON array with EXACTLY {count} items:
+
+[
+  {{
+    "question": "Write a Python function that takes a list of user dicts and returns only those whose 'active' field is true.",
+    "difficulty": "coding",
+    "weight": 1
+  }}
+]
+
+NO extras. NO markdown. JSON ONLY.
+"""
+
+        return collect_unique_questions(build_prompt, count, "coding", model=model, max_retries=max_retries)
+    
+    print(f"[INFO] Generating {coding_count} coding questions...")
+    coding_qs = generate_coding_questions_internal(coding_count)
+    print(f"[DEBUG] Coding questions generated: {len(coding_qs)}")
+    
+    return coding_qs
+
+# === END OF CODING QUESTIONS GENERATION ===
+
+# === CORE QUESTION GENERATION WITH SPLIT INTEGRATED ===
+
+def generate_split_questions(structured_resume, job_title, job_description,
+                             beginner_count=2, medium_count=2, hard_count=2,
+                             resume_pct=50, jd_pct=50, model="llama3"):
+    def generate_questions_by_source(level, count, weight, source, max_retries=100000):
+        if count <= 0:
+            return []
+        """Helper: generate questions from either resume or JD context"""
+        def build_prompt(count):
+            return build_split_question_prompt(structured_resume, job_title, job_description, level, count, weight,
+                                               source, resume_pct, jd_pct)
+
+        questions = collect_unique_questions(build_prompt, count, f"{level}-{source}", model=model, max_retries=max_retries)
+        return tag_question_source(questions, source)
+
+    # === Calculate totals ===
+    total = beginner_count + medium_count + hard_count
+    if total == 0:
+        return {"beginner": [], "medium": [], "hard": []}
+
+    resume_total = round(total * resume_pct / 100)
+    jd_total = total - resume_total
+
+    print(f"\n{Fore.BLUE}=== SPLIT MODE DEBUG ==={Style.RESET_ALL}")
+    print(f"{Fore.CYAN}[REQUESTED]{Style.RESET_ALL} Resume={resume_pct}% ({resume_total}), JD={jd_pct}% ({jd_total})")
+
+    # === Proportional split per difficulty ===
+    def distribute(bucket_total, total):
+        if bucket_total == 0:
+            return (0, 0, 0)
+        b = round(bucket_total * (beginner_count / total))
+        m = round(bucket_total * (medium_count / total))
+        h = round(bucket_total * (hard_count / total))
+        # Fix rounding drift
+        while b + m + h < bucket_total:
+            b += 1
+        while b + m + h > bucket_total:
+            if b > 0: b -= 1
+            elif m > 0: m -= 1
+            else: h -= 1
+        return (b, m, h)
+
+    resume_dist = list(distribute(resume_total, total))
+    jd_dist = list(distribute(jd_total, total))
+
+    print(f"{Fore.CYAN}[BALANCED]{Style.RESET_ALL}")
+    print(f"  {Fore.YELLOW}Resume -> Beginner={resume_dist[0]}, Medium={resume_dist[1]}, Hard={resume_dist[2]}{Style.RESET_ALL}")
+    print(f"  {Fore.GREEN}JD     -> Beginner={jd_dist[0]}, Medium={jd_dist[1]}, Hard={jd_dist[2]}{Style.RESET_ALL}")
+    print(f"{Fore.BLUE}=========================={Style.RESET_ALL}\n")
+
+    # === Generate questions ===
+    beginner_qs, medium_qs, hard_qs = [], [], []
+
+    beginner_qs.extend(generate_questions_by_source("beginner", resume_dist[0], 1, "resume"))
+    beginner_qs.extend(generate_questions_by_source("beginner", jd_dist[0], 1, "jd"))
+
+    medium_qs.extend(generate_questions_by_source("medium", resume_dist[1], 3, "resume"))
+    medium_qs.extend(generate_questions_by_source("medium", jd_dist[1], 3, "jd"))
+
+    hard_qs.extend(generate_questions_by_source("hard", resume_dist[2], 5, "resume"))
+    hard_qs.extend(generate_questions_by_source("hard", jd_dist[2], 5, "jd"))
+
+    print(f"[DONE] Final counts -> Beginner: {len(beginner_qs)}, Medium: {len(medium_qs)}, Hard: {len(hard_qs)}")
+
+    return {
+        "beginner": beginner_qs,
+        "medium": medium_qs,
+        "hard": hard_qs
+    }
+
+# === END OF CORE QUESTION GENERATION WITH SPLIT INTEGRATED ===
+
+
+
+# === CORE QUESTION GENERATION WITH BLEND INTEGRATED ===
+
+def generate_blend_questions(structured_resume, job_title, job_description,
+                             beginner_count=2, medium_count=2, hard_count=2,
+                             blend_pct_resume=50, blend_pct_jd=50, model="llama3"):
+    """
+    Generate interview questions where each question blends resume and JD info
+    according to given percentages.
+    """
+
+    def generate_questions_blend(level, count, weight, max_retries=100000):
+        if count <= 0: 
+            return []
+        level_mapping = {
+            'beginner': 'easy',
+            'medium': 'medium',
+            'hard': 'hard'
+        }
+        db_level = level_mapping.get(level, level)
+
+        def build_prompt(count):
+            return build_blend_question_prompt(structured_resume, job_title, job_description, level, count, weight,
+                                               blend_pct_resume, blend_pct_jd)
+
+        questions = collect_unique_questions(build_prompt, count, f"{level}-blend", model=model, max_retries=max_retries)
+        return tag_question_source(questions, "blend")
+
+    print(f"[INFO] Generating blended questions (Resume {blend_pct_resume}% | JD {blend_pct_jd}%)")
+
+    beginner_qs, medium_qs, hard_qs = [], [], []
+
+    if beginner_count > 0:
+        beginner_qs = generate_questions_blend("beginner", beginner_count, 1)
+    if medium_count > 0:
+        medium_qs = generate_questions_blend("medium", medium_count, 3)
+    if hard_count > 0:
         hard_qs = generate_questions_blend("hard", hard_count, 5)
 
     return {
@@ -1039,148 +1279,28 @@ def generate_hybrid_questions(structured_resume, job_title, job_description,
     def generate_from_source(level, count, weight, source):
         if count <= 0:
             return []
-        
-        if source == "resume":
-            # Resume Bucket Prompt for Hybrid Mode
-            prompt = f"""
-You are an expert interview question generator.
-
-This question belongs to the **RESUME-ONLY bucket** of Hybrid Mode.
-
-==============================
-RESUME (Structured JSON)
-==============================
-{json.dumps(structured_resume, indent=2)}
-
-==============================
-JOB DESCRIPTION (Context Only)
-==============================
-{job_description}
-
-HYBRID MODE RULES:
-- Resume-only bucket weight: {resume_pct}% of total hybrid questions.
-- Every question MUST be deeply grounded in resume specifics.
-- Use candidate's:
-  - projects
-  - tools / technologies
-  - responsibilities
-  - domain exposure
-  - achievements
-- DO NOT generate JD-generic or textbook questions.
-- DO NOT generate coding questions.
-
-DIFFICULTY:
-- BEGINNER: simple concepts from resume
-- MEDIUM: implementation details from resume
-- HARD: reasoning, tradeoffs, challenges from resume
-
-OUTPUT: Pure JSON array of {count} items:
-[
-  {{
-    "question": "...",
-    "difficulty": "{level}",
-    "weight": {weight}
-  }}
-]
-"""
-        else:  # JD source
-            # JD Bucket Prompt for Hybrid Mode
-            prompt = f"""
-You are an expert interview question generator.
-
-This question belongs to the **JD-ONLY bucket** of Hybrid Mode.
-
-==============================
-JOB DESCRIPTION
-==============================
-{job_description}
-
-==============================
-RESUME (Used ONLY for alignment)
-==============================
-{json.dumps(structured_resume, indent=2)}
-
-HYBRID MODE RULES:
-- JD-only bucket weight: {jd_pct}% of hybrid questions.
-- Focus on required tools, responsibilities, domain skills from the JD.
-- ALIGN questions with resume when possible.
-- DO NOT generate resume-centric questions.
-- DO NOT generate coding questions.
 
-DIFFICULTY:
-- BEGINNER: basic JD-aligned concepts
-- MEDIUM: process/methodology questions tied to JD
-- HARD: deeper conceptual or architectural reasoning tied to JD
+        def build_prompt(count):
+            return build_hybrid_question_prompt(structured_resume, job_title, job_description, level, count, weight,
+                                                source, resume_pct, jd_pct, blend_pct_resume, blend_pct_jd)
 
-OUTPUT: Pure JSON array of {count} items:
-[
-  {{
-    "question": "...",
-    "difficulty": "{level}",
-    "weight": {weight}
-  }}
-]
-"""
-        try:
-            response = try_ollama_chat(prompt.strip(), model=model)
-            return extract_json_array(response["message"]["content"])
-        except Exception as e:
-            print(f"[ERROR] Failed to generate {level}-{source} questions: {e}")
-            return []
+        # Single attempt per bucket; trim_or_pad tops up whatever is still missing
+        questions = collect_unique_questions(build_prompt, count, f"{level}-{source}", model=model,
+                                             max_retries=1, existing=beginner_qs + medium_qs + hard_qs)
+        return tag_question_source(questions, source)
 
     # --- Local helper: Blended ---
     def generate_blended(level, count, weight):
         if count <= 0:
             return []
         # Blend Bucket Prompt for Hybrid Mode
-        prompt = f"""
-You are an expert interview question generator.
-
-This question belongs to the **BLENDED bucket** of Hybrid Mode.
-
-Blend Ratio:
-- {blend_pct_resume}% Resume grounding
-- {blend_pct_jd}% JD grounding
-
-==============================
-RESUME (Structured JSON)
-==============================
-{json.dumps(structured_resume, indent=2)}
-
-==============================
-JOB DESCRIPTION
-==============================
-{job_description}
-
-HYBRID MODE BLEND RULES:
-- EACH question must integrate BOTH resume + JD meaningfully.
-- Follow blend weighting:
-  - {blend_pct_resume}% → resume projects, tools, workflows, responsibilities
-  - {blend_pct_jd}% → JD role expectations, skills, methodologies
-- NO coding questions.
-- NO generic questions.
-- Each question must reference BOTH resume content and JD expectations.
+        def build_prompt(count):
+            return build_hybrid_question_prompt(structured_resume, job_title, job_description, level, count, weight,
+                                                "blend", resume_pct, jd_pct, blend_pct_resume, blend_pct_jd)
 
-DIFFICULTY:
-- BEGINNER: simple blended conceptual questions
-- MEDIUM: resume implementation + JD responsibilities
-- HARD: deep reasoning using resume experience to meet JD needs
-
-OUTPUT: Pure JSON array of {count} items:
-[
-  {{
-    "question": "...",
-    "difficulty": "{level}",
-    "weight": {weight}
-  }}
-]
-"""
-        try:
-            response = try_ollama_chat(prompt.strip(), model=model)
-            return extract_json_array(response["message"]["content"])
-        except Exception as e:
-            print(f"[ERROR] Failed to generate {level}-blend questions: {e}")
-            return []
+        questions = collect_unique_questions(build_prompt, count, f"{level}-blend", model=model,
+                                             max_retries=1, existing=beginner_qs + medium_qs + hard_qs)
+        return tag_question_source(questions, "blend")
 
     # --- Step 4–6: Generate Questions ---
     beginner_qs.extend(generate_from_source("beginner", resume_dist[0], 1, "resume"))
@@ -1200,14 +1320,16 @@ OUTPUT: Pure JSON array of {count} items:
         if len(lst) > target:
             return lst[:target]
         while len(lst) < target:
-            new_qs = generate_from_source(level, 1, weight, "jd")
+            # Ask only for the exact number of missing items
+            missing = target - len(lst)
+            new_qs = generate_from_source(level, missing, weight, "jd")
             if not new_qs:
-                new_qs = generate_from_source(level, 1, weight, "resume")
+                new_qs = generate_from_source(level, missing, weight, "resume")
             if not new_qs:
-                new_qs = generate_blended(level, 1, weight)
+                new_qs = generate_blended(level, missing, weight)
             if not new_qs:
                 new_qs = [{"question": f"Fallback {level} question", "difficulty": level, "weight": weight}]
-            lst.extend(new_qs)
+            lst.extend(new_qs[:missing])
         return lst
 
     beginner_qs = trim_or_pad(beginner_qs, beginner_count, "beginner", 1)
@@ -1228,7 +1350,14 @@ OUTPUT: Pure JSON array of {count} items:
 
 # === CORE QUESTION GENERATION WITH ANSWERS INTEGRATED ===
 
-def generate_answers_for_existing_questions(structured_resume, job_title, job_description, questions_csv_path, output_path, model="llama3"):
+def generate_answers_for_existing_questions(structured_resume, job_title, job_description, questions_csv_path, output_path, model="llama3", checkpoint=None, strict=False):
+    """
+    Write weak/medium/strong answers for every question in the CSV. With a checkpoint,
+    each answer is persisted as soon as it is generated, so a retry after a failure at
+    question N reuses the answers for questions 1..N-1 and only generates what is missing.
+    strict=True raises after the pass if any answer failed, so the caller can retry.
+    """
+    failed_answers = 0
     if not os.path.exists(questions_csv_path):
         raise FileNotFoundError(f"[ERROR] CSV not found: {questions_csv_path}")
 
@@ -1239,14 +1368,22 @@ def generate_answers_for_existing_questions(structured_resume, job_title, job_de
         writer.writerow(["question_id", "question", "level", "strength", "answer", "requires_code"])
 
         for row in reader:
-            if row.get("strength"):  # Skip rows that already have answers
+            if row.get("strength"):  # Already answered (e.g. reused from the question bank) - copy as-is
+                writer.writerow([row["question_id"], row["question"], row["level"], row["strength"], row["answer"], row.get("requires_code", "false")])
                 continue
             print(f"[DEBUG] Generating answers for {row['question_id']} [{row['level']}]: {row['question'][:80]}...")        
             
             # Get requires_code from input row (default to False if not present)
             requires_code = row.get('requires_code', 'false').lower() == 'true'
+
+            item_key = f"{row['question_id']}:{row['question']}"
+            stored = (checkpoint.get_item("answers", item_key) if checkpoint else None) or {}
             
             for strength in ["weak", "medium", "strong"]:  # These map to beginner, intermediate, expert in read_questions_from_csv
+                if strength in stored:
+                    writer.writerow([row["question_id"], row["question"], row["level"], strength, stored[strength], "true" if requires_code else "false"])
+                    print(f"[DEBUG] ↳ {strength.capitalize()} answer reused from checkpoint.")
+                    continue
                 prompt = f"""
 You are an expert interviewer.
 
@@ -1270,10 +1407,16 @@ Only respond with the answer text, no formatting.
                     # Include requires_code when writing the row
                     writer.writerow([row["question_id"], row["question"], row["level"], strength, answer, "true" if requires_code else "false"])
                     print(f"[DEBUG] ↳ {strength.capitalize()} answer generated.")
+                    if checkpoint:
+                        stored[strength] = answer
+                        checkpoint.save_item("answers", item_key, stored)
                 except Exception as e:
                     print(f"[ERROR] Failed generating answer for {row['question_id']} [{strength}]: {e}")
                     print(f"[ERROR] ↳ {strength.capitalize()} answer failed for {row['question_id']}")
+                    failed_answers += 1
 
+    if strict and failed_answers:
+        raise RuntimeError(f"{failed_answers} answer(s) failed; retry resumes from the checkpoint")
     print(f"[DONE] Answers written to: {output_path}")
 
 
@@ -1282,15 +1425,24 @@ Only respond with the answer text, no formatting.
 #---------------------------------------------------------------------------------------------------------------------------------------------
 # JD PARSING
 #---------------------------------------------------------------------------------------------------------------------------------------------
-def parse_job_description_file(file_path, model="llama3"):
+def extract_job_description_text(file_path):
+    """Extract raw text from a JD file (no LLM calls)"""
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
 
     try:
-        full_text = process(file_path).decode("utf-8", errors="ignore")
+        return process(file_path).decode("utf-8", errors="ignore")
     except Exception as e:
         raise RuntimeError(f"Text extraction failed: {e}")
 
+
+def parse_job_description_file(file_path, model="llama3"):
+    full_text = extract_job_description_text(file_path)
+    return parse_job_description_text(full_text, model=model)
+
+
+def parse_job_description_text(full_text, model="llama3"):
+    """Extract job title and description summary from raw JD text"""
     # Token-based chunking
     enc = tiktoken.get_encoding("cl100k_base")
     tokens = enc.encode(full_text)
@@ -1427,7 +1579,9 @@ Classification rules:
 def try_ollama_chat(prompt, model="llama3", max_retries=100000):
     for attempt in range(max_retries):
         try:
-            return ollama.chat(model=model, messages=[{"role": "user", "content": prompt}])
+            # Batch mode shares one bounded semaphore across worker processes
+            with (llm_semaphore or nullcontext()):
+                return ollama.chat(model=model, messages=[{"role": "user", "content": prompt}])
         except Exception as e:
             print(f"[WARNING] Ollama attempt {attempt+1} failed: {e}")
     raise RuntimeError("Ollama API failed after multiple attempts.")
@@ -1437,7 +1591,7 @@ def deduplicate_string_list(lst):
     return sorted(list(set(item.strip() for item in lst if isinstance(item, str) and item.strip())))
 
 
-def save_questions_to_csv(questions_by_level, output_path):
+def save_questions_to_csv(questions_by_level, output_path, include_answers=True):
     with open(output_path, "w", newline='', encoding="utf-8") as f:
         writer = csv.writer(f)
         writer.writerow(["question_id", "question", "level", "strength", "answer", "requires_code"])
@@ -1447,7 +1601,14 @@ def save_questions_to_csv(questions_by_level, output_path):
         for level in ["beginner", "medium", "hard"]:
             for q in questions_by_level.get(level, []):
                 requires_code = q.get('requires_code', False)
-                writer.writerow([f"q{qid_counter}", q["question"], level, "", "", "true" if requires_code else "false"])
+                code_flag = "true" if requires_code else "false"
+                answers = q.get("answers") or {}
+                if include_answers and all(answers.get(s) for s in ["weak", "medium", "strong"]):
+                    # Question bank entries already carry their answers
+                    for strength in ["weak", "medium", "strong"]:
+                        writer.writerow([f"q{qid_counter}", q["question"], level, strength, answers[strength], code_flag])
+                else:
+                    writer.writerow([f"q{qid_counter}", q["question"], level, "", "", code_flag])
                 qid_counter += 1
             
     print(f"[DEBUG] Saving questions. "
@@ -1462,12 +1623,194 @@ def save_questions_to_csv(questions_by_level, output_path):
 
 class ResumeParseError(Exception):
     pass
+
+
+# === BATCH MODE ===
+
+RESUME_EXTENSIONS = (".pdf", ".docx", ".doc", ".txt")
+
+
+def init_batch_worker(semaphore):
+    """Process-pool initializer: share one LLM concurrency limit across all workers"""
+    global llm_semaphore
+    llm_semaphore = semaphore
+
+
+def process_resume_for_batch(resume_path, job_title, job_description, question_counts,
+                             include_answers, output_dir, max_retries):
+    """Run the full pipeline for one resume and write its outputs to output_dir/<resume name>/"""
+    import shutil
+    started = time.perf_counter()
+    candidate_dir = os.path.join(output_dir, os.path.splitext(os.path.basename(resume_path))[0])
+    summary = {"resume": resume_path, "output_dir": candidate_dir, "success": False}
+
+    try:
+        result = run_pipeline_from_api(
+            resume_path=resume_path,
+            job_title=job_title,
+            job_description=job_description,
+            question_counts=question_counts,
+            include_answers=include_answers,
+            max_retries=max_retries
+        )
+        # Sum all attempts of a stage: that's the latency this resume actually paid for it
+        summary["stage_timings"] = {stage: sum(times) for stage, times in result.get("stage_timings", {}).items()}
+
+        if not result.get("success"):
+            summary["error"] = result.get("error", "Unknown error")
+        else:
+            os.makedirs(candidate_dir, exist_ok=True)
+            save_json_output(result["parsed_resume"], os.path.join(candidate_dir, "parsed_resume.json"))
+            save_json_output(result["questions"], os.path.join(candidate_dir, "questions.json"))
+            shutil.copy(result["qa_csv"], os.path.join(candidate_dir, os.path.basename(result["qa_csv"])))
+            shutil.rmtree(result["temp_dir"], ignore_errors=True)
+            summary["candidate"] = result["candidate"]
+            summary["questions_count"] = result["questions_count"]
+            summary["success"] = True
+    except Exception as e:
+        summary["error"] = str(e)
+
+    summary["total_seconds"] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def load_batch_job_description(jd_path, job_title=None):
+    """
+    Extract the JD text (PDF/DOCX/TXT, same as the single-run path). With a title the text
+    is used as-is; otherwise title + description are parsed from it with the LLM.
+    """
+    full_text = extract_job_description_text(jd_path).strip()
+    if job_title:
+        return job_title, full_text
+    parsed = parse_job_description_text(full_text)
+    return parsed["job_title"], parsed["job_description"]
+
+
+def run_batch(batch_dir, jd_path, output_dir, workers=2, llm_concurrency=2, question_counts=None,
+              include_answers=True, job_title=None, max_retries=3):
+    """
+    Process every resume in batch_dir against one JD using a process pool.
+    LLM calls from all workers share a bounded semaphore (llm_concurrency).
+    Writes per-candidate outputs plus batch_report.json, and prints a throughput report.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    resumes = sorted(
+        os.path.join(batch_dir, name) for name in os.listdir(batch_dir)
+        if name.lower().endswith(RESUME_EXTENSIONS)
+    )
+    if not resumes:
+        print(f"[ERROR] No resumes found in {batch_dir}")
+        return None
+
+    question_counts = question_counts or {"beginner": 2, "medium": 2, "hard": 2}
+    os.makedirs(output_dir, exist_ok=True)
+
+    job_title, job_description = load_batch_job_description(jd_path, job_title)
+    print(f"[INFO] Batch: {len(resumes)} resume(s) for '{job_title}' | workers={workers} | llm_concurrency={llm_concurrency}")
+
+    ctx = multiprocessing.get_context()
+    semaphore = ctx.BoundedSemaphore(llm_concurrency)
+
+    started = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=init_batch_worker, initargs=(semaphore,)) as pool:
+        futures = {
+            pool.submit(process_resume_for_batch, path, job_title, job_description, question_counts,
+                        include_answers, output_dir, max_retries): path
+            for path in resumes
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                summary = future.result()
+            except Exception as e:  # Worker crashed (e.g. killed) - count it as a failure
+                summary = {"resume": path, "success": False, "error": str(e), "stage_timings": {}, "total_seconds": 0.0}
+            results.append(summary)
+            status = f"{Fore.GREEN}OK{Style.RESET_ALL}" if summary["success"] else f"{Fore.RED}FAILED{Style.RESET_ALL}"
+            print(f"[INFO] [{len(results)}/{len(resumes)}] {os.path.basename(path)}: {status} ({summary['total_seconds']:.1f}s)")
+
+    elapsed = time.perf_counter() - started
+    report = build_batch_report(results, elapsed)
+    save_json_output({"report": report, "results": results}, os.path.join(output_dir, "batch_report.json"))
+    print_batch_report(report)
+    return report
+
+
+def build_batch_report(results, elapsed):
+    stage_samples = defaultdict(list)
+    for summary in results:
+        for stage, seconds in (summary.get("stage_timings") or {}).items():
+            stage_samples[stage].append(seconds)
+    totals = [s["total_seconds"] for s in results if s.get("success")]
+    succeeded = len(totals)
+
+    return {
+        "resumes": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "failures": {s["resume"]: s.get("error", "") for s in results if not s.get("success")},
+        "elapsed_seconds": round(elapsed, 2),
+        "throughput_per_minute": round(succeeded / elapsed * 60, 2) if elapsed else 0.0,
+        "resume_latency": {"p50": percentile(totals, 50), "p95": percentile(totals, 95)},
+        "stage_latency": {
+            stage: {"p50": round(percentile(values, 50), 3), "p95": round(percentile(values, 95), 3), "count": len(values)}
+            for stage, values in stage_samples.items()
+        }
+    }
+
+
+def print_batch_report(report):
+    print(f"\n{Fore.BLUE}========== BATCH REPORT =========={Style.RESET_ALL}")
+    print(f"  Resumes:    {report['resumes']} ({report['succeeded']} ok, {report['failed']} failed)")
+    print(f"  Elapsed:    {report['elapsed_seconds']}s")
+    print(f"  Throughput: {report['throughput_per_minute']} resumes/min")
+    print(f"  Per resume: p50={report['resume_latency']['p50']:.2f}s p95={report['resume_latency']['p95']:.2f}s")
+    print("  Stage latency (s):")
+    for stage, stats in report["stage_latency"].items():
+        print(f"    {stage:<15} p50={stats['p50']:<8} p95={stats['p95']:<8} n={stats['count']}")
+    for resume, error in report["failures"].items():
+        print(f"  {Fore.RED}FAILED{Style.RESET_ALL} {os.path.basename(resume)}: {error}")
+    print(f"{Fore.BLUE}=================================={Style.RESET_ALL}\n")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Parse resume and generate core questions")
-    parser.add_argument("--resume", required=True, help="Path to the resume file (PDF, DOCX)")
-    parser.add_argument("--config", required=True, help="Path to the interview_config.json")
+    parser.add_argument("--resume", help="Path to the resume file (PDF, DOCX)")
+    parser.add_argument("--config", help="Path to the interview_config.json")
+    parser.add_argument("--batch-dir", help="Batch mode: directory of resumes to process")
+    parser.add_argument("--jd", help="Batch mode: job description file")
+    parser.add_argument("--job-title", help="Batch mode: job title (skips LLM parsing of --jd)")
+    parser.add_argument("--output-dir", default="batch_output", help="Batch mode: output directory")
+    parser.add_argument("--workers", type=int, default=2, help="Batch mode: number of worker processes")
+    parser.add_argument("--llm-concurrency", type=int, default=2, help="Batch mode: max concurrent LLM calls across all workers")
+    parser.add_argument("--counts", default="2,2,2", help="Batch mode: beginner,medium,hard question counts")
+    parser.add_argument("--no-answers", action="store_true", help="Batch mode: skip sample answer generation")
+    parser.add_argument("--retries", type=int, default=3, help="Batch mode: pipeline attempts per resume")
     args = parser.parse_args()
 
+    if args.batch_dir:
+        if not args.jd:
+            parser.error("--batch-dir requires --jd")
+        beginner, medium, hard = (int(c) for c in args.counts.split(","))
+        report = run_batch(
+            args.batch_dir,
+            args.jd,
+            args.output_dir,
+            workers=args.workers,
+            llm_concurrency=args.llm_concurrency,
+            question_counts={"beginner": beginner, "medium": medium, "hard": hard},
+            include_answers=not args.no_answers,
+            job_title=args.job_title,
+            max_retries=args.retries
+        )
+        sys.exit(0 if report and report["failed"] == 0 else 1)
+
+    if not args.resume or not args.config:
+        parser.error("--resume and --config are required (or use --batch-dir with --jd)")
+
     max_retries = 1000
     for attempt in range(max_retries):
         try:
@@ -1589,6 +1932,93 @@ def main():
 #                 }
 #             print("[INFO] Retrying...\n")
 
+class PipelineCheckpoint:
+    """
+    Persists the result of each pipeline stage to checkpoint.json in the work directory,
+    so a retry skips every stage that already completed instead of starting over.
+    Stage results must be JSON-serializable.
+    """
+
+    def __init__(self, work_dir):
+        self.work_dir = work_dir
+        self.path = os.path.join(work_dir, "checkpoint.json")
+        self.state = {"completed": {}, "timings": {}}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.state = json.load(f)
+            except Exception as e:
+                print(f"[WARNING] Ignoring unreadable checkpoint {self.path}: {e}")
+
+    def _save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)  # Atomic, so a crash never leaves a half-written checkpoint
+
+    def run(self, stage, fn):
+        """Return the stored result for `stage`, or run `fn()` and persist its result"""
+        if stage in self.state["completed"]:
+            print(f"[INFO] Stage '{stage}' already completed - reusing checkpoint")
+            return self.state["completed"][stage]
+
+        print(f"[INFO] Running stage '{stage}'...")
+        started = time.perf_counter()
+        try:
+            result = fn()
+        finally:
+            elapsed = round(time.perf_counter() - started, 3)
+            # Keep every attempt so retried stages show up in the timings
+            self.state["timings"].setdefault(stage, []).append(elapsed)
+
+        self.state["completed"][stage] = result
+        self.state.get("items", {}).pop(stage, None)  # Item checkpoints are only needed until the stage completes
+        self._save()
+        print(f"[DONE] Stage '{stage}' finished in {elapsed:.2f}s")
+        return result
+
+    def get_item(self, stage, key):
+        """Stored result for one unit of work inside a stage (e.g. one question's answers)"""
+        return self.state.get("items", {}).get(stage, {}).get(key)
+
+    def save_item(self, stage, key, value):
+        """Persist one unit of work so a retried stage resumes after it instead of redoing it"""
+        self.state.setdefault("items", {}).setdefault(stage, {})[key] = value
+        self._save()
+
+    def timings(self):
+        return dict(self.state["timings"])
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def merge_coding_questions(core_questions, coding_questions):
+    """Categorize coding questions by weight and merge them into the difficulty levels"""
+    # weight 1 → beginner, weight 3 → medium, weight 5 → hard
+    for q in coding_questions:
+        weight = q.get('weight', 5)  # Default to 5 if weight missing
+        # Mark as coding question
+        q['requires_code'] = True
+        # Update difficulty to match category
+        if weight == 1:
+            q['difficulty'] = 'beginner'
+            core_questions['beginner'].append(q)
+        elif weight == 3:
+            q['difficulty'] = 'medium'
+            core_questions['medium'].append(q)
+        else:  # weight == 5 or any other value
+            q['difficulty'] = 'hard'
+            core_questions['hard'].append(q)
+
+    print(f"[DEBUG] Coding questions categorized: "
+          f"Beginner={sum(1 for q in coding_questions if q.get('weight') == 1)}, "
+          f"Medium={sum(1 for q in coding_questions if q.get('weight') == 3)}, "
+          f"Hard={sum(1 for q in coding_questions if q.get('weight') == 5)}")
+    return core_questions
+
+
 def run_pipeline_from_api(
     resume_path,
     job_title,
@@ -1601,11 +2031,16 @@ def run_pipeline_from_api(
     blend=False,
     blend_pct_resume=50,   # for blend mode: percentage weight of resume context
     blend_pct_jd=50,       # for blend mode: percentage weight of JD context
-    max_retries=100000
+    max_retries=100000,
+    use_question_bank=False
 ):
 
     """
-    Run the resume pipeline with data from frontend instead of config file
+    Run the resume pipeline with data from frontend instead of config file.
+
+    The pipeline runs as checkpointed stages (extract_text, parse_resume, questions,
+    coding, save_questions, answers, read_back). If a stage fails, the next attempt
+    resumes from that stage instead of redoing the whole pipeline.
     
     Args:
         resume_path: Path to resume file
@@ -1616,156 +2051,186 @@ def run_pipeline_from_api(
         split: Whether to split questions by resume vs JD percentage
         resume_pct, jd_pct: Percentage split when split=True
         max_retries: Number of retry attempts
+        use_question_bank: Reuse matching questions from the question bank (default mode only)
     """
     
+    # Validate inputs (not retryable)
+    if not os.path.exists(resume_path):
+        return {"success": False, "error": f"Resume not found: {resume_path}"}
+    if not job_title or not job_description:
+        return {"success": False, "error": "Job title and description are required"}
+
+    print(f"[INFO] Processing resume for: {job_title}")
+    print(f"[INFO] Question counts: {question_counts}")
+    print(f"[INFO] Include answers: {include_answers}")
+    print(f"[INFO] Split mode: {split} (Resume {resume_pct}% | JD {jd_pct}%)")
+
+    # One work directory for all attempts so stage outputs survive a retry
+    import tempfile
+    temp_dir = tempfile.mkdtemp(prefix="resume_processing_")
+    checkpoint = PipelineCheckpoint(temp_dir)
+
+    # File paths
+    parsed_resume_path = os.path.join(temp_dir, "parsed_resume.json")
+    questions_path = os.path.join(temp_dir, "questions.csv")
+    qa_path = os.path.join(temp_dir, "interview_output.csv")
+
+    def parse_resume_stage(resume_text):
+        structured_data = ask_ollama_for_structured_data_chunked(resume_text)
+
+        # Validate parsed data
+        if not isinstance(structured_data, dict):
+            raise ResumeParseError("Resume parsing returned an invalid format.")
+        if (
+            not structured_data.get("work_experience") and
+            not structured_data.get("projects") and
+            not structured_data.get("education")
+        ):
+            raise ResumeParseError("Parsed resume has no usable sections.")
+
+        # Save parsed resume
+        save_json_output(structured_data, parsed_resume_path)
+        return structured_data
+
+    def questions_stage(structured_data):
+        if split and blend:
+            core_questions = generate_hybrid_questions(
+                structured_data,
+                job_title,
+                job_description,
+                question_counts.get('beginner', 1),
+                question_counts.get('medium', 1),
+                question_counts.get('hard', 1),
+                resume_pct,
+                jd_pct,
+                blend_pct_resume=blend_pct_resume,
+                blend_pct_jd=blend_pct_jd
+            )
+        elif split:
+            core_questions = generate_split_questions(
+                structured_data,
+                job_title,
+                job_description,
+                question_counts.get('beginner', 1),
+                question_counts.get('medium', 1),
+                question_counts.get('hard', 1),
+                resume_pct,
+                jd_pct
+            )
+        elif blend:
+            core_questions = generate_blend_questions(
+                structured_data,
+                job_title,
+                job_description,
+                question_counts.get('beginner', 1),
+                question_counts.get('medium', 1),
+                question_counts.get('hard', 1),
+                blend_pct_resume,
+                blend_pct_jd
+            )
+        else:
+            core_questions = generate_core_questions(
+                structured_data,
+                job_title,
+                job_description,
+                question_counts.get('beginner', 1),
+                question_counts.get('medium', 1),
+                question_counts.get('hard', 1),
+                use_question_bank=use_question_bank
+            )
+
+        # Drop questions that repeat across levels and regenerate only the gaps,
+        # using the same mode's prompt for each replacement
+        mode = "hybrid" if split and blend else "split" if split else "blend" if blend else "core"
+        build_prompt = question_prompt_builder(
+            mode,
+            structured_data,
+            job_title,
+            job_description,
+            resume_pct=resume_pct,
+            jd_pct=jd_pct,
+            blend_pct_resume=blend_pct_resume,
+            blend_pct_jd=blend_pct_jd
+        )
+        return dedupe_and_top_up_questions(core_questions, build_prompt)
+
+    def coding_stage(structured_data, core_questions):
+        # Work on a copy so the persisted 'questions' checkpoint stays untouched
+        core_questions = json.loads(json.dumps(core_questions))
+        coding_count = question_counts.get('coding', 0)
+        if coding_count > 0:
+            print(f"[INFO] Generating {coding_count} coding questions...")
+            coding_questions = generate_coding_questions(
+                structured_data,
+                job_title,
+                job_description,
+                coding_count
+            )
+            return merge_coding_questions(core_questions, coding_questions)
+
+        # Ensure coding key doesn't exist if not generating
+        if 'coding' in core_questions:
+            del core_questions['coding']
+        return core_questions
+
+    def save_questions_stage(all_questions):
+        save_questions_to_csv(all_questions, questions_path, include_answers=include_answers)
+        return questions_path
+
+    def answers_stage(structured_data, strict=False):
+        generate_answers_for_existing_questions(
+            structured_data,
+            job_title,
+            job_description,
+            questions_path,
+            qa_path,
+            checkpoint=checkpoint,
+            strict=strict
+        )
+
+        # Grow the question bank with the newly answered questions
+        try:
+            get_question_bank().add_from_answers_csv(
+                qa_path,
+                skills=extract_resume_skills(structured_data),
+                job_title=job_title
+            )
+        except Exception as e:
+            print(f"[WARNING] Failed to update question bank: {e}")
+        return qa_path
+
     for attempt in range(max_retries):
         try:
             print(f"\n[INFO] API Attempt {attempt + 1} of {max_retries}")
-            
-            # Validate inputs
-            if not os.path.exists(resume_path):
-                raise FileNotFoundError(f"Resume not found: {resume_path}")
-            if not job_title or not job_description:
-                raise ValueError("Job title and description are required")
-            
-            print(f"[INFO] Processing resume for: {job_title}")
-            print(f"[INFO] Question counts: {question_counts}")
-            print(f"[INFO] Include answers: {include_answers}")
-            print(f"[INFO] Split mode: {split} (Resume {resume_pct}% | JD {jd_pct}%)")
-            
-            # Extract resume text and parse into structured data
-            resume_text = extract_text_from_resume(resume_path)
-            structured_data = ask_ollama_for_structured_data_chunked(resume_text)
-            
-            # Validate parsed data
-            if not isinstance(structured_data, dict):
-                raise ResumeParseError("Resume parsing returned an invalid format.")
-            if (
-                not structured_data.get("work_experience") and
-                not structured_data.get("projects") and
-                not structured_data.get("education")
-            ):
-                raise ResumeParseError("Parsed resume has no usable sections.")
-            
+
+            resume_text = checkpoint.run("extract_text", lambda: extract_text_from_resume(resume_path))
+            structured_data = checkpoint.run("parse_resume", lambda: parse_resume_stage(resume_text))
+
             # Candidate name for file naming
             candidate_name = structured_data.get("name", "candidate").replace(" ", "_")
-            
-            # Create temporary output directory
-            import tempfile
-            temp_dir = tempfile.mkdtemp(prefix=f"resume_processing_{candidate_name}_")
-            
-            # File paths
-            parsed_resume_path = os.path.join(temp_dir, "parsed_resume.json")
-            questions_path = os.path.join(temp_dir, "questions.csv")
-            qa_path = os.path.join(temp_dir, "interview_output.csv")
-            
-            # Save parsed resume
-            save_json_output(structured_data, parsed_resume_path)
-            
-            # === Generate questions ===
-            if split and blend:
-                core_questions = generate_hybrid_questions(
-                    structured_data,
-                    job_title,
-                    job_description,
-                    question_counts.get('beginner', 1),
-                    question_counts.get('medium', 1),
-                    question_counts.get('hard', 1),
-                    resume_pct,
-                    jd_pct,
-                    blend_pct_resume=blend_pct_resume,
-                    blend_pct_jd=blend_pct_jd
-                )
-            elif split:
-                core_questions = generate_split_questions(
-                    structured_data,
-                    job_title,
-                    job_description,
-                    question_counts.get('beginner', 1),
-                    question_counts.get('medium', 1),
-                    question_counts.get('hard', 1),
-                    resume_pct,
-                    jd_pct
-                )
-            elif blend:
-                core_questions = generate_blend_questions(
-                    structured_data,
-                    job_title,
-                    job_description,
-                    question_counts.get('beginner', 1),
-                    question_counts.get('medium', 1),
-                    question_counts.get('hard', 1),
-                    blend_pct_resume,
-                    blend_pct_jd
-                )
-            else:
-                core_questions = generate_core_questions(
-                    structured_data,
-                    job_title,
-                    job_description,
-                    question_counts.get('beginner', 1),
-                    question_counts.get('medium', 1),
-                    question_counts.get('hard', 1)
-                )
 
-            # Generate coding questions if requested
-            coding_count = question_counts.get('coding', 0)
-            if coding_count > 0:
-                print(f"[INFO] Generating {coding_count} coding questions...")
-                coding_questions = generate_coding_questions(
-                    structured_data,
-                    job_title,
-                    job_description,
-                    coding_count
-                )
-                
-                # Categorize coding questions by weight and merge into existing categories
-                # weight 1 → beginner, weight 3 → medium, weight 5 → hard
-                for q in coding_questions:
-                    weight = q.get('weight', 5)  # Default to 5 if weight missing
-                    # Mark as coding question
-                    q['requires_code'] = True
-                    # Update difficulty to match category
-                    if weight == 1:
-                        q['difficulty'] = 'beginner'
-                        core_questions['beginner'].append(q)
-                    elif weight == 3:
-                        q['difficulty'] = 'medium'
-                        core_questions['medium'].append(q)
-                    else:  # weight == 5 or any other value
-                        q['difficulty'] = 'hard'
-                        core_questions['hard'].append(q)
-                
-                print(f"[DEBUG] Coding questions categorized: "
-                      f"Beginner={sum(1 for q in coding_questions if q.get('weight') == 1)}, "
-                      f"Medium={sum(1 for q in coding_questions if q.get('weight') == 3)}, "
-                      f"Hard={sum(1 for q in coding_questions if q.get('weight') == 5)}")
-            else:
-                # Ensure coding key doesn't exist if not generating
-                if 'coding' in core_questions:
-                    del core_questions['coding']
+            core_questions = checkpoint.run("questions", lambda: questions_stage(structured_data))
+            all_questions = checkpoint.run("coding", lambda: coding_stage(structured_data, core_questions))
+            checkpoint.run("save_questions", lambda: save_questions_stage(all_questions))
 
-            
-            # Save questions to CSV
-            save_questions_to_csv(core_questions, questions_path)
-            
             # Generate answers if requested
             if include_answers:
-                generate_answers_for_existing_questions(
-                    structured_data,
-                    job_title,
-                    job_description,
-                    questions_path,
-                    qa_path
+                # Failed answers fail the stage (and get retried) except on the last attempt
+                final_csv_path = checkpoint.run(
+                    "answers",
+                    lambda: answers_stage(structured_data, strict=attempt < max_retries - 1)
                 )
-                final_csv_path = qa_path
             else:
                 print("[INFO] Skipping answer generation as requested.")
                 final_csv_path = questions_path
-            
+
             # Read back questions
-            questions = read_questions_from_csv(final_csv_path)
-            
+            questions = checkpoint.run("read_back", lambda: read_questions_from_csv(final_csv_path))
+
+            stage_timings = checkpoint.timings()
+            print(f"[INFO] Stage timings (s): {stage_timings}")
+            checkpoint.clear()
+
             return {
                 "success": True,
                 "candidate": candidate_name,
@@ -1773,19 +2238,21 @@ def run_pipeline_from_api(
                 "questions_count": len(questions),
                 "parsed_resume": structured_data,
                 "temp_dir": temp_dir,
-                "qa_csv": final_csv_path
+                "qa_csv": final_csv_path,
+                "stage_timings": stage_timings
             }
-        
+
         except Exception as e:
             print(f"[ERROR] Attempt {attempt + 1} failed: {e}")
             import traceback; traceback.print_exc()
-            
+
             if attempt == max_retries - 1:
                 return {
                     "success": False,
-                    "error": f"Max retries reached: {e}"
+                    "error": f"Max retries reached: {e}",
+                    "stage_timings": checkpoint.timings()
                 }
-            print("[INFO] Retrying...\n")
+            print("[INFO] Retrying from the failed stage...\n")
 
 
 def read_questions_from_csv(csv_file_path):
@@ -0,0 +1,443 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+
+
+# === CONFIGURATION ===
+INTERVIEW_SESSION_DB = os.getenv(
+    "INTERVIEW_SESSION_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "interview_sessions.db")
+)
+INTERVIEW_SESSION_MAX_MEMORY = int(os.getenv("INTERVIEW_SESSION_MAX_MEMORY", "500"))
+INTERVIEW_SESSION_IDLE_SECONDS = int(os.getenv("INTERVIEW_SESSION_IDLE_SECONDS", "1800"))
+# Cap on the approximate size of in-memory sessions (0 = no cap)
+INTERVIEW_SESSION_MAX_BYTES = int(os.getenv("INTERVIEW_SESSION_MAX_BYTES", str(256 * 1024 * 1024)))
+# Finished or timed-out interviews only stay in memory this long after their last turn
+INTERVIEW_SESSION_DONE_GRACE_SECONDS = int(os.getenv("INTERVIEW_SESSION_DONE_GRACE_SECONDS", "120"))
+# Stored sessions untouched for this long are deleted from disk (0 = keep forever)
+INTERVIEW_SESSION_RETENTION_SECONDS = int(os.getenv("INTERVIEW_SESSION_RETENTION_SECONDS", str(7 * 24 * 3600)))
+INTERVIEW_SESSION_REAP_INTERVAL = int(os.getenv("INTERVIEW_SESSION_REAP_INTERVAL", "60"))
+# Per-session turn lock: how long a turn may hold it (crash safety) and how long a caller waits
+INTERVIEW_TURN_LEASE_SECONDS = int(os.getenv("INTERVIEW_TURN_LEASE_SECONDS", "600"))
+INTERVIEW_TURN_LOCK_WAIT_SECONDS = float(os.getenv("INTERVIEW_TURN_LOCK_WAIT_SECONDS", "120"))
+# How long a turn response is kept for replay to a retried request with the same request ID
+INTERVIEW_TURN_CACHE_SECONDS = int(os.getenv("INTERVIEW_TURN_CACHE_SECONDS", "3600"))
+
+
+class SessionBusyError(Exception):
+    """Another turn for the same session held the lock for longer than the wait timeout"""
+    pass
+
+
+class InterviewSessionStore:
+    """
+    Interview sessions keyed by "<interview_id>:<user_id>".
+
+    SQLite is the source of truth: every save writes the manager state through and
+    bumps a version number. Managers are also kept in a bounded in-memory LRU; a cached
+    copy is only used while its version matches the database, so a worker never
+    continues from a stale copy after another worker handled a turn.
+    Idle sessions are dropped from memory (not from disk) and reloaded on demand.
+
+    A background reaper (start_reaper) evicts idle, finished and timed-out sessions
+    from memory, keeps the approximate in-memory size under max_bytes and purges
+    stored sessions older than the retention period.
+
+    Answer scores computed in the background are written to their own table as soon
+    as they finish (save_response_score), so a score is not lost when the next turn
+    or the wrap-up runs on another worker.
+
+    Turns are serialized per session with session_lock() (a thread lock plus a lease
+    row in SQLite, so it also holds across workers), and turn responses can be stored
+    by client request ID so a retried or duplicated submission gets the original reply.
+    """
+
+    def __init__(self, manager_cls, db_path=INTERVIEW_SESSION_DB,
+                 max_memory=INTERVIEW_SESSION_MAX_MEMORY, idle_seconds=INTERVIEW_SESSION_IDLE_SECONDS,
+                 max_bytes=INTERVIEW_SESSION_MAX_BYTES, done_grace_seconds=INTERVIEW_SESSION_DONE_GRACE_SECONDS,
+                 retention_seconds=INTERVIEW_SESSION_RETENTION_SECONDS):
+        self.manager_cls = manager_cls
+        self.db_path = db_path
+        self.max_memory = max_memory
+        self.idle_seconds = idle_seconds
+        self.max_bytes = max_bytes
+        self.done_grace_seconds = done_grace_seconds
+        self.retention_seconds = retention_seconds
+        self.memory = OrderedDict()  # key -> {"manager", "version", "last_access", "bytes"}
+        self.memory_bytes = 0
+        self.evictions = {"lru": 0, "bytes": 0, "idle": 0, "finished": 0}
+        self.purged = 0
+        self.reaper_thread = None
+        self.reap_tasks = []  # Extra housekeeping run with every reap(), see add_reap_task()
+        self.reaper_stop = threading.Event()
+        self.lock = threading.RLock()
+        self.turn_locks = {}  # key -> {"lock": threading.Lock, "users": callers holding or waiting}, per process
+        self.held_turn_locks = {}  # token -> the threading.Lock it holds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_db(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")  # Readers don't block the writer across workers
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS interview_sessions (
+                    session_key TEXT PRIMARY KEY,
+                    state TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS session_leases (
+                    session_key TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    token TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS response_scores (
+                    session_key TEXT NOT NULL,
+                    entry_index INTEGER NOT NULL,
+                    scored TEXT NOT NULL,
+                    PRIMARY KEY (session_key, entry_index)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS turn_responses (
+                    session_key TEXT NOT NULL,
+                    request_id TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (session_key, request_id)
+                )
+            """)
+
+    # === MEMORY (LRU) ===
+
+    def _forget(self, key, reason=None):
+        """Drop `key` from memory (caller holds the lock). The stored copy is untouched."""
+        entry = self.memory.pop(key, None)
+        if entry is not None:
+            self.memory_bytes -= entry["bytes"]
+            if reason:
+                self.evictions[reason] += 1
+        return entry
+
+    def _remember(self, key, manager, version, size):
+        """`size` is the length of the serialized state, used as the session's memory estimate"""
+        manager._score_store = (self, key)  # Runtime only: where background scores are persisted
+        with self.lock:
+            self._forget(key)
+            self.memory[key] = {"manager": manager, "version": version, "last_access": time.time(), "bytes": size}
+            self.memory_bytes += size
+            while len(self.memory) > self.max_memory:
+                evicted_key = next(iter(self.memory))
+                self._forget(evicted_key, "lru")
+                print(f"[DEBUG] Session store: evicted least recently used session {evicted_key}")
+            while self.max_bytes and self.memory_bytes > self.max_bytes and len(self.memory) > 1:
+                evicted_key = next(iter(self.memory))
+                self._forget(evicted_key, "bytes")
+                print(f"[DEBUG] Session store: evicted {evicted_key} to stay under {self.max_bytes} bytes")
+
+    @staticmethod
+    def _is_finished(manager):
+        if getattr(manager, "wrapup_completed", False) or getattr(manager, "stage", "") == "done":
+            return True
+        try:
+            return manager.is_time_exceeded()
+        except Exception:
+            return False
+
+    def evict_idle(self):
+        """
+        Drop sessions idle for longer than idle_seconds, and finished or timed-out
+        interviews idle for longer than done_grace_seconds, from memory. Returns the count.
+        """
+        now = time.time()
+        evicted = 0
+        with self.lock:
+            for key, entry in list(self.memory.items()):
+                idle = now - entry["last_access"]
+                if idle > self.idle_seconds:
+                    self._forget(key, "idle")
+                    evicted += 1
+                elif idle > self.done_grace_seconds and self._is_finished(entry["manager"]):
+                    self._forget(key, "finished")
+                    evicted += 1
+        if evicted:
+            print(f"[DEBUG] Session store: evicted {evicted} idle/finished session(s) from memory")
+        return evicted
+
+    def purge_expired(self):
+        """Delete stored sessions not updated within retention_seconds. Returns the count."""
+        if not self.retention_seconds:
+            return 0
+        cutoff = time.time() - self.retention_seconds
+        with self._connect() as conn:
+            keys = [row[0] for row in conn.execute(
+                "SELECT session_key FROM interview_sessions WHERE updated_at < ?", (cutoff,)
+            )]
+            conn.execute("DELETE FROM interview_sessions WHERE updated_at < ?", (cutoff,))
+            conn.executemany("DELETE FROM response_scores WHERE session_key = ?", [(key,) for key in keys])
+        with self.lock:
+            for key in keys:
+                self._forget(key)
+            self.purged += len(keys)
+        if keys:
+            print(f"[INFO] Session store: purged {len(keys)} expired session(s) from disk")
+        return len(keys)
+
+    # === RESPONSE SCORES ===
+
+    def save_response_score(self, key, index, scored):
+        """Store the scored copy of evaluation_log[index]; safe to call from any thread"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO response_scores (session_key, entry_index, scored) VALUES (?, ?, ?)",
+                (key, index, json.dumps(scored, ensure_ascii=False))
+            )
+
+    def get_response_scores(self, key):
+        """Stored scores for a session as {str(index): scored entry}"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT entry_index, scored FROM response_scores WHERE session_key = ?", (key,)
+            ).fetchall()
+        return {str(index): json.loads(scored) for index, scored in rows}
+
+    # === TURN LOCKING ===
+
+    def _try_lease(self, key, token):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                """INSERT INTO session_leases (session_key, owner, token, expires_at) VALUES (?, ?, ?, ?)
+                   ON CONFLICT(session_key) DO UPDATE SET
+                       owner = excluded.owner, token = excluded.token, expires_at = excluded.expires_at
+                   WHERE session_leases.expires_at < ?""",
+                (key, self.owner, token, now + INTERVIEW_TURN_LEASE_SECONDS, now)
+            )
+            row = conn.execute("SELECT token FROM session_leases WHERE session_key = ?", (key,)).fetchone()
+        return row is not None and row[0] == token
+
+    def acquire_turn_lock(self, key, timeout=INTERVIEW_TURN_LOCK_WAIT_SECONDS):
+        """Block until this caller owns the session's turn. Returns a token for release_turn_lock()."""
+        deadline = time.time() + timeout
+        with self.lock:
+            entry = self.turn_locks.setdefault(key, {"lock": threading.Lock(), "users": 0})
+            entry["users"] += 1  # Keeps the entry alive while this caller waits for it
+        local_lock = entry["lock"]
+        if not local_lock.acquire(timeout=max(0.0, timeout)):
+            self._leave_turn_lock(key)
+            raise SessionBusyError(f"Session {key} is busy")
+
+        token = uuid.uuid4().hex
+        try:
+            while not self._try_lease(key, token):
+                if time.time() >= deadline:
+                    raise SessionBusyError(f"Session {key} is busy in another worker")
+                time.sleep(0.05)
+        except Exception:
+            local_lock.release()
+            self._leave_turn_lock(key)
+            raise
+        with self.lock:
+            self.held_turn_locks[token] = local_lock
+        return token
+
+    def release_turn_lock(self, key, token):
+        lease_released = False
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM session_leases WHERE session_key = ? AND token = ?", (key, token))
+            lease_released = True
+        finally:
+            with self.lock:
+                local_lock = self.held_turn_locks.pop(token, None)
+            if local_lock is not None:
+                local_lock.release()
+                self._leave_turn_lock(key, remove=lease_released)
+
+    def _leave_turn_lock(self, key, remove=True):
+        """
+        One caller is done with the key's in-process lock. The entry is removed (under
+        self.lock) once nobody holds or waits for it; with remove=False (the lease row
+        could not be deleted) it is left for the reaper, which drops it after the lease expires.
+        """
+        with self.lock:
+            entry = self.turn_locks.get(key)
+            if entry is None:
+                return
+            entry["users"] -= 1
+            if remove and entry["users"] <= 0:
+                del self.turn_locks[key]
+
+    @contextmanager
+    def session_lock(self, key, timeout=INTERVIEW_TURN_LOCK_WAIT_SECONDS):
+        token = self.acquire_turn_lock(key, timeout)
+        try:
+            yield
+        finally:
+            self.release_turn_lock(key, token)
+
+    # === TURN RESPONSE CACHE (IDEMPOTENT RETRIES) ===
+
+    def get_turn_response(self, key, request_id):
+        cutoff = time.time() - INTERVIEW_TURN_CACHE_SECONDS
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT response FROM turn_responses WHERE session_key = ? AND request_id = ? AND created_at >= ?",
+                (key, request_id, cutoff)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_turn_response(self, key, request_id, response):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO turn_responses (session_key, request_id, response, created_at) VALUES (?, ?, ?, ?)",
+                (key, request_id, json.dumps(response, ensure_ascii=False), time.time())
+            )
+
+    def purge_turn_responses(self):
+        cutoff = time.time() - INTERVIEW_TURN_CACHE_SECONDS
+        with self._connect() as conn:
+            purged = conn.execute("DELETE FROM turn_responses WHERE created_at < ?", (cutoff,)).rowcount
+            conn.execute("DELETE FROM session_leases WHERE expires_at < ?", (time.time(),))
+            leased = {row[0] for row in conn.execute("SELECT session_key FROM session_leases")}
+        with self.lock:
+            # Entries left behind by a failed lease release, once nobody uses them and the lease is gone
+            for key in [k for k, entry in self.turn_locks.items() if entry["users"] <= 0 and k not in leased]:
+                del self.turn_locks[key]
+        return purged
+
+    # === REAPER ===
+
+    def add_reap_task(self, task):
+        """Run `task()` on every reap, e.g. to prune an on-disk cache that belongs with the sessions"""
+        self.reap_tasks.append(task)
+
+    def reap(self):
+        evicted = self.evict_idle()
+        purged = self.purge_expired()
+        self.purge_turn_responses()
+        for task in list(self.reap_tasks):
+            try:
+                task()
+            except Exception as e:
+                print(f"[WARNING] Reaper task {getattr(task, '__name__', task)} failed: {e}")
+        return {"evicted": evicted, "purged": purged}
+
+    def start_reaper(self, interval=INTERVIEW_SESSION_REAP_INTERVAL):
+        """Run reap() every `interval` seconds on a daemon thread (idempotent)"""
+        if self.reaper_thread is not None and self.reaper_thread.is_alive():
+            return self.reaper_thread
+
+        def loop():
+            while not self.reaper_stop.wait(interval):
+                try:
+                    self.reap()
+                except Exception as e:
+                    print(f"[WARNING] Session reaper failed: {e}")
+
+        self.reaper_stop.clear()
+        self.reaper_thread = threading.Thread(target=loop, daemon=True, name="session-reaper")
+        self.reaper_thread.start()
+        print(f"[INFO] Session reaper started (every {interval}s)")
+        return self.reaper_thread
+
+    def stop_reaper(self):
+        self.reaper_stop.set()
+
+    # === PUBLIC API ===
+
+    def get(self, key):
+        """Return the InterviewManager for `key`, or None if the session doesn't exist"""
+        self.evict_idle()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT version FROM interview_sessions WHERE session_key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            with self.lock:
+                self._forget(key)
+            return None
+
+        db_version = row[0]
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None and entry["version"] == db_version:
+                entry["last_access"] = time.time()
+                self.memory.move_to_end(key)
+                return entry["manager"]
+
+        # Not cached, or another worker saved a newer turn
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT state, version FROM interview_sessions WHERE session_key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        manager = self.manager_cls.from_state(json.loads(row[0]))
+        self._remember(key, manager, row[1], len(row[0]))
+        print(f"[DEBUG] Session store: loaded {key} (version {row[1]}) from disk")
+        return manager
+
+    def save(self, key, manager):
+        """Write the manager state through to SQLite and refresh the cached copy. Returns the new version."""
+        state = json.dumps(manager.to_state(), ensure_ascii=False)
+        with self._connect() as conn:
+            conn.execute(
+                """INSERT INTO interview_sessions (session_key, state, version, updated_at)
+                   VALUES (?, ?, 1, ?)
+                   ON CONFLICT(session_key) DO UPDATE SET
+                       state = excluded.state,
+                       version = interview_sessions.version + 1,
+                       updated_at = excluded.updated_at""",
+                (key, state, time.time())
+            )
+            version = conn.execute(
+                "SELECT version FROM interview_sessions WHERE session_key = ?", (key,)
+            ).fetchone()[0]
+        self._remember(key, manager, version, len(state))
+        return version
+
+    def delete(self, key):
+        with self.lock:
+            self._forget(key)
+        with self._connect() as conn:
+            conn.execute("DELETE FROM interview_sessions WHERE session_key = ?", (key,))
+            conn.execute("DELETE FROM turn_responses WHERE session_key = ?", (key,))
+            conn.execute("DELETE FROM response_scores WHERE session_key = ?", (key,))
+
+    def stats(self):
+        with self._connect() as conn:
+            stored = conn.execute("SELECT COUNT(*) FROM interview_sessions").fetchone()[0]
+            cached_turns = conn.execute("SELECT COUNT(*) FROM turn_responses").fetchone()[0]
+        now = time.time()
+        with self.lock:
+            idle = [now - entry["last_access"] for entry in self.memory.values()]
+            return {
+                "in_memory": len(self.memory),
+                "stored": stored,
+                "max_memory": self.max_memory,
+                "memory_bytes": self.memory_bytes,
+                "max_bytes": self.max_bytes,
+                "largest_session_bytes": max((entry["bytes"] for entry in self.memory.values()), default=0),
+                "oldest_idle_seconds": round(max(idle, default=0.0), 1),
+                "evictions": dict(self.evictions),
+                "purged": self.purged,
+                "cached_turn_responses": cached_turns,
+                "turns_in_progress": sum(1 for entry in self.turn_locks.values() if entry["lock"].locked()),
+                "reaper_running": self.reaper_thread is not None and self.reaper_thread.is_alive(),
+            }
@@ -1,7 +1,12 @@
 import os
 import sys
 import json
-import requests
+
+# Allow running from the INTERVIEW folder directly (app.py already has backend/ on the path)
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+from common.http_client import http_client
 from datetime import datetime
 from dotenv import load_dotenv
 import ollama
@@ -47,7 +52,7 @@ def fetch_interview_metrics_from_edge_function(auth_token: str, limit: int = 100
         }
         
         print(f"[INFO] Fetching interview metrics from edge function...")
-        response = requests.get(edge_function_url, headers=headers, params=params)
+        response = http_client.get(edge_function_url, headers=headers, params=params)
         
         if response.status_code != 200:
             print(f"[ERROR] Edge function returned status {response.status_code}: {response.text}")
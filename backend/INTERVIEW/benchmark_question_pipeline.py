@@ -0,0 +1,402 @@
+"""
+End-to-end benchmark for Resumeparser.run_pipeline_from_api.
+
+Runs the full question pipeline on a synthetic resume corpus (PDF, DOCX, TXT)
+against a fake LLM backend with configurable latency, and reports time per
+stage, LLM call counts and token totals. Results are compared against a stored
+baseline; the script exits with status 1 on a regression.
+
+    python benchmark_question_pipeline.py                      # run + compare
+    python benchmark_question_pipeline.py --update-baseline    # record a new baseline
+    python benchmark_question_pipeline.py --latency 0.2 --resumes 3
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+from contextlib import contextmanager
+from collections import defaultdict
+
+# Keep benchmark runs out of the real question bank / caches
+BENCH_WORK_DIR = tempfile.mkdtemp(prefix="question_pipeline_bench_")
+os.environ["QUESTION_BANK_PATH"] = os.path.join(BENCH_WORK_DIR, "question_bank.db")
+
+import Resumeparser
+import Question_dedup
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+try:
+    import tiktoken
+    token_encoder = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    token_encoder = None
+
+
+def count_tokens(text):
+    if token_encoder is not None:
+        return len(token_encoder.encode(text))
+    return max(1, len(text) // 4)
+
+
+# === STAGE TIMERS ===
+
+stage_times = defaultdict(float)
+stage_lock = threading.Lock()
+
+
+@contextmanager
+def timed_section(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        with stage_lock:
+            stage_times[name] += time.perf_counter() - started
+
+
+def instrument(name_fn, func):
+    """Wrap a Resumeparser function so its time is added to a named section"""
+    def wrapper(*args, **kwargs):
+        with timed_section(name_fn(*args, **kwargs)):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def install_timers():
+    """
+    Time the sub-stages the pipeline checkpoints don't expose separately.
+    The pipeline looks these functions up as module globals, so replacing them
+    on the module is enough.
+    """
+    rp = Resumeparser
+    rp.extract_text_from_resume = instrument(lambda *a, **k: "extraction", rp.extract_text_from_resume)
+    rp.split_resume_into_chunks = instrument(lambda *a, **k: "chunking", rp.split_resume_into_chunks)
+    rp.ask_ollama_for_structured_data_chunked = instrument(lambda *a, **k: "parsing", rp.ask_ollama_for_structured_data_chunked)
+    rp.collect_unique_questions = instrument(
+        lambda build_prompt, count, label, *a, **k: f"bucket:{label}", rp.collect_unique_questions
+    )
+    rp.dedupe_and_top_up_questions = instrument(lambda *a, **k: "dedup", rp.dedupe_and_top_up_questions)
+    rp.generate_answers_for_existing_questions = instrument(lambda *a, **k: "answers", rp.generate_answers_for_existing_questions)
+    rp.save_json_output = instrument(lambda *a, **k: "serialization", rp.save_json_output)
+    rp.save_questions_to_csv = instrument(lambda *a, **k: "serialization", rp.save_questions_to_csv)
+    rp.read_questions_from_csv = instrument(lambda *a, **k: "serialization", rp.read_questions_from_csv)
+
+
+# === FAKE LLM BACKEND ===
+
+TOPICS = [
+    "test automation", "regression suites", "API contracts", "CI pipelines", "database indexing",
+    "load testing", "defect triage", "code reviews", "release planning", "flaky tests",
+    "microservices", "caching layers", "data validation", "monitoring", "access control",
+    "schema migrations", "mocking strategy", "performance budgets", "incident response", "feature flags",
+]
+ANGLES = [
+    "How did you approach", "Walk me through", "What trade-offs did you weigh in", "Why did you choose",
+    "How would you explain", "What went wrong with", "How do you measure success of", "How did you scale",
+]
+
+
+class FakeLLM:
+    """Stands in for ollama.chat: returns well-formed answers after a fixed latency"""
+
+    def __init__(self, latency=0.05, seed=7):
+        self.latency = latency
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = defaultdict(int)
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.question_counter = 0
+
+    def chat(self, model=None, messages=None, **kwargs):
+        prompt = messages[-1]["content"]
+        kind, content = self._respond(prompt)
+        time.sleep(self.latency)
+        with self.lock:
+            self.calls[kind] += 1
+            self.prompt_tokens += count_tokens(prompt)
+            self.completion_tokens += count_tokens(content)
+        return {"message": {"role": "assistant", "content": content}}
+
+    def _respond(self, prompt):
+        if "JSON resume parser" in prompt:
+            return "parse_resume", self._resume_json(prompt)
+        if "answer to this interview question" in prompt:
+            strength = re.search(r"Write a (\w+) answer", prompt).group(1)
+            return "answer", f"A {strength} answer describing the approach, tools used and measurable outcome."
+        if "Summarize this resume" in prompt:
+            return "summary", "Experienced engineer focused on quality and automation."
+        match = re.search(r"EXACTLY (\d+)", prompt)
+        if match:
+            return "questions", self._questions_json(prompt, int(match.group(1)))
+        return "other", "{}"
+
+    def _resume_json(self, prompt):
+        name = re.search(r"Name:\s*(.+)", prompt)
+        skills = re.search(r"Skills:\s*(.+)", prompt)
+        return json.dumps({
+            "full_name": name.group(1).strip() if name else "",
+            "summary": "QA engineer with automation background.",
+            "skills": [s.strip() for s in skills.group(1).split(",")] if skills else [],
+            "tools_and_technologies": {"Languages": ["Python"], "Automation Tools": ["Selenium"]},
+            "education": [{"institution": "State University", "degree": "B.Tech", "year": "2018", "percentage": ""}],
+            "work_experience": [{"title": "QA Engineer", "company": "Acme", "location": "", "from": "2019", "to": "2024",
+                                 "description": "Built regression automation."}],
+            "projects": [{"name": "Checkout tests", "role": "Lead", "tools": ["Selenium"], "description": "E2E suite."}],
+            "certifications": [],
+            "links": {"linkedin": "", "github": ""}
+        })
+
+    def _questions_json(self, prompt, count):
+        difficulty = re.search(r'"difficulty":\s*"(\w+)"', prompt)
+        weight = re.search(r'"weight":\s*(\d+)', prompt)
+        questions = []
+        with self.lock:
+            for _ in range(count):
+                self.question_counter += 1
+                topic = TOPICS[self.question_counter % len(TOPICS)]
+                angle = self.random.choice(ANGLES)
+                questions.append({
+                    "question": f"{angle} {topic} in project #{self.question_counter}?",
+                    "difficulty": difficulty.group(1) if difficulty else "medium",
+                    "weight": int(weight.group(1)) if weight else 3
+                })
+        return json.dumps(questions)
+
+
+# === SYNTHETIC RESUME CORPUS ===
+
+FIRST_NAMES = ["Asha", "Ravi", "Meera", "Kiran", "Divya", "Arjun"]
+SKILL_SETS = [
+    "Python, Selenium, SQL, Jenkins",
+    "Java, TestNG, REST Assured, Git",
+    "JavaScript, Cypress, Postman, JIRA",
+]
+
+
+def resume_lines(index):
+    name = FIRST_NAMES[index % len(FIRST_NAMES)]
+    lines = [
+        f"Name: {name} Candidate{index}",
+        f"Email: {name.lower()}{index}@example.com",
+        f"Skills: {SKILL_SETS[index % len(SKILL_SETS)]}",
+        "Experience: QA Engineer at Acme Corp (2019-2024)",
+    ]
+    # Pad with realistic-length bullet text so chunking has real work to do
+    for i in range(40):
+        lines.append(f"- Owned automated regression for module {i}, cutting manual test time and escaped defects.")
+    lines.append("Education: B.Tech, State University, 2018")
+    return lines
+
+
+def write_txt_resume(path, lines):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+
+
+def write_docx_resume(path, lines):
+    import docx
+    document = docx.Document()
+    for line in lines:
+        document.add_paragraph(line)
+    document.save(path)
+
+
+def write_pdf_resume(path, lines):
+    """Minimal single-page PDF with a Helvetica text stream (no PDF library needed)"""
+    def escape(text):
+        return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    text_ops = ["BT", "/F1 8 Tf", "10 TL", "36 800 Td"]
+    for line in lines:
+        text_ops.append(f"({escape(line)}) Tj T*")
+    text_ops.append("ET")
+    stream = "\n".join(text_ops).encode("latin-1", errors="replace")
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref_offset = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(bytes(out))
+
+
+def build_corpus(directory, per_format):
+    writers = {"pdf": write_pdf_resume, "docx": write_docx_resume, "txt": write_txt_resume}
+    paths = []
+    index = 0
+    for ext, writer in writers.items():
+        for _ in range(per_format):
+            path = os.path.join(directory, f"resume_{index}.{ext}")
+            writer(path, resume_lines(index))
+            paths.append(path)
+            index += 1
+    return paths
+
+
+# === RUN / REPORT ===
+
+def run_benchmark(args):
+    fake = FakeLLM(latency=args.latency)
+    Resumeparser.ollama.chat = fake.chat
+    if not args.use_embeddings:
+        # Lexical similarity keeps runs deterministic and independent of model downloads
+        Question_dedup.embedding_model_failed = True
+    install_timers()
+
+    corpus_dir = os.path.join(BENCH_WORK_DIR, "corpus")
+    os.makedirs(corpus_dir)
+    resumes = build_corpus(corpus_dir, args.resumes)
+    counts = {"beginner": args.count, "medium": args.count, "hard": args.count, "coding": args.coding}
+
+    pipeline_stage_times = defaultdict(float)
+    failures = []
+    started = time.perf_counter()
+    for path in resumes:
+        result = Resumeparser.run_pipeline_from_api(
+            resume_path=path,
+            job_title="QA Automation Engineer",
+            job_description="Own test automation for web and API services using Python, Selenium and CI.",
+            question_counts=counts,
+            include_answers=True,
+            max_retries=1
+        )
+        if not result.get("success"):
+            failures.append({"resume": os.path.basename(path), "error": result.get("error")})
+            continue
+        for stage, times in result.get("stage_timings", {}).items():
+            pipeline_stage_times[stage] += sum(times)
+        shutil.rmtree(result["temp_dir"], ignore_errors=True)
+    total = time.perf_counter() - started
+
+    runs = len(resumes)
+    return {
+        "config": {"latency": args.latency, "resumes": runs, "count_per_level": args.count, "coding": args.coding},
+        "total_seconds": round(total, 3),
+        "per_resume_seconds": round(total / runs, 3),
+        # Mean seconds per resume for each stage
+        "pipeline_stages": {k: round(v / runs, 4) for k, v in sorted(pipeline_stage_times.items())},
+        "sections": {k: round(v / runs, 4) for k, v in sorted(stage_times.items())},
+        "llm_calls": dict(sorted(fake.calls.items())),
+        "llm_calls_total": sum(fake.calls.values()),
+        "prompt_tokens": fake.prompt_tokens,
+        "completion_tokens": fake.completion_tokens,
+        "failures": failures,
+    }
+
+
+def print_report(report):
+    print("\n========== QUESTION PIPELINE BENCHMARK ==========")
+    print(f"Config: {report['config']}")
+    print(f"Total: {report['total_seconds']}s | per resume: {report['per_resume_seconds']}s")
+    print("Pipeline stages (mean s/resume):")
+    for stage, seconds in report["pipeline_stages"].items():
+        print(f"  {stage:<22} {seconds:.4f}")
+    print("Sections (mean s/resume):")
+    for section, seconds in report["sections"].items():
+        print(f"  {section:<22} {seconds:.4f}")
+    print(f"LLM calls: {report['llm_calls_total']} {report['llm_calls']}")
+    print(f"Tokens: prompt={report['prompt_tokens']} completion={report['completion_tokens']}")
+    if report["failures"]:
+        print(f"FAILURES: {report['failures']}")
+    print("=================================================\n")
+
+
+def compare_with_baseline(report, baseline, tolerance, slack):
+    """
+    Return a list of regressions. Timings may grow by `tolerance` (fraction) plus
+    `slack` seconds of noise; call and token counts may not grow by more than 5%.
+    """
+    if baseline.get("config") != report["config"]:
+        print(f"[WARNING] Baseline config {baseline.get('config')} differs from this run; comparison may be meaningless")
+
+    regressions = []
+    for group in ["pipeline_stages", "sections"]:
+        for name, base in baseline.get(group, {}).items():
+            current = report[group].get(name)
+            if current is not None and current > base * (1 + tolerance) + slack:
+                regressions.append(f"{group}.{name}: {current:.4f}s vs baseline {base:.4f}s")
+
+    for key in ["llm_calls_total", "prompt_tokens", "completion_tokens"]:
+        base = baseline.get(key)
+        if base and report[key] > base * 1.05:
+            regressions.append(f"{key}: {report[key]} vs baseline {base}")
+
+    if report["failures"]:
+        regressions.append(f"{len(report['failures'])} resume(s) failed")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the resume -> questions pipeline with a fake LLM")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake LLM latency per call (seconds)")
+    parser.add_argument("--resumes", type=int, default=2, help="Synthetic resumes per format (pdf/docx/txt)")
+    parser.add_argument("--count", type=int, default=2, help="Questions per difficulty level")
+    parser.add_argument("--coding", type=int, default=0, help="Coding questions per resume")
+    parser.add_argument("--use-embeddings", action="store_true", help="Use the sentence-transformer model for dedup")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="Baseline JSON path")
+    parser.add_argument("--update-baseline", action="store_true", help="Write this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown per stage")
+    parser.add_argument("--slack", type=float, default=0.05, help="Allowed absolute slowdown per stage (seconds)")
+    parser.add_argument("--output", help="Also write the report JSON here")
+    args = parser.parse_args()
+
+    try:
+        report = run_benchmark(args)
+    finally:
+        shutil.rmtree(BENCH_WORK_DIR, ignore_errors=True)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        if report["failures"]:
+            print("[ERROR] Not recording a baseline from a run with failures")
+            return 1
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"[DONE] Baseline written to: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"[ERROR] No baseline at {args.baseline}; record one with --update-baseline")
+        return 1
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare_with_baseline(report, baseline, args.tolerance, args.slack)
+    if regressions:
+        print("[ERROR] Regressions against baseline:")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    print("[DONE] No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,359 @@
+"""
+Offline replay of recorded candidate transcripts through InterviewManager.
+
+Each transcript (JSON: {"name", "config", "turns": [...]}) is fed turn by turn into
+InterviewManager.receive_input against a fake LLM. The report counts LLM calls and
+prompt / completion tokens per stage (intro, icebreaker, intro_followup,
+resume_discussion, custom_questions, candidate_questions, wrapup) and measures the
+pure-Python overhead of each turn (wall time minus time spent in LLM calls).
+Results are compared against a stored baseline; the script exits with status 1 on
+a regression, so stage-machine changes that add LLM calls or tokens get caught.
+
+The (stage, message) returned for every turn is also compared with the transcript's
+golden sequence in replay_transcripts/golden/<name>.json, so a change in what the
+interviewer says or in which stage a turn lands fails the replay too. Replays seed
+`random` so the manager's randomly chosen transitions are reproducible.
+
+    python replay_transcripts.py                              # replay replay_transcripts/*.json
+    python replay_transcripts.py --update-baseline            # also rewrites the golden sequences
+    python replay_transcripts.py path/to/transcript.json --latency 0.05 --verbose
+"""
+import io
+import os
+import sys
+import copy
+import glob
+import json
+import time
+import random
+import argparse
+import threading
+from contextlib import redirect_stdout, nullcontext
+from collections import defaultdict
+
+import Interview_functions
+from Interview_functions import register_llm_listener, unregister_llm_listener, count_tokens, TOKEN_COUNTER
+from Interview_manager import InterviewManager
+
+TRANSCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "replay_transcripts")
+GOLDEN_DIR = os.path.join(TRANSCRIPTS_DIR, "golden")
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "replay_baseline.json")
+REPLAY_SEED = 1234
+
+# Manager stage -> report stage
+STAGE_NAMES = {
+    "introduction": "intro",
+    "icebreaker": "icebreaker",
+    "intro_followup": "intro_followup",
+    "resume_discussion": "resume_discussion",
+    "custom_questions": "custom_questions",
+    "candidate_questions": "candidate_questions",
+    "wrapup_evaluation": "wrapup",
+    "done": "wrapup",
+}
+# LLM calls attributed by function rather than by the stage of the turn that triggered them
+FUNCTION_STAGES = {
+    "analyze_single_response": "answer_scoring",   # background, per recorded answer
+    "summarize_conversation": "context_summary",
+    "generate_final_summary_review": "wrapup",
+}
+
+
+# === FAKE LLM BACKEND ===
+
+FAKE_METRICS = {
+    "knowledge_depth": 7, "communication_clarity": 7, "confidence_tone": 6, "reasoning_ability": 7,
+    "relevance_to_question": 8, "motivation_indicator": 7, "emotion": "confident",
+}
+FAKE_SUMMARY = {
+    "summary": "Relevant answers with concrete examples and clear communication. strong",
+    "key_strengths": "1. Concrete examples\n2. Clear structure",
+    "improvement_areas": "1. Quantify impact\n2. Discuss trade-offs",
+    "overall_rating": 7.0,
+    "overall_emotion_summary": "Calm and confident throughout.",
+}
+
+
+class FakeLLM:
+    """Stands in for ollama.chat with replies that satisfy the interview prompts"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def chat(self, model=None, messages=None, format=None, **kwargs):
+        time.sleep(self.latency)
+        return {"message": {"role": "assistant", "content": self._respond(messages or [], format)}}
+
+    def _respond(self, messages, response_format):
+        system = " ".join(m["content"] for m in messages if m.get("role") == "system")
+        last_user = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+        if response_format == "json":
+            return json.dumps({"label": "clear" if '"clear"' in system else "strong", "followup": ""})
+        if "knowledge_depth" in system and "Respond ONLY in valid JSON" in system:
+            return json.dumps(FAKE_METRICS)
+        if "comprehensive evaluation" in system:
+            return json.dumps(FAKE_SUMMARY)
+        if "running summary" in system:
+            return "Candidate introduced themselves and discussed backend projects with concrete examples."
+        if "successfully introduced themselves" in system:
+            return "continue"
+        if "Respond strictly with one word" in system and "valid" in system:
+            return "valid"
+        if "follow-up question" in system and "Only one word" in system:
+            return "strong"
+        if "want to ask something" in system:
+            return "yes" if "?" in system.split("Their response was:")[-1] else "no"
+        if "Only return one word" in system:
+            return "clear"
+        if last_user:
+            return "Thanks for sharing. Could you tell me a bit more about that?"
+        return "What is a recent technical challenge you enjoyed working on?"
+
+
+# === LLM CALL ACCOUNTING ===
+
+class CallRecorder:
+    """LLM listener: calls / tokens per stage, and LLM seconds spent on the replay thread"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.current_stage = "intro"
+        self.replay_thread = threading.current_thread()
+        self.calls = defaultdict(int)
+        self.prompt_tokens = defaultdict(int)
+        self.completion_tokens = defaultdict(int)
+        self.functions = defaultdict(int)
+        self.foreground_llm_seconds = 0.0
+
+    def __call__(self, caller, seconds, request_kwargs, response):
+        stage = FUNCTION_STAGES.get(caller, self.current_stage)
+        prompt = "".join(m.get("content", "") for m in request_kwargs.get("messages", []))
+        completion = response["message"]["content"] if response else ""
+        with self.lock:
+            self.calls[stage] += 1
+            self.prompt_tokens[stage] += count_tokens(prompt)
+            self.completion_tokens[stage] += count_tokens(completion)
+            self.functions[caller] += 1
+            if threading.current_thread() is self.replay_thread:
+                self.foreground_llm_seconds += seconds
+
+
+def replay_transcript(transcript, recorder, verbose=False):
+    """Replay one transcript; returns per-turn timings, the (stage, message) sequence and the final stage"""
+    turns = []
+    sequence = []
+    random.seed(REPLAY_SEED)
+    with nullcontext() if verbose else redirect_stdout(io.StringIO()):
+        manager = InterviewManager(config=copy.deepcopy(transcript["config"]))  # The manager pops from its lists
+        for user_input in transcript["turns"]:
+            recorder.current_stage = STAGE_NAMES.get(manager.stage, manager.stage)
+            llm_before = recorder.foreground_llm_seconds
+            started = time.perf_counter()
+            response = manager.receive_input(user_input)
+            wall = time.perf_counter() - started
+            turns.append({
+                "stage": recorder.current_stage,
+                "wall_seconds": wall,
+                "overhead_seconds": wall - (recorder.foreground_llm_seconds - llm_before),
+            })
+            sequence.append({"stage": response.get("stage"), "message": response.get("message")})
+            if response.get("interview_done"):
+                break
+        # Background answer scoring must land before the counts are read
+        for future in list(getattr(manager, "_scoring_futures", {}).values()):
+            future.result()
+    return {"turns": turns, "sequence": sequence, "final_stage": manager.stage,
+            "completed": getattr(manager, "wrapup_completed", False)}
+
+
+def golden_path(name):
+    return os.path.join(GOLDEN_DIR, f"{name}.json")
+
+
+def compare_with_golden(name, sequence):
+    """Differences between a replayed (stage, message) sequence and the transcript's golden one"""
+    path = golden_path(name)
+    if not os.path.exists(path):
+        return [f"{name}: no golden sequence at {path} (record one with --update-baseline)"]
+    with open(path, "r", encoding="utf-8") as f:
+        golden = json.load(f)
+
+    for turn, (expected, actual) in enumerate(zip(golden, sequence), 1):
+        if expected != actual:
+            return [f"{name}: turn {turn} differs from the golden sequence\n"
+                    f"      expected {expected}\n      got      {actual}"]
+    if len(golden) != len(sequence):
+        return [f"{name}: {len(sequence)} turns replayed, golden sequence has {len(golden)}"]
+    return []
+
+
+def run_replay(args):
+    paths = args.transcripts or sorted(glob.glob(os.path.join(TRANSCRIPTS_DIR, "*.json")))
+    if not paths:
+        raise SystemExit(f"No transcripts found (looked in {TRANSCRIPTS_DIR})")
+
+    fake = FakeLLM(latency=args.latency)
+    Interview_functions.ollama.chat = fake.chat
+    recorder = CallRecorder()
+    register_llm_listener(recorder)
+
+    transcripts = {}
+    sequences = {}
+    overhead_by_stage = defaultdict(float)
+    turns_by_stage = defaultdict(int)
+    try:
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                transcript = json.load(f)
+            name = transcript.get("name") or os.path.splitext(os.path.basename(path))[0]
+            best = None
+            for _ in range(args.repeat):
+                result = replay_transcript(transcript, recorder, verbose=args.verbose)
+                overhead = sum(turn["overhead_seconds"] for turn in result["turns"])
+                if best is None or overhead < best[0]:
+                    best = (overhead, result)
+            overhead, result = best
+            for turn in result["turns"]:
+                overhead_by_stage[turn["stage"]] += turn["overhead_seconds"]
+                turns_by_stage[turn["stage"]] += 1
+            transcripts[name] = {
+                "turns": len(result["turns"]),
+                "final_stage": result["final_stage"],
+                "completed": result["completed"],
+                "overhead_ms": round(overhead * 1000, 3),
+            }
+            sequences[name] = result["sequence"]
+    finally:
+        unregister_llm_listener(recorder)
+
+    runs = args.repeat
+    report = {
+        "config": {"latency": args.latency, "repeat": runs, "transcripts": sorted(transcripts),
+                   "token_counter": TOKEN_COUNTER},
+        "transcripts": transcripts,
+        # Per replay (counts are summed over --repeat runs, so divide back)
+        "llm_calls": {stage: round(n / runs, 2) for stage, n in sorted(recorder.calls.items())},
+        "llm_calls_total": round(sum(recorder.calls.values()) / runs, 2),
+        "prompt_tokens": {stage: round(n / runs) for stage, n in sorted(recorder.prompt_tokens.items())},
+        "prompt_tokens_total": round(sum(recorder.prompt_tokens.values()) / runs),
+        "completion_tokens_total": round(sum(recorder.completion_tokens.values()) / runs),
+        "llm_functions": {name: round(n / runs, 2) for name, n in sorted(recorder.functions.items())},
+        # Best run: pure-Python time per stage (wall time minus foreground LLM time)
+        "overhead_ms": {stage: round(seconds * 1000, 3) for stage, seconds in sorted(overhead_by_stage.items())},
+        "turns": dict(sorted(turns_by_stage.items())),
+    }
+    return report, sequences
+
+
+def print_report(report):
+    print("\n========== TRANSCRIPT REPLAY ==========")
+    print(f"Config: {report['config']}")
+    for name, info in report["transcripts"].items():
+        status = "completed" if info["completed"] else f"stopped at {info['final_stage']}"
+        print(f"  {name}: {info['turns']} turns, {status}, overhead {info['overhead_ms']} ms")
+    print(f"{'Stage':<22}{'LLM calls':>10}{'Prompt tok':>12}{'Overhead ms':>14}")
+    stages = sorted(set(report["llm_calls"]) | set(report["overhead_ms"]))
+    for stage in stages:
+        print(f"  {stage:<20}{report['llm_calls'].get(stage, 0):>10}{report['prompt_tokens'].get(stage, 0):>12}"
+              f"{report['overhead_ms'].get(stage, 0.0):>14}")
+    print(f"Total LLM calls: {report['llm_calls_total']} | prompt tokens: {report['prompt_tokens_total']} "
+          f"| completion tokens: {report['completion_tokens_total']}")
+    print("=======================================\n")
+
+
+def compare_with_baseline(report, baseline, tolerance, slack_ms):
+    """
+    Return a list of regressions. LLM calls and prompt tokens per stage may not grow
+    by more than 5%; overhead may grow by `tolerance` (fraction) plus `slack_ms`.
+    Prompt tokens are only compared when both runs used the same token counter.
+    """
+    base_config = dict(baseline.get("config", {}))
+    config = dict(report["config"])
+    base_counter = base_config.pop("token_counter", None)
+    counter = config.pop("token_counter", None)
+    if base_config != config:
+        print(f"[WARNING] Baseline config {baseline.get('config')} differs from this run; comparison may be meaningless")
+
+    groups = ["llm_calls", "prompt_tokens"]
+    if base_counter != counter:
+        print(f"[WARNING] Baseline counted tokens with {base_counter}, this run with {counter}; "
+              f"skipping the prompt token comparison")
+        groups = ["llm_calls"]
+
+    regressions = []
+    for group in groups:
+        for stage, base in baseline.get(group, {}).items():
+            current = report[group].get(stage, 0)
+            if current > base * 1.05:
+                regressions.append(f"{group}.{stage}: {current} vs baseline {base}")
+        for stage in set(report[group]) - set(baseline.get(group, {})):
+            regressions.append(f"{group}.{stage}: {report[group][stage]} (new stage with LLM calls)")
+
+    for stage, base in baseline.get("overhead_ms", {}).items():
+        current = report["overhead_ms"].get(stage)
+        if current is not None and current > base * (1 + tolerance) + slack_ms:
+            regressions.append(f"overhead_ms.{stage}: {current} vs baseline {base}")
+
+    for name, info in report["transcripts"].items():
+        base = baseline.get("transcripts", {}).get(name)
+        if base and base.get("completed") and not info["completed"]:
+            regressions.append(f"{name}: no longer completes (stopped at {info['final_stage']})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay interview transcripts through InterviewManager with a fake LLM")
+    parser.add_argument("transcripts", nargs="*", help="Transcript JSON files (default: replay_transcripts/*.json)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Fake LLM latency per call (seconds)")
+    parser.add_argument("--repeat", type=int, default=3, help="Replays per transcript; overhead uses the best run")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="Baseline JSON path")
+    parser.add_argument("--update-baseline", action="store_true", help="Write this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed relative overhead growth per stage")
+    parser.add_argument("--slack-ms", type=float, default=5.0, help="Allowed absolute overhead growth per stage (ms)")
+    parser.add_argument("--verbose", action="store_true", help="Show the manager's own output")
+    parser.add_argument("--output", help="Also write the report JSON here")
+    args = parser.parse_args()
+
+    report, sequences = run_replay(args)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        incomplete = [name for name, info in report["transcripts"].items() if not info["completed"]]
+        if incomplete:
+            print(f"[ERROR] Not recording a baseline: {', '.join(incomplete)} did not complete")
+            return 1
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        os.makedirs(GOLDEN_DIR, exist_ok=True)
+        for name, sequence in sequences.items():
+            with open(golden_path(name), "w", encoding="utf-8") as f:
+                json.dump(sequence, f, indent=2, ensure_ascii=False)
+                f.write("\n")
+        print(f"[DONE] Baseline written to: {args.baseline} (golden sequences in {GOLDEN_DIR})")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"[ERROR] No baseline at {args.baseline}; record one with --update-baseline")
+        return 1
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare_with_baseline(report, baseline, args.tolerance, args.slack_ms)
+    for name, sequence in sequences.items():
+        regressions.extend(compare_with_golden(name, sequence))
+    if regressions:
+        print("[ERROR] Regressions against baseline:")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    print("[DONE] No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
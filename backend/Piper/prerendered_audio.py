@@ -0,0 +1,230 @@
+import io
+import os
+import time
+import wave
+import hashlib
+import tempfile
+import threading
+
+from Piper.voiceCloner import synthesize_text_to_wav, MODEL_PATH
+
+# Directory for pre-rendered interviewer audio (one WAV per distinct text)
+PRERENDERED_AUDIO_DIR = os.getenv(
+    "PRERENDERED_AUDIO_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "prerendered_audio")
+)
+# Silence inserted between message parts that are stitched together
+PART_GAP_SECONDS = float(os.getenv("PRERENDERED_PART_GAP_SECONDS", "0.35"))
+# Messages are split into parts on blank lines: "<transition>\n\n<question>"
+PART_SEPARATOR = "\n\n"
+# Clips not used for this long are deleted, then the least recently used ones above the size cap
+PRERENDERED_AUDIO_MAX_AGE_SECONDS = int(os.getenv("PRERENDERED_AUDIO_MAX_AGE_SECONDS", str(30 * 24 * 3600)))
+PRERENDERED_AUDIO_MAX_BYTES = int(os.getenv("PRERENDERED_AUDIO_MAX_BYTES", str(1024 * 1024 * 1024)))
+PRERENDERED_AUDIO_PRUNE_INTERVAL = int(os.getenv("PRERENDERED_AUDIO_PRUNE_INTERVAL", "600"))
+
+
+def normalize_text(text):
+    return " ".join(text.split())
+
+
+class PrerenderedAudioStore:
+    """
+    WAV files for interviewer texts known ahead of time (questions, transitions, greetings),
+    keyed by the voice model and the normalized text. render_message() stitches a message
+    together from stored parts and only synthesizes the parts that aren't stored.
+
+    Clips are touched whenever they are used, so prune() (run from the session reaper)
+    can drop the ones unused for max_age_seconds and keep the directory under max_bytes.
+    """
+
+    def __init__(self, directory=PRERENDERED_AUDIO_DIR, voice_id=MODEL_PATH,
+                 max_age_seconds=PRERENDERED_AUDIO_MAX_AGE_SECONDS, max_bytes=PRERENDERED_AUDIO_MAX_BYTES,
+                 prune_interval=PRERENDERED_AUDIO_PRUNE_INTERVAL):
+        self.directory = directory
+        self.voice_id = os.path.basename(voice_id or "")
+        self.max_age_seconds = max_age_seconds
+        self.max_bytes = max_bytes
+        self.prune_interval = prune_interval
+        self.last_prune = 0.0
+        self.lock = threading.Lock()
+        self.stats_counts = {"hits": 0, "misses": 0, "prerendered": 0, "full_synthesis": 0, "pruned": 0}
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _count(self, key, n=1):
+        with self.lock:
+            self.stats_counts[key] += n
+
+    def path_for(self, text):
+        digest = hashlib.md5(f"{self.voice_id}\n{normalize_text(text)}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.wav")
+
+    def get(self, text):
+        path = self.path_for(text)
+        try:
+            os.utime(path)  # Last use, for prune()
+        except OSError:
+            return None
+        return path
+
+    def read(self, text):
+        """
+        Stored clip bytes for `text`, or None. The clip is read right away: prune() on the
+        reaper thread may delete the file at any time, and a vanished clip is just a miss.
+        """
+        path = self.get(text)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def prerender(self, text):
+        """Synthesize and store `text` unless it is already stored. Returns the path."""
+        path = self.path_for(text)
+        if os.path.exists(path):
+            return path
+        # Write next to the final path and rename, so readers never see a partial file
+        fd, temp_path = tempfile.mkstemp(suffix=".wav", dir=self.directory)
+        os.close(fd)
+        try:
+            synthesize_text_to_wav(normalize_text(text), temp_path)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+        self._count("prerendered")
+        return path
+
+    def prerender_many(self, texts):
+        """Pre-render every distinct text; failures are logged and skipped. Returns the count rendered."""
+        rendered = 0
+        for text in dict.fromkeys(normalize_text(t) for t in texts if t and t.strip()):
+            if self.get(text):
+                continue
+            try:
+                self.prerender(text)
+                rendered += 1
+            except Exception as e:
+                print(f"[WARNING] Failed to pre-render audio for '{text[:50]}...': {e}")
+        return rendered
+
+    def render_message(self, text, output_path):
+        """
+        Write the audio for an interviewer message to output_path. If no part of it is
+        pre-rendered the whole message is synthesized in one go (same as before); otherwise
+        stored parts are reused and only the missing ones are synthesized.
+        """
+        parts = [part for part in text.split(PART_SEPARATOR) if part.strip()]
+        stored = [self.read(part) for part in parts]
+
+        if not any(stored):
+            self._count("misses", len(parts))
+            self._count("full_synthesis")
+            return synthesize_text_to_wav(text, output_path)
+
+        self._count("hits", sum(1 for clip in stored if clip))
+        self._count("misses", sum(1 for clip in stored if not clip))
+        if len(parts) == 1:
+            with open(output_path, "wb") as dst:
+                dst.write(stored[0])
+            return output_path
+
+        temp_paths = []
+        try:
+            sources = []
+            for part, clip in zip(parts, stored):
+                if clip is None:
+                    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
+                    temp_file.close()
+                    temp_paths.append(temp_file.name)
+                    clip = synthesize_text_to_wav(part, temp_file.name)
+                sources.append(clip)
+            concatenate_wavs(sources, output_path, gap_seconds=PART_GAP_SECONDS)
+            return output_path
+        finally:
+            for path in temp_paths:
+                if os.path.exists(path):
+                    os.unlink(path)
+
+    def prune(self, force=False):
+        """
+        Delete clips unused for max_age_seconds, then the least recently used ones until the
+        directory is under max_bytes. Runs at most once per prune_interval unless `force`.
+        Returns the number of files deleted.
+        """
+        now = time.time()
+        with self.lock:
+            if not force and now - self.last_prune < self.prune_interval:
+                return 0
+            self.last_prune = now
+
+        files = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".wav"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue
+            files.append((info.st_mtime, info.st_size, path))
+        files.sort()  # Least recently used first
+
+        total_bytes = sum(size for _, size, _ in files)
+        pruned = 0
+        for mtime, size, path in files:
+            expired = self.max_age_seconds and now - mtime > self.max_age_seconds
+            over_size = self.max_bytes and total_bytes > self.max_bytes
+            if not (expired or over_size):
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total_bytes -= size
+            pruned += 1
+
+        if pruned:
+            self._count("pruned", pruned)
+            print(f"[INFO] Pruned {pruned} pre-rendered audio clip(s); {total_bytes / 1024 / 1024:.1f} MB kept")
+        return pruned
+
+    def stats(self):
+        with self.lock:
+            counts = dict(self.stats_counts)
+        try:
+            sizes = [os.path.getsize(os.path.join(self.directory, name))
+                     for name in os.listdir(self.directory) if name.endswith(".wav")]
+        except OSError:
+            sizes = []
+        counts["stored_files"] = len(sizes)
+        counts["stored_bytes"] = sum(sizes)
+        return counts
+
+
+def open_wav(source):
+    """Open a WAV given as a path or as the file's bytes"""
+    return wave.open(io.BytesIO(source) if isinstance(source, bytes) else source, "rb")
+
+
+def concatenate_wavs(paths, output_path, gap_seconds=0.0):
+    """Join WAVs (paths or bytes) with the same format, with `gap_seconds` of silence in between"""
+    with open_wav(paths[0]) as first:
+        params = first.getparams()
+    silence = b"\x00" * (int(params.framerate * gap_seconds) * params.sampwidth * params.nchannels)
+
+    with wave.open(output_path, "wb") as out:
+        out.setnchannels(params.nchannels)
+        out.setsampwidth(params.sampwidth)
+        out.setframerate(params.framerate)
+        for index, path in enumerate(paths):
+            with open_wav(path) as part:
+                if (part.getnchannels(), part.getsampwidth(), part.getframerate()) != \
+                        (params.nchannels, params.sampwidth, params.framerate):
+                    raise ValueError(f"WAV format mismatch in part {index}")
+                if index and silence:
+                    out.writeframes(silence)
+                out.writeframes(part.readframes(part.getnframes()))
+    return output_path
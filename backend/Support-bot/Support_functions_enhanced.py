@@ -2,6 +2,7 @@ import ollama
 import requests
 import json
 import os
+import sys
 from collections import defaultdict
 from sentence_transformers import SentenceTransformer
 import faiss
@@ -11,6 +12,12 @@ import numpy as np
 from dotenv import load_dotenv
 load_dotenv()
 
+# Shared pooled HTTP client lives in backend/common
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+from common.http_client import http_client
+
 # Get Supabase URL from environment
 SUPABASE_URL = os.getenv("SUPABASE_URL", "http://localhost:54321")
 
@@ -167,7 +174,7 @@ def call_edge_function(auth_token, supabase_url=None):
             'Content-Type': 'application/json'
         }
         
-        response = requests.get(
+        response = http_client.get(
             f"{supabase_url}/functions/v1/support-bot-data",
             headers=headers,
             timeout=30
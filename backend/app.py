@@ -4,7 +4,6 @@ import json
 import time
 import traceback
 import subprocess
-import soundfile as sf
 import cv2
 import numpy as np
 import mediapipe as mp
@@ -15,16 +14,20 @@ from PIL import Image
 from dotenv import load_dotenv
 from datetime import datetime
 from flask import Flask
-from faster_whisper import WhisperModel
 import tempfile
 from werkzeug.utils import secure_filename
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room
 from io import BytesIO
 from PIL import Image, UnidentifiedImageError
 from supabase import create_client, Client
 from pydub import AudioSegment
 import requests
 import hashlib
+import copy
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 # ─────────────────────────────────────────────────────
 #  Load environment variables from .env
@@ -50,12 +53,30 @@ DOMAIN = os.getenv("DOMAIN")
 from common.GPU_Check import get_device
 # from TTS.Scripts.TTS_LOAD_MODEL import load_model, run_tts
 from flask_cors import CORS
-from common.auth import verify_supabase_token  # Import the decorator
+from common.auth import verify_supabase_token, get_user_from_token  # Import the decorator
+from common.durable_jobs import DurableJobRunner, Step
+from common.http_client import http_client
+from common.tracing import start_trace, finish_trace, annotate, span, record_span, server_timing_header, trace_metrics, get_trace
+from common.transcription_service import TranscriptionService, TranscriptionQueueFull, TranscriptionTimeout
+from common.voice_activity import trim_to_speech, vad_metrics
 
 device = get_device()
-interview_instances = {}
-from INTERVIEW.Interview_manager import InterviewManager
+from INTERVIEW.Interview_manager import (
+    InterviewManager, START_INTERVIEW_COMMAND, OPENING_PROMPT, opening_greeting,
+    RESUME_TRANSITIONS, CUSTOM_TRANSITIONS, FIXED_LEAD_INS
+)
+from INTERVIEW.Session_store import InterviewSessionStore, SessionBusyError
+
+# Interview sessions: bounded in-memory LRU backed by SQLite, shared by all workers
+session_store = InterviewSessionStore(InterviewManager)
+session_store.start_reaper()  # Evicts idle/finished sessions and purges expired ones
 from INTERVIEW.analyze_performance_trends import analyze_user_performance, analyze_performance_from_feedbacks
+from INTERVIEW.JD_cache import get_jd_cache, jd_text_key, classification_key
+# Same module object the manager uses (INTERVIEW modules import each other flat)
+from Interview_functions import register_llm_listener
+
+# Every LLM call made while handling a request shows up as an "llm.<function>" span
+register_llm_listener(lambda caller, seconds, request_kwargs, response: record_span(f"llm.{caller}", seconds))
 
 # ─────────────────────────────────────────────────────
 # Head Tracking Implementation
@@ -352,53 +373,40 @@ supabase: Client = create_client(supabase_url, supabase_service_key)
 
 tts_model_loaded = False
 
-# Load the Faster Whisper model for speech-to-text
-whisper_model = None
-def initialize_whisper_model():
-    """Initialize the Whisper model for speech-to-text transcription"""
-    global whisper_model
-    if whisper_model is None:
-        print("[INFO] Loading Whisper model for speech-to-text...")
-        try:
-            # Check if device is MPS and fall back to CPU for Whisper
-            whisper_device = "cpu" if device == "mps" else device
-            whisper_model = WhisperModel("large-v3", device=whisper_device)
-            print(f"[DONE] Whisper model loaded on {whisper_device} (original device was {device})")
-        except Exception as e:
-            print(f"[ERROR] Failed to load Whisper model: {e}")
-            whisper_model = None
+# Faster Whisper speech-to-text: worker processes (one model replica each) behind a
+# bounded request queue, see common/transcription_service.py
+transcription_service = TranscriptionService(device=device)
 
-# Initialize Whisper model at startup
-initialize_whisper_model()
+# Start the Whisper workers at startup
+transcription_service.start()
 
 # ─────────────────────────────────────────────────────
 # Audio Processing Functions
 # ─────────────────────────────────────────────────────
 
-def convert_to_wav(input_path):
-    """Convert audio file to WAV format for processing"""
-    wav_path = input_path + "_converted.wav"
-    try:
-        subprocess.run([
-            "ffmpeg", "-y", "-i", input_path, "-ar", "16000", "-ac", "1", wav_path
-        ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        return wav_path
-    except subprocess.CalledProcessError:
-        print("[ERROR] FFmpeg conversion failed.")
-        return None
+WHISPER_SAMPLE_RATE = 16000
 
-def is_blank_audio(audio_path, rms_threshold=0.005):
-    """Check if audio file is blank/silent"""
+def decode_audio_bytes(audio_bytes, sample_rate=WHISPER_SAMPLE_RATE):
+    """
+    Decode uploaded audio (webm/ogg/wav/...) in memory to a mono float32 array at
+    sample_rate, the input Whisper expects. Uses PyAV through faster_whisper and falls
+    back to an ffmpeg stdin/stdout pipe. Returns None when neither can decode it.
+    """
     try:
-        audio, sample_rate = sf.read(audio_path)
-        if audio.ndim > 1:
-            audio = audio.mean(axis=1)  # convert to mono
-        rms = np.sqrt(np.mean(audio**2))
-        print(f"[DEBUG] RMS Energy: {rms}")
-        return rms < rms_threshold
+        from faster_whisper.audio import decode_audio
+        return decode_audio(BytesIO(audio_bytes), sampling_rate=sample_rate)
     except Exception as e:
-        print(f"[ERROR] Failed to read audio: {e}")
-        return False
+        print(f"[WARNING] In-process audio decode failed, falling back to ffmpeg: {e}")
+
+    try:
+        result = subprocess.run([
+            "ffmpeg", "-nostdin", "-loglevel", "error", "-i", "pipe:0",
+            "-f", "f32le", "-acodec", "pcm_f32le", "-ac", "1", "-ar", str(sample_rate), "pipe:1"
+        ], input=audio_bytes, capture_output=True, check=True)
+        return np.frombuffer(result.stdout, dtype=np.float32)
+    except (subprocess.CalledProcessError, OSError) as e:
+        print(f"[ERROR] FFmpeg decode failed: {e}")
+        return None
 
 def sanitize_and_validate_transcription(transcription):
     """
@@ -484,70 +492,46 @@ def sanitize_and_validate_transcription(transcription):
     # Valid transcription - no corruption detected
     return True, transcription, "valid", False
 
-def reinitialize_whisper_model():
-    """Re-initialize the Whisper model (clean up old one first)"""
-    global whisper_model
+def transcribe_with_whisper(audio):
+    """Transcribe audio on the Whisper worker pool. Returns (text, info); info["worker"] produced the text."""
+    return transcription_service.transcribe(audio)
+
+def process_audio_file(audio_bytes):
+    """Process uploaded audio bytes: decode, cut silence with VAD, then transcribe the speech"""
     try:
-        if whisper_model is not None:
-            print("[INFO] Releasing old Whisper model...")
-            del whisper_model
-            whisper_model = None
-        
-        print("[INFO] Re-initializing Whisper model...")
-        whisper_device = "cpu" if device == "mps" else device
-        whisper_model = WhisperModel("large-v3", device=whisper_device)
-        print(f"[DONE] Whisper model re-initialized on {whisper_device}")
-        return True
+        # Decode once in memory; the same samples feed VAD and Whisper
+        with span("decode_audio"):
+            audio = decode_audio_bytes(audio_bytes)
+        if audio is None:
+            return {"success": False, "error": "Audio conversion failed"}
+
+        with span("vad"):
+            speech, vad_report = trim_to_speech(audio, WHISPER_SAMPLE_RATE)
+        annotate(audio_seconds_saved=vad_report["audio_seconds_saved"])
+        print(f"[DEBUG] VAD ({vad_report['method']}): {vad_report['speech_seconds']}s speech of "
+              f"{vad_report['audio_seconds']}s audio in {vad_report['segments']} segment(s)")
+        if speech.size == 0:
+            print("[INFO] No speech detected — skipping transcription.")
+            return {"success": True, "transcription": "", "vad": vad_report}
     except Exception as e:
-        print(f"[ERROR] Failed to re-initialize Whisper model: {e}")
-        import traceback
+        print(f"[ERROR] Audio processing failed: {e}")
         traceback.print_exc()
-        whisper_model = None
-        return False
-
-def transcribe_with_whisper(wav_path):
-    """Helper function to transcribe audio with current model"""
-    segments, info = whisper_model.transcribe(
-        wav_path,
-        beam_size=5,
-        language="en",
-        task="transcribe"
-    )
-    segment_list = list(segments)
-    transcription = " ".join([segment.text for segment in segment_list])
-    return transcription, info
+        return {"success": False, "error": str(e)}
 
-def process_audio_file(file):
-    """Process uploaded audio file and return transcription with retry logic"""
-    global whisper_model
-    
-    if whisper_model is None:
-        print("[ERROR] Whisper model not loaded, initializing...")
-        initialize_whisper_model()
-        if whisper_model is None:
-            return {"success": False, "error": "Speech recognition model not available"}
-    
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".webm") as temp_file:
-        original_path = temp_file.name
-        file.save(original_path)
+    result = transcribe_with_retries(speech)
+    result["vad"] = vad_report
+    return result
 
-    wav_path = None
+def transcribe_with_retries(audio):
+    """Transcribe decoded speech, re-initializing the model when the output looks corrupted"""
     try:
-        wav_path = convert_to_wav(original_path)
-        if not wav_path or not os.path.exists(wav_path):
-            print("[ERROR] FFmpeg conversion failed or file missing.")
-            return {"success": False, "error": "Audio conversion failed"}
-
-        if is_blank_audio(wav_path):
-            print("[INFO] Blank audio detected — skipping transcription.")
-            return {"success": True, "transcription": ""}
-
         # Try transcription with up to 2 retries
         max_retries = 3
         
         for attempt in range(max_retries + 1):  # 0, 1, 2 = 3 total attempts
             try:
-                transcription, info = transcribe_with_whisper(wav_path)
+                with span("transcribe"):
+                    transcription, info = transcribe_with_whisper(audio)
                 
                 # Validate transcription and check if retry is needed
                 is_valid, cleaned_transcription, validation_reason, needs_retry = sanitize_and_validate_transcription(transcription)
@@ -565,15 +549,9 @@ def process_audio_file(file):
                     # ✅ ALWAYS retry when corruption is detected (even if we have valid text)
                     if attempt < max_retries:
                         print(f"[INFO] Re-initializing Whisper model due to corruption and retrying (attempt {attempt + 2}/{max_retries + 1})...")
-                        if reinitialize_whisper_model():
-                            continue  # Retry with fresh model
-                        else:
-                            print("[ERROR] Failed to re-initialize model, cannot retry")
-                            # If we had valid text before corruption, return it as fallback
-                            if cleaned_transcription and len(cleaned_transcription.strip()) > 0:
-                                print(f"[INFO] Returning cleaned transcription as fallback: {cleaned_transcription[:50]}...")
-                                return {"success": True, "transcription": cleaned_transcription}
-                            return {"success": True, "transcription": ""}  # Return empty to prevent API call
+                        # Reload the worker that produced the bad output, not whichever takes the retry
+                        transcription_service.reload_worker(info.get("worker"))
+                        continue  # Retry with fresh model
                     else:
                         # Last attempt failed - use cleaned version if available, otherwise empty
                         if cleaned_transcription and len(cleaned_transcription.strip()) > 0:
@@ -587,23 +565,26 @@ def process_audio_file(file):
                     print(f"[WARNING] Invalid transcription detected: {validation_reason}")
                     if attempt < max_retries:
                         print(f"[INFO] Re-initializing Whisper model and retrying (attempt {attempt + 2}/{max_retries + 1})...")
-                        if reinitialize_whisper_model():
-                            continue
+                        transcription_service.reload_worker(info.get("worker"))
+                        continue
                     return {"success": True, "transcription": ""}
                 
+            except TranscriptionQueueFull as busy_error:
+                # Don't retry into a full queue - the client should back off
+                print(f"[WARNING] {busy_error}")
+                return {"success": False, "error": "Speech recognition is busy, please retry shortly", "status_code": 503}
+            except TranscriptionTimeout as timeout_error:
+                print(f"[ERROR] Transcription timed out: {timeout_error}")
+                return {"success": False, "error": str(timeout_error), "status_code": 504}
             except Exception as transcribe_error:
                 print(f"[ERROR] Transcription attempt {attempt + 1} failed: {transcribe_error}")
                 import traceback
                 traceback.print_exc()
                 
-                # If this is not the last attempt, re-initialize and retry
+                # If this is not the last attempt, retry; the worker that failed reloads its model itself
                 if attempt < max_retries:
-                    print(f"[INFO] Re-initializing Whisper model after error and retrying (attempt {attempt + 2}/{max_retries + 1})...")
-                    if reinitialize_whisper_model():
-                        continue  # Retry with fresh model
-                    else:
-                        print("[ERROR] Failed to re-initialize model after error")
-                        return {"success": False, "error": f"Transcription failed and model recovery failed: {str(transcribe_error)}"}
+                    print(f"[INFO] Retrying after transcription error (attempt {attempt + 2}/{max_retries + 1})...")
+                    continue  # Retry with fresh model
                 else:
                     # Last attempt - return error
                     return {"success": False, "error": f"Transcription failed after {max_retries + 1} attempts: {str(transcribe_error)}"}
@@ -613,14 +594,6 @@ def process_audio_file(file):
         import traceback
         traceback.print_exc()
         return {"success": False, "error": str(e)}
-    finally:
-        # Clean up temporary files
-        for path in [original_path, wav_path]:
-            if path and os.path.exists(path):
-                try:
-                    os.remove(path)
-                except Exception as e:
-                    print(f"[WARNING] Failed to clean up {path}: {e}")
 
 # ─────────────────────────────────────────────────────
 # Global flags and file tracking
@@ -646,11 +619,31 @@ CORS(app,
          "http://127.0.0.1:3000",  # Alternative localhost
      ],
      methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-     allow_headers=["Content-Type", "Authorization", "X-Requested-With", "Accept"])
+     allow_headers=["Content-Type", "Authorization", "X-Requested-With", "Accept", "X-Request-ID"],
+     expose_headers=["Server-Timing"])
 
 socketio = SocketIO(app, cors_allowed_origins="*")
 
 
+# ─────────────────────────────────────────────────────
+# Request Tracing (Server-Timing header + percentile metrics)
+# ─────────────────────────────────────────────────────
+
+@app.before_request
+def begin_request_trace():
+    if request.method != 'OPTIONS' and request.path.startswith('/api/'):
+        start_trace(request.endpoint or request.path)
+
+
+@app.after_request
+def end_request_trace(response):
+    trace = get_trace()
+    if trace is not None:
+        finish_trace(trace)
+        response.headers['Server-Timing'] = server_timing_header(trace)
+    return response
+
+
 # ─────────────────────────────────────────────────────
 # Test API Route with Supabase Authentication
 # ─────────────────────────────────────────────────────
@@ -684,10 +677,55 @@ def health_check():
         "version": "1.0.0"
     })
 
+@app.route('/api/metrics', methods=['GET'])
+@verify_supabase_token
+def service_metrics():
+    """Runtime metrics: outbound HTTP latency / connection reuse and backend caches"""
+    try:
+        return jsonify({
+            "success": True,
+            "message": "Metrics retrieved",
+            "data": {
+                "http": http_client.metrics(),
+                "sessions": session_store.stats(),
+                "jd_cache": get_jd_cache().stats(),
+                "latency": trace_metrics(),
+                "prerendered_audio": prerendered_audio.stats(),
+                "transcription": transcription_service.stats(),
+                "vad": vad_metrics(),
+                "timestamp": datetime.utcnow().isoformat()
+            }
+        })
+    except Exception as e:
+        print(f"[ERROR] Failed to collect metrics: {e}")
+        traceback.print_exc()
+        return jsonify({
+            "success": False,
+            "message": f"Internal server error: {str(e)}"
+        }), 500
+
 # ─────────────────────────────────────────────────────
 # Job Description Parsing API
 # ─────────────────────────────────────────────────────
 
+def classify_technical_role_cached(job_title, job_description):
+    """
+    Classify a role, reusing the JD cache. Returns (is_technical, cached).
+    Failures are raised and never cached.
+    """
+    cache = get_jd_cache()
+    key = classification_key(job_title, job_description)
+    cached = cache.get(key)
+    if cached is not None and cached.get("is_technical") is not None:
+        print(f"[DEBUG] JD cache hit for technical role classification: {job_title}")
+        return bool(cached["is_technical"]), True
+
+    from INTERVIEW.Resumeparser import classify_if_technical_role
+    is_technical = classify_if_technical_role(job_title, job_description, model="llama3")
+    cache.set(key, {"job_title": job_title, "job_description": job_description, "is_technical": is_technical})
+    return is_technical, False
+
+
 @app.route('/api/parse-job-description', methods=['POST', 'OPTIONS'])
 @verify_supabase_token
 def parse_job_description():
@@ -743,32 +781,48 @@ def parse_job_description():
         
         try:
             # Import and use the job description parser
-            print("[DEBUG] Importing parse_job_description_file...")
-            from INTERVIEW.Resumeparser import parse_job_description_file
-            
-            print(f"[DEBUG] Starting job description parsing with model=llama3...")
-            
-            # Parse the job description file
-            result = parse_job_description_file(temp_file_path, model="llama3")
-            
-            print(f"[DEBUG] Parsing completed successfully")
-            print(f"[DEBUG] Result keys: {list(result.keys()) if isinstance(result, dict) else 'Not a dict'}")
+            print("[DEBUG] Importing job description parser...")
+            from INTERVIEW.Resumeparser import extract_job_description_text, parse_job_description_text
+            
+            # Same JD text (even re-uploaded under another name) -> same cache entry
+            full_text = extract_job_description_text(temp_file_path)
+            cache = get_jd_cache()
+            file_key = jd_text_key(full_text)
+            cached = cache.get(file_key)
+            
+            if cached is not None:
+                print(f"[DEBUG] JD cache hit for uploaded file: {file.filename}")
+                job_title = cached.get('job_title', '')
+                job_description = cached.get('job_description', '')
+            else:
+                print(f"[DEBUG] Starting job description parsing with model=llama3...")
+                
+                # Parse the job description text
+                result = parse_job_description_text(full_text, model="llama3")
+                
+                print(f"[DEBUG] Parsing completed successfully")
+                print(f"[DEBUG] Result keys: {list(result.keys()) if isinstance(result, dict) else 'Not a dict'}")
+                
+                job_title = result.get('job_title', '')
+                job_description = result.get('job_description', '')
             
             # Classify if this is a technical role
-            from INTERVIEW.Resumeparser import classify_if_technical_role
-            job_title = result.get('job_title', '')
-            job_description = result.get('job_description', '')
-            
-            is_technical = False
-            if job_title and job_description:
+            is_technical = cached.get('is_technical') if cached else None
+            if is_technical is None and job_title and job_description:
                 try:
                     print(f"[DEBUG] Classifying technical role for: {job_title}")
-                    is_technical = classify_if_technical_role(job_title, job_description, model="llama3")
+                    is_technical, _ = classify_technical_role_cached(job_title, job_description)
                     print(f"[DEBUG] Technical role classification result: {is_technical}")
                 except Exception as classify_error:
                     print(f"[WARNING] Failed to classify technical role: {classify_error}")
-                    # Default to False if classification fails
-                    is_technical = False
+            
+            if job_title and job_description:
+                # is_technical stays None in the cache if classification failed, so it is retried next time
+                cache.set(file_key, {
+                    "job_title": job_title,
+                    "job_description": job_description,
+                    "is_technical": is_technical
+                })
             
             return jsonify({
                 "success": True,
@@ -776,7 +830,8 @@ def parse_job_description():
                 "data": {
                     "job_title": job_title,
                     "job_description": job_description,
-                    "is_technical": is_technical  # Add this
+                    "is_technical": bool(is_technical),  # Default to False if classification failed
+                    "cached": cached is not None
                 }
             })
             
@@ -833,15 +888,14 @@ def classify_technical_role():
         
         print(f"[DEBUG] Classifying technical role for: {job_title}")
         
-        from INTERVIEW.Resumeparser import classify_if_technical_role
-        
         try:
-            is_technical = classify_if_technical_role(job_title, job_description, model="llama3")
-            print(f"[DEBUG] Technical role classification result: {is_technical}")
+            is_technical, cached = classify_technical_role_cached(job_title, job_description)
+            print(f"[DEBUG] Technical role classification result: {is_technical} (cached: {cached})")
             
             response = jsonify({
                 "success": True,
-                "is_technical": is_technical
+                "is_technical": is_technical,
+                "cached": cached
             })
             response.headers.add('Access-Control-Allow-Origin', '*')
             return response
@@ -901,6 +955,7 @@ def generate_questions():
         blend_mode = data.get('blend', False)
         blend_pct_resume = data.get('blend_pct_resume', 50)
         blend_pct_jd = data.get('blend_pct_jd', 50)
+        use_question_bank = data.get('use_question_bank', False)
         
         if not all([resume_url, job_description, job_title]):
             return jsonify({
@@ -912,10 +967,9 @@ def generate_questions():
         print(f"[DEBUG] Question counts: {question_counts}")
         print(f"[DEBUG] Split mode: {split_mode} (Resume {resume_pct}% | JD {jd_pct}%)")
         print(f"[DEBUG] Blend mode: {blend_mode} (Resume {blend_pct_resume}% | JD {blend_pct_jd}%)")
+        print(f"[DEBUG] Use question bank: {use_question_bank}")
         
         # Download resume file from Supabase Storage
-        import requests
-        
         # Extract file path from URL
         # URL format: http://127.0.0.1:54321/storage/v1/object/public/resumes/user_files/...
         file_path = resume_url.split('/storage/v1/object/public/')[-1]
@@ -930,7 +984,7 @@ def generate_questions():
         
         # Download file to temporary location with correct extension
         with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{file_ext}') as temp_file:
-            response = requests.get(resume_url)
+            response = http_client.get(resume_url, timeout=60)
             response.raise_for_status()
             temp_file.write(response.content)
             temp_resume_path = temp_file.name
@@ -954,7 +1008,8 @@ def generate_questions():
                 jd_pct=jd_pct,
                 blend=blend_mode,
                 blend_pct_resume=blend_pct_resume,
-                blend_pct_jd=blend_pct_jd
+                blend_pct_jd=blend_pct_jd,
+                use_question_bank=use_question_bank
             )
             
             if not result.get('success'):
@@ -963,13 +1018,18 @@ def generate_questions():
                     "message": f"Failed to process resume: {result.get('error', 'Unknown error')}"
                 }), 500
             
+            # Questions are fixed from here on - render their audio before the interview starts
+            question_texts = [q.get('question_text', '') for q in result['questions']]
+            prerender_executor.submit(prerender_interview_audio, question_texts, job_title)
+            
             return jsonify({
                 "success": True,
                 "message": "Questions generated successfully",
                 "data": {
                     "questions": result['questions'],
                     "questions_count": result['questions_count'],
-                    "candidate_name": result['candidate']
+                    "candidate_name": result['candidate'],
+                    "stage_timings": result.get('stage_timings', {})
                 }
             })
             
@@ -1020,16 +1080,20 @@ def transcribe_audio():
         
         print(f"[DEBUG] Received audio file: {file.filename}")
         
+        # Read the upload once; the bytes are decoded in memory and reused for storage
+        audio_bytes = file.read()
+
         # Process the audio file
-        result = process_audio_file(file)
+        result = process_audio_file(audio_bytes)
         
         if not result.get('success'):
             return jsonify({
                 "success": False,
                 "message": f"Transcription failed: {result.get('error', 'Unknown error')}"
-            }), 500
+            }), result.get('status_code', 500)
         
         transcription = result.get('transcription', '')
+        vad_report = result.get('vad', {})
         
         # ✅ NEW: Store user audio file permanently
         if transcription:  # Only store if transcription was successful
@@ -1044,11 +1108,9 @@ def transcribe_audio():
                     user_filename = f"user_speech_{timestamp}.wav"
                     user_file_path = f"{user_id}/{interview_id}/{user_filename}"
                     
-                    # Reset file pointer and upload
-                    file.seek(0)
                     result = supabase.storage.from_('audio-files').upload(
                         path=user_file_path,
-                        file=file.read(),
+                        file=audio_bytes,
                         file_options={"content-type": "audio/wav"}
                     )
                     
@@ -1067,7 +1129,8 @@ def transcribe_audio():
             "message": "Audio transcribed successfully",
             "data": {
                 "transcription": transcription,
-                "word_count": len(transcription.split()) if transcription else 0
+                "word_count": len(transcription.split()) if transcription else 0,
+                "audio_seconds_saved": vad_report.get('audio_seconds_saved', 0.0)
             }
         })
         
@@ -1080,14 +1143,397 @@ def transcribe_audio():
             "message": f"Failed to process audio: {str(e)}"
         }), 500
 
+# ─────────────────────────────────────────────────────
+# Interview Config Cache
+# ─────────────────────────────────────────────────────
+
+INTERVIEW_CONFIG_TTL_SECONDS = int(os.getenv("INTERVIEW_CONFIG_TTL_SECONDS", "300"))
+INTERVIEW_CONFIG_CACHE_SIZE = int(os.getenv("INTERVIEW_CONFIG_CACHE_SIZE", "1000"))
+interview_config_cache = OrderedDict()  # (interview_id, user_id) -> {"config", "etag", "fetched_at"}
+interview_config_lock = threading.Lock()
+
+
+class InterviewConfigError(Exception):
+    pass
+
+
+def fetch_interview_config(interview_id, auth_token, etag=None):
+    """
+    Fetch interview data from the interview-data edge function and build the
+    InterviewManager config. Returns (config, etag), or (None, etag) on 304 Not Modified.
+    """
+    supabase_url = os.getenv('SUPABASE_URL')
+    edge_function_url = f"{supabase_url}/functions/v1/interview-data"
+    headers = {
+        'Authorization': f'Bearer {auth_token}',
+        'Content-Type': 'application/json'
+    }
+    if etag:
+        headers['If-None-Match'] = etag
+
+    print(f"[DEBUG] Fetching interview config from: {edge_function_url}")
+    response = http_client.get(
+        edge_function_url,
+        headers=headers,
+        params={'interview_id': interview_id},
+        timeout=10
+    )
+    print(f"[DEBUG] Edge function response status: {response.status_code}")
+
+    if response.status_code == 304:
+        return None, etag
+
+    if response.status_code != 200:
+        print(f"[ERROR] Edge function failed: {response.status_code} - {response.text}")
+        raise InterviewConfigError(f"Failed to fetch interview data: {response.status_code}")
+
+    result = response.json()
+    if not result.get('success'):
+        raise InterviewConfigError(result.get('message', 'Failed to fetch interview data'))
+
+    interview_data = result['data']
+    job_title = interview_data['job_description']['title']
+    job_description = interview_data['job_description']['description']
+    questions = interview_data['questions']
+
+    # Extract core questions - deduplicate by question_text
+    seen_questions = set()
+    core_questions = []
+    for q in questions:
+        question_text = q['question_text']
+        if question_text not in seen_questions:
+            seen_questions.add(question_text)
+            core_questions.append(question_text)
+    coding_requirement = [q['requires_code'] for q in questions]
+
+    print(f"[DEBUG] Fetched interview config: job_title='{job_title}', questions_count={len(questions)}, unique_questions={len(core_questions)}")
+
+    config = {
+        "job_title": job_title,
+        "job_description": job_description,
+        "core_questions": core_questions,
+        "coding_requirement": coding_requirement,
+        "time_limit_minutes": 150,  # 2 hours
+        "custom_questions": [],
+    }
+    return config, response.headers.get('ETag')
+
+
+def get_interview_config(interview_id, user_id, auth_token):
+    """
+    Interview config from the cache. Fresh entries (younger than INTERVIEW_CONFIG_TTL_SECONDS)
+    are returned as-is; stale ones are revalidated with If-None-Match when we have an ETag.
+    """
+    key = (interview_id, user_id)
+    with interview_config_lock:
+        entry = interview_config_cache.get(key)
+        if entry is not None:
+            interview_config_cache.move_to_end(key)
+
+    if entry is not None and time.time() - entry["fetched_at"] < INTERVIEW_CONFIG_TTL_SECONDS:
+        print(f"[DEBUG] Interview config cache hit for {interview_id}")
+        return copy.deepcopy(entry["config"])
+
+    config, etag = fetch_interview_config(interview_id, auth_token, etag=entry["etag"] if entry else None)
+    if config is None:
+        print(f"[DEBUG] Interview config not modified (ETag {etag}) for {interview_id}")
+        config = entry["config"]
+
+    with interview_config_lock:
+        interview_config_cache[key] = {"config": config, "etag": etag, "fetched_at": time.time()}
+        interview_config_cache.move_to_end(key)
+        while len(interview_config_cache) > INTERVIEW_CONFIG_CACHE_SIZE:
+            interview_config_cache.popitem(last=False)
+
+    # Managers mutate their question lists, so never hand out the cached objects
+    return copy.deepcopy(config)
+
 # Import for voice synthesis
 from Piper.voiceCloner import synthesize_text_to_wav
+from Piper.prerendered_audio import PrerenderedAudioStore
+
+# Interviewer audio for questions / transitions, rendered once after question generation
+prerendered_audio = PrerenderedAudioStore()
+session_store.add_reap_task(prerendered_audio.prune)  # Age/size cap on the clip directory
+PRERENDER_WORKERS = int(os.getenv("PRERENDER_WORKERS", "1"))
+prerender_executor = ThreadPoolExecutor(max_workers=PRERENDER_WORKERS, thread_name_prefix="prerender")
+
+
+def prerender_interview_audio(question_texts, job_title):
+    """Background stage after /api/generate-questions: store audio for every question and stock phrase"""
+    started = time.time()
+    texts = [opening_greeting(job_title), OPENING_PROMPT] + list(question_texts) \
+        + RESUME_TRANSITIONS + CUSTOM_TRANSITIONS + FIXED_LEAD_INS
+    try:
+        rendered = prerendered_audio.prerender_many(texts)
+        print(f"[DONE] Pre-rendered {rendered} new audio clip(s) for {len(question_texts)} question(s) "
+              f"in {time.time() - started:.1f}s")
+    except Exception as e:
+        print(f"[ERROR] Audio pre-render failed: {e}")
+
+# ─────────────────────────────────────────────────────
+# Interviewer Audio (Piper TTS + Storage Upload)
+# ─────────────────────────────────────────────────────
+
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "2"))
+tts_executor = ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="tts")
+
+
+def interview_room(interview_id, user_id):
+    """Socket.IO room a client joins to receive audio for its interview"""
+    return f"interview:{interview_id}:{user_id}"
+
+
+def synthesize_and_upload_interviewer_audio(response_text, user_id, interview_id):
+    """
+    Synthesize the interviewer's reply with Piper and upload it to Supabase Storage.
+    Returns (audio_url, file_path); audio_url is None if the upload failed.
+    """
+    # Generate unique filename for this response
+    text_hash = hashlib.md5(response_text.encode()).hexdigest()[:8]
+    timestamp = datetime.now().strftime("%Y-%m-%dT%H-%M-%S")
+    filename = f"interview_response_{interview_id}_{text_hash}_{timestamp}.wav"
+    file_path = f"{user_id}/{interview_id}/interviewer_{filename}"
+    
+    print(f"[DEBUG] Generated filename: {filename}")
+    
+    # Generate audio file
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
+    temp_file.close()
+    
+    try:
+        # Generate audio using Piper
+        with span("tts_synthesis"):
+            # Reuses pre-rendered question/transition audio; only new text is synthesized
+            audio_file_path = prerendered_audio.render_message(response_text, temp_file.name)
+        print(f"[DEBUG] Audio generated: {audio_file_path}")
+        
+        # Read the audio file
+        with span("audio_read"):
+            with open(audio_file_path, 'rb') as f:
+                audio_data = f.read()
+        
+        print(f"[DEBUG] Audio file size: {len(audio_data)} bytes")
+        
+        # Upload to Supabase Storage
+        print(f"[DEBUG] Uploading interview response audio...")
+        with span("storage_upload"):
+            result = supabase.storage.from_('audio-files').upload(
+                path=file_path,
+                file=audio_data,
+                file_options={"content-type": "audio/wav"}
+            )
+        
+        if result:
+            # Get the public URL
+            audio_url = supabase.storage.from_('audio-files').get_public_url(file_path)
+            print(f"[DEBUG] Interview response audio uploaded successfully: {audio_url}")
+            return audio_url, file_path
+        
+        print(f"[WARNING] Failed to upload interview response audio")
+        return None, file_path
+    
+    finally:
+        # Clean up temporary file
+        if os.path.exists(temp_file.name):
+            os.unlink(temp_file.name)
+            print(f"[CLEANUP] Removed temporary audio file: {temp_file.name}")
+
+
+def deliver_interviewer_audio_async(response_text, user_id, interview_id, audio_request_id):
+    """Background task: synthesize + upload, then push the result to the interview's room"""
+    payload = {
+        "interview_id": interview_id,
+        "audio_request_id": audio_request_id,
+        "audio_url": None,
+        "audio_file_path": None,
+    }
+    try:
+        audio_url, file_path = synthesize_and_upload_interviewer_audio(response_text, user_id, interview_id)
+        payload["audio_url"] = audio_url
+        payload["audio_file_path"] = file_path if audio_url else None
+    except Exception as audio_error:
+        print(f"[ERROR] Async audio generation failed: {audio_error}")
+        traceback.print_exc()
+        payload["error"] = str(audio_error)
+    
+    socketio.emit('interview_audio_ready', payload, to=interview_room(interview_id, user_id))
+    print(f"[DEBUG] Emitted interview_audio_ready for {audio_request_id}")
+
+
+# ─────────────────────────────────────────────────────
+# Interview Pre-warm (session + opening turn before the candidate joins)
+# ─────────────────────────────────────────────────────
+
+START_INTERVIEW_REQUEST_ID = "start_interview"
+
+
+def prewarm_interview_session(interview_id, user_id, auth_token):
+    """
+    Create the session and produce the opening turn (greeting + first prompt + audio),
+    parked in the turn response cache under START_INTERVIEW_REQUEST_ID so the candidate's
+    START_INTERVIEW turn returns immediately. Idempotent.
+    """
+    instance_key = f"{interview_id}:{user_id}"
+    with session_store.session_lock(instance_key):
+        cached = session_store.get_turn_response(instance_key, START_INTERVIEW_REQUEST_ID)
+        if cached is not None:
+            print(f"[DEBUG] Interview {interview_id} already pre-warmed")
+            return cached
+
+        manager = session_store.get(instance_key)
+        if manager is None:
+            manager = InterviewManager(config=get_interview_config(interview_id, user_id, auth_token))
+        response = manager.receive_input(START_INTERVIEW_COMMAND)
+        session_store.save(instance_key, manager)
+
+        audio_url, file_path = None, None
+        try:
+            audio_url, file_path = synthesize_and_upload_interviewer_audio(response["message"], user_id, interview_id)
+        except Exception as audio_error:
+            print(f"[ERROR] Pre-warm audio generation failed: {audio_error}")
+
+        body = {
+            "success": True,
+            "message": "Response generated successfully",
+            "data": {
+                "response": response["message"],
+                "stage": response["stage"],
+                "interview_done": False,
+                "feedback_saved_successfully": False,
+                "finalization_pending": False,
+                "finalization_job_id": None,
+                "audio_url": audio_url,
+                "audio_pending": False,
+                "audio_request_id": None,
+                "audio_file_path": file_path if audio_url else None,
+                "should_delete_audio": False,
+                "requires_code": None,
+                "prewarmed": True
+            }
+        }
+        # Only park a complete turn; without audio the live START_INTERVIEW turn retries TTS
+        if audio_url:
+            session_store.save_turn_response(instance_key, START_INTERVIEW_REQUEST_ID, body)
+        print(f"[DONE] Pre-warmed interview {interview_id} (audio: {bool(audio_url)})")
+        return body
+
+
+def prewarm_interview_session_async(interview_id, user_id, auth_token):
+    try:
+        prewarm_interview_session(interview_id, user_id, auth_token)
+    except Exception as e:
+        print(f"[ERROR] Background pre-warm failed for {interview_id}: {e}")
+        traceback.print_exc()
+
+
+@app.route('/api/prewarm-interview', methods=['POST', 'OPTIONS'])
+@verify_supabase_token
+def prewarm_interview():
+    """
+    Pre-warm an interview when it is scheduled or the interview page loads. Runs in the
+    background by default; pass "wait": true to block until the opening turn is ready.
+    """
+    if request.method == 'OPTIONS':
+        return jsonify({"message": "OK"}), 200
+
+    try:
+        data = request.get_json(silent=True) or {}
+        interview_id = data.get('interview_id')
+        if not interview_id:
+            return jsonify({
+                "success": False,
+                "message": "Interview ID is required"
+            }), 400
+
+        user_id = request.user.get('id')
+        auth_token = request.headers.get('Authorization').split(' ')[1]
+
+        if data.get('wait', False):
+            body = prewarm_interview_session(interview_id, user_id, auth_token)
+            return jsonify({
+                "success": True,
+                "message": "Interview pre-warmed",
+                "data": {"status": "ready", "opening_turn": body["data"]}
+            })
+
+        tts_executor.submit(prewarm_interview_session_async, interview_id, user_id, auth_token)
+        return jsonify({
+            "success": True,
+            "message": "Interview pre-warm started",
+            "data": {"status": "warming"}
+        }), 202
+
+    except InterviewConfigError as config_error:
+        print(f"[ERROR] {config_error}")
+        return jsonify({
+            "success": False,
+            "message": str(config_error)
+        }), 500
+    except Exception as e:
+        print(f"[ERROR] Failed to pre-warm interview: {e}")
+        traceback.print_exc()
+        return jsonify({
+            "success": False,
+            "message": f"Internal server error: {str(e)}"
+        }), 500
+
 
-# Modify the existing generate_response function
 @app.route('/api/generate-response', methods=['POST'])
 @verify_supabase_token
 def generate_response():
-    """Generate interview response from user input and create audio"""
+    """
+    Process one interview turn. Turns for the same interview are serialized, and when the
+    client sends a request ID (X-Request-ID header or "request_id" field) a retried or
+    duplicated submission gets the original response instead of running the turn again.
+    """
+    data = request.get_json(silent=True) or {}
+    interview_id = data.get('interview_id')
+    if not interview_id:
+        return generate_interview_turn()  # Reports the validation error
+
+    request_id = request.headers.get('X-Request-ID') or data.get('request_id')
+    if not request_id and data.get('message', '').strip().upper() == START_INTERVIEW_COMMAND:
+        request_id = START_INTERVIEW_REQUEST_ID  # Picks up the opening turn parked by /api/prewarm-interview
+    instance_key = f"{interview_id}:{request.user.get('id')}"
+
+    def replay_cached_turn():
+        cached = session_store.get_turn_response(instance_key, request_id) if request_id else None
+        if cached is not None and request_id != START_INTERVIEW_REQUEST_ID:
+            print(f"[INFO] Duplicate turn request {request_id} for {instance_key} - returning the original response")
+            cached["data"]["duplicate_request"] = True
+        return cached
+
+    cached = replay_cached_turn()
+    if cached is not None:
+        return jsonify(cached)
+
+    try:
+        with span("session_lock_wait"):
+            lock_token = session_store.acquire_turn_lock(instance_key)
+    except SessionBusyError as busy_error:
+        print(f"[WARNING] {busy_error}")
+        return jsonify({
+            "success": False,
+            "message": "A previous message for this interview is still being processed. Please retry shortly."
+        }), 409
+
+    try:
+        # A concurrent duplicate may have finished the turn while we waited for the lock
+        cached = replay_cached_turn()
+        if cached is not None:
+            return jsonify(cached)
+
+        response = app.make_response(generate_interview_turn())
+        if request_id and response.status_code == 200:
+            session_store.save_turn_response(instance_key, request_id, response.get_json())
+        return response
+    finally:
+        session_store.release_turn_lock(instance_key, lock_token)
+
+
+def generate_interview_turn():
+    """Generate interview response from user input and create audio (caller holds the session lock)"""
     try:
         data = request.get_json()
         user_input = data.get('message', '').strip()
@@ -1109,114 +1555,50 @@ def generate_response():
         # Get auth token from request
         auth_token = request.headers.get('Authorization').split(' ')[1]
         
-        # ✅ ADD DEBUG: Print environment and request details
-        supabase_url = os.getenv('SUPABASE_URL')
-        print(f"[DEBUG] Supabase URL: {supabase_url}")
-        print(f"[DEBUG] Interview ID: {interview_id}")
-        print(f"[DEBUG] Auth token length: {len(auth_token) if auth_token else 0}")
-        
-        # ✅ Use edge function to fetch interview data
-        import requests
-        
-        # ✅ This should work perfectly since SUPABASE_URL is already local
-        supabase_url = os.getenv('SUPABASE_URL')
-        print(f"[DEBUG] Supabase URL: {supabase_url}")  # Should show http://127.0.0.1:54321
-
-        edge_function_url = f"{supabase_url}/functions/v1/interview-data"
-        print(f"[DEBUG] Edge function URL: {edge_function_url}")  # Should show http://127.0.0.1:54321/functions/v1/interview-data
-        
-        try:
-            print(f"[DEBUG] Making request to edge function...")
-            response = requests.get(
-                edge_function_url,
-                headers={
-                    'Authorization': f'Bearer {auth_token}',
-                    'Content-Type': 'application/json'
-                },
-                params={'interview_id': interview_id},
-                timeout=10  # Add timeout
-            )
-            
-            print(f"[DEBUG] Edge function response status: {response.status_code}")
-            print(f"[DEBUG] Edge function response headers: {dict(response.headers)}")
-            print(f"[DEBUG] Edge function response body: {response.text[:500]}...")  # First 500 chars
-            
-            if response.status_code != 200:
-                print(f"[ERROR] Edge function failed: {response.status_code} - {response.text}")
+        # Get InterviewManager instance, creating it (and loading the interview config) only once per session
+        user_id = request.user.get('id')
+        annotate(interview_id=interview_id, user_id=user_id)
+        instance_key = f"{interview_id}:{user_id}"
+        with span("session_load"):
+            manager = session_store.get(instance_key)
+        if manager is None:
+            try:
+                with span("config_fetch"):
+                    dynamic_config = get_interview_config(interview_id, user_id, auth_token)
+            except InterviewConfigError as config_error:
+                print(f"[ERROR] {config_error}")
                 return jsonify({
                     "success": False,
-                    "message": f"Failed to fetch interview data: {response.status_code}"
+                    "message": str(config_error)
                 }), 500
-            
-            result = response.json()
-            print(f"[DEBUG] Edge function JSON result: {result}")
-            
-            if not result.get('success'):
+            except requests.exceptions.RequestException as req_error:
+                print(f"[ERROR] Request exception: {req_error}")
                 return jsonify({
                     "success": False,
-                    "message": result.get('message', 'Failed to fetch interview data')
+                    "message": f"Network error: {str(req_error)}"
+                }), 500
+            except Exception as edge_error:
+                print(f"[ERROR] Edge function call failed: {edge_error}")
+                import traceback
+                traceback.print_exc()
+                return jsonify({
+                    "success": False,
+                    "message": "Failed to fetch interview details"
                 }), 500
             
-            interview_data = result['data']
-            
-            job_title = interview_data['job_description']['title']
-            job_description = interview_data['job_description']['description']
-            questions = interview_data['questions']
-            
-            # Extract core questions - deduplicate by question_text
-            seen_questions = set()
-            core_questions = []
-            for q in questions:
-                question_text = q['question_text']
-                if question_text not in seen_questions:
-                    seen_questions.add(question_text)
-                    core_questions.append(question_text)
-            coding_requirement = [q['requires_code'] for q in questions]
-            
-            print(f"[DEBUG] Fetched interview config: job_title='{job_title}', questions_count={len(questions)}, unique_questions={len(core_questions)}")
-            
-        except requests.exceptions.RequestException as req_error:
-            print(f"[ERROR] Request exception: {req_error}")
-            return jsonify({
-                "success": False,
-                "message": f"Network error: {str(req_error)}"
-            }), 500
-        except Exception as edge_error:
-            print(f"[ERROR] Edge function call failed: {edge_error}")
-            import traceback
-            traceback.print_exc()
-            return jsonify({
-                "success": False,
-                "message": "Failed to fetch interview details"
-            }), 500
-        
-        # Create dynamic config
-        dynamic_config = {
-            "job_title": job_title,
-            "job_description": job_description,
-            "core_questions": core_questions,
-            "coding_requirement": coding_requirement,
-            "time_limit_minutes": 150,  # 2 hours
-            "custom_questions": [],
-        }
-        
-        # Create temporary config file
-        import tempfile
-        import json
-        
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as temp_config:
-            json.dump(dynamic_config, temp_config, indent=2)
-            config_path = temp_config.name
-        
-        # Create or get InterviewManager instance
-        user_id = request.user.get('id')
-        instance_key = f"{interview_id}:{user_id}"
-        if instance_key not in interview_instances:
             print(f"[INFO] Creating new InterviewManager instance for: {instance_key}")
-            interview_instances[instance_key] = InterviewManager(config_path=config_path)
+            manager = InterviewManager(config=dynamic_config)
         
-        manager = interview_instances[instance_key]
-        response = manager.receive_input(user_input)
+        # Finalization (final evaluation + saving feedback) runs as a background job and the
+        # client polls /api/interview-finalization-status; async_finalization: false waits for it
+        async_finalization = data.get('async_finalization', True)
+        manager.defer_wrapup = async_finalization
+        
+        with span("interview_turn"):
+            response = manager.receive_input(user_input)
+        annotate(stage=response.get("stage"))
+        with span("session_save"):
+            session_store.save(instance_key, manager)
         
         print(f"[DEBUG] Interview response: {response}")
         
@@ -1230,182 +1612,47 @@ def generate_response():
         if stage == 'resume_discussion':
             print(f"[INFO] Code Requirement: {code_requirement}")
         
+        audio_pending = False
+        audio_request_id = None
+        file_path = None
+        # Opt-in: clients that joined the interview room over Socket.IO ('join_interview')
+        async_audio = data.get('async_audio', False)
+        
         if response.get("message") and not response.get("interview_done", False):
-            try:
-                print(f"[DEBUG] Generating audio for interview response...")
-                
-                # Generate unique filename for this response
-                def generate_filename(text: str, user_id: str, interview_id: str):
-                    text_hash = hashlib.md5(text.encode()).hexdigest()[:8]
-                    timestamp = datetime.now().strftime("%Y-%m-%dT%H-%M-%S")
-                    return f"interview_response_{interview_id}_{text_hash}_{timestamp}.wav"
-                
-                response_text = response.get("message", "")
-                filename = generate_filename(response_text, user_id, interview_id)
-                file_path = f"{user_id}/{interview_id}/interviewer_{filename}"
-                
-                print(f"[DEBUG] Generated filename: {filename}")
-                
-                # Generate audio file
-                import tempfile
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
-                temp_file.close()
-                
+            response_text = response.get("message", "")
+            if async_audio:
+                # Return the text now; the audio URL is pushed over Socket.IO when ready
+                audio_request_id = uuid.uuid4().hex
+                tts_executor.submit(deliver_interviewer_audio_async, response_text, user_id, interview_id, audio_request_id)
+                audio_pending = True
+                print(f"[DEBUG] Queued async audio generation: {audio_request_id}")
+            else:
                 try:
-                    # Generate audio using Piper
-                    audio_file_path = synthesize_text_to_wav(response_text, temp_file.name)
-                    print(f"[DEBUG] Audio generated: {audio_file_path}")
-                    
-                    # Upload to Supabase Storage
-                    print(f"[DEBUG] Uploading interview response audio...")
-                    
-                    # Read the audio file
-                    with open(audio_file_path, 'rb') as f:
-                        audio_data = f.read()
-                    
-                    file_size = len(audio_data)
-                    print(f"[DEBUG] Audio file size: {file_size} bytes")
-                    
-                    # Upload to Supabase Storage
-                    result = supabase.storage.from_('audio-files').upload(
-                        path=file_path,
-                        file=audio_data,
-                        file_options={"content-type": "audio/wav"}
-                    )
-                    
-                    if result:
-                        # Get the public URL
-                        audio_url = supabase.storage.from_('audio-files').get_public_url(file_path)
-                        print(f"[DEBUG] Interview response audio uploaded successfully: {audio_url}")
-                    else:
-                        print(f"[WARNING] Failed to upload interview response audio")
-                        
-                finally:
-                    # Clean up temporary file
-                    if os.path.exists(temp_file.name):
-                        os.unlink(temp_file.name)
-                        print(f"[CLEANUP] Removed temporary audio file: {temp_file.name}")
-                        
-            except Exception as audio_error:
-                print(f"[ERROR] Audio generation failed: {audio_error}")
-                import traceback
-                traceback.print_exc()
-                # Continue without audio if generation fails
-        
-        # ✅ NEW: Handle interview completion - Save everything to database
+                    print(f"[DEBUG] Generating audio for interview response...")
+                    audio_url, file_path = synthesize_and_upload_interviewer_audio(response_text, user_id, interview_id)
+                except Exception as audio_error:
+                    print(f"[ERROR] Audio generation failed: {audio_error}")
+                    import traceback
+                    traceback.print_exc()
+                    # Continue without audio if generation fails
+        
+        # ✅ NEW: Handle interview completion - hand off to the durable finalization job
         feedback_saved_successfully = False
+        finalization_pending = False
+        finalization_id = None
         if response.get("interview_done", False):
             try:
-                print(f"[INFO] Interview completed - saving transcript, evaluation, and merging audio...")
-                
-                # ✅ NEW: Merge all audio files first
-                print(f"[INFO] Starting audio merge process...")
-                merged_audio_path = merge_interview_audio(user_id, interview_id)
-                
-                if merged_audio_path:
-                    print(f"[SUCCESS] Audio transcript created: {merged_audio_path}")
-                    
-                    # ✅ NEW: Clean up individual audio files
-                    print(f"[INFO] Cleaning up individual audio files...")
-                    cleanup_individual_audio_files(user_id, interview_id, keep_merged_audio=True)
-                    
-                    # Get the audio transcript URL for database storage
-                    audio_transcript_url = supabase.storage.from_('audio-files').get_public_url(merged_audio_path)
-                    print(f"[INFO] Audio transcript URL: {audio_transcript_url}")
-                    
-                else:
-                    print(f"[WARNING] Audio merge failed - keeping individual files")
-                    audio_transcript_url = None
-                
-                # Get the generated data from InterviewManager
-                transcript_data = {
-                    "interview_id": interview_id,
-                    "full_transcript": json.dumps(manager.conversation_history, indent=2),
-                    "evaluation_data": manager.final_evaluation_log
-                }
-                
-                print(f"[DEBUG] Saving transcript data: {transcript_data}")
+                print(f"[INFO] Interview completed - starting finalization job...")
+                finalization_id = submit_interview_finalization(interview_id, user_id, instance_key)
+                finalization_runner.start(finalization_id)
                 
-                # Save to transcripts table
-                transcript_response = requests.post(
-                    f"{supabase_url}/functions/v1/transcripts",
-                    headers={
-                        'Authorization': f'Bearer {auth_token}',
-                        'Content-Type': 'application/json'
-                    },
-                    json=transcript_data
-                )
-                
-                # ✅ FIXED: Check for both 200 and 201 (success codes)
-                if transcript_response.status_code in [200, 201]:
-                    print(f"[INFO] Transcript and evaluation saved to database successfully")
-                    print(f"[DEBUG] Transcript response: {transcript_response.status_code} - {transcript_response.text}")
-                    
-                    # ✅ Use InterviewManager's generated data
-                    summary = manager.final_summary
-                    key_strengths = manager.key_strengths
-                    improvement_areas = manager.improvement_areas
-                    metrics = manager.metrics  # ✅ ADD THIS - Get metrics from manager
-                    
-                    # ✅ UPDATED: Save feedback to interview_feedback table with audio transcript URL
-                    feedback_data = {
-                        "interview_id": interview_id,
-                        "summary": summary,
-                        "key_strengths": key_strengths,
-                        "improvement_areas": improvement_areas,
-                        "audio_url": audio_transcript_url,
-                        "metrics": metrics  # ✅ ADD THIS - Include metrics in feedback data
-                    }
-                    
-                    print(f"[DEBUG] Saving feedback data: {feedback_data}")
-                    
-                    feedback_response = requests.post(
-                        f"{supabase_url}/functions/v1/interview-feedback",
-                        headers={
-                            'Authorization': f'Bearer {auth_token}',
-                            'Content-Type': 'application/json'
-                        },
-                        json=feedback_data
-                    )
-                    
-                    # ✅ FIXED: Check for both 200 and 201 (success codes)
-                    if feedback_response.status_code in [200, 201]:
-                        print(f"[INFO] Interview feedback (summary, strengths, improvements) saved to database")
-                        print(f"[DEBUG] Feedback response: {feedback_response.status_code} - {feedback_response.text}")
-                        
-                        # ✅ NEW: Update interview status to ENDED - ONLY when interview is done
-                        try:
-                            print(f"[INFO] Updating interview status to ENDED...")
-                            
-                            # Update interview status using interviews edge function
-                            status_update_response = requests.put(
-                                f"{supabase_url}/functions/v1/interviews/{interview_id}",
-                                headers={
-                                    'Authorization': f'Bearer {auth_token}',
-                                    'Content-Type': 'application/json'
-                                },
-                                json={
-                                    'status': 'ENDED'
-                                }
-                            )
-                            
-                            if status_update_response.status_code in [200, 201]:
-                                print(f"[INFO] Interview status updated to ENDED successfully")
-                                print(f"[DEBUG] Status update response: {status_update_response.status_code} - {status_update_response.text}")
-                                # ✅ NEW: Mark feedback as successfully saved only when everything is complete
-                                feedback_saved_successfully = True
-                            else:
-                                print(f"[WARNING] Failed to update interview status: {status_update_response.status_code} - {status_update_response.text}")
-                                
-                        except Exception as update_error:
-                            print(f"[ERROR] Failed to update interview status: {update_error}")
-                            import traceback
-                            traceback.print_exc()
-                            
-                    else:
-                        print(f"[WARNING] Failed to save feedback: {feedback_response.status_code} - {feedback_response.text}")
+                if async_finalization:
+                    finalization_pending = True
                 else:
-                    print(f"[ERROR] Failed to save transcript: {transcript_response.status_code} - {transcript_response.text}")
+                    with span("finalization_wait"):
+                        job_status = finalization_runner.wait(finalization_id, timeout=FINALIZATION_WAIT_SECONDS)
+                    feedback_saved_successfully = job_status["status"] == "succeeded"
+                    finalization_pending = job_status["status"] in ["pending", "running"]
                     
             except Exception as save_error:
                 print(f"[ERROR] Failed to save interview data: {save_error}")
@@ -1420,7 +1667,11 @@ def generate_response():
                 "stage": response.get("stage", "unknown"),
                 "interview_done": response.get("interview_done", False),
                 "feedback_saved_successfully": feedback_saved_successfully,  # ✅ NEW: Include feedback save status
+                "finalization_pending": finalization_pending,  # Poll /api/interview-finalization-status/<id>
+                "finalization_job_id": finalization_id,
                 "audio_url": audio_url,  # ✅ NEW: Include audio URL
+                "audio_pending": audio_pending,  # True when audio will arrive via 'interview_audio_ready'
+                "audio_request_id": audio_request_id,
                 "audio_file_path": file_path if audio_url else None,  # ✅ NEW: Include file path for deletion
                 "should_delete_audio": False,  # ✅ NEW: Keep audio files for merging later
                 "requires_code": code_requirement
@@ -1751,6 +2002,25 @@ def handle_frame(data):
         traceback.print_exc()
         emit("response", {"error": f"Internal server error: {str(e)}"})
 
+# Socket.IO interview room handlers (async interviewer audio delivery)
+@socketio.on("join_interview")
+def handle_join_interview(data):
+    """Join the room that receives 'interview_audio_ready' events for one interview"""
+    interview_id = (data or {}).get("interview_id")
+    user = get_user_from_token((data or {}).get("token", ""))
+    if not interview_id or not user:
+        emit("response", {"error": "interview_id and a valid token are required"})
+        return
+    join_room(interview_room(interview_id, user.get("id")))
+    emit("interview_joined", {"interview_id": interview_id})
+
+@socketio.on("leave_interview")
+def handle_leave_interview(data):
+    interview_id = (data or {}).get("interview_id")
+    user = get_user_from_token((data or {}).get("token", ""))
+    if interview_id and user:
+        leave_room(interview_room(interview_id, user.get("id")))
+
 # Socket.IO reset calibration handler
 @socketio.on("reset_calibration")
 def handle_reset_calibration():
@@ -1964,6 +2234,188 @@ def cleanup_individual_audio_files(user_id, interview_id, keep_merged_audio=True
         import traceback
         traceback.print_exc()
 
+# ─────────────────────────────────────────────────────
+# Interview Finalization (durable background job)
+# ─────────────────────────────────────────────────────
+#
+#   evaluate ──► save_transcript ──┐
+#                                  ├──► save_feedback ──► update_status
+#   merge_audio ──► cleanup_audio  │
+#        └─────────────────────────┘
+#
+# Every step result is persisted, so a failed POST or a restart resumes from the
+# first unfinished step instead of losing the interview.
+
+FINALIZATION_JOB = "interview_finalization"
+FINALIZATION_WAIT_SECONDS = int(os.getenv("FINALIZATION_WAIT_SECONDS", "120"))  # Only for async_finalization: false
+
+
+def finalization_job_id(interview_id, user_id):
+    return f"finalize:{interview_id}:{user_id}"
+
+
+# The job outlives the request, so it writes with the service-role client rather than
+# keeping the user's token; ownership is checked against the job's user_id.
+
+def require_interview_owner(interview_id, user_id):
+    owner = supabase.table('interviews').select('id').eq('id', interview_id).eq('user_id', user_id).limit(1).execute()
+    if not owner.data:
+        raise RuntimeError(f"Interview {interview_id} not found for user {user_id}")
+
+
+def save_interview_row(table, row):
+    """Update the interview's row in `table` or insert it, so a retried step never writes a duplicate"""
+    existing = supabase.table(table).select('id').eq('interview_id', row['interview_id']).limit(1).execute()
+    if existing.data:
+        supabase.table(table).update(row).eq('id', existing.data[0]['id']).execute()
+        return "updated"
+    supabase.table(table).insert(row).execute()
+    return "inserted"
+
+
+def finalize_evaluate(payload, results):
+    """Run (or reuse) the wrap-up evaluation and return the data the later steps save"""
+    manager = session_store.get(payload["session_key"])
+    if manager is None:
+        raise RuntimeError(f"Interview session not found: {payload['session_key']}")
+    
+    if not getattr(manager, "wrapup_completed", False):
+        manager.run_wrapup_evaluation()
+        session_store.save(payload["session_key"], manager)
+    
+    return {
+        "full_transcript": json.dumps(manager.conversation_history, indent=2),
+        "evaluation_data": manager.final_evaluation_log,
+        "summary": manager.final_summary,
+        "key_strengths": manager.key_strengths,
+        "improvement_areas": manager.improvement_areas,
+        "metrics": manager.metrics
+    }
+
+
+def finalize_merge_audio(payload, results):
+    print(f"[INFO] Starting audio merge process...")
+    merged_audio_path = merge_interview_audio(payload["user_id"], payload["interview_id"])
+    if not merged_audio_path:
+        # Same as before: a failed merge keeps the individual files and saves feedback without audio
+        print(f"[WARNING] Audio merge failed - keeping individual files")
+        return {"merged_audio_path": None, "audio_transcript_url": None}
+    
+    audio_transcript_url = supabase.storage.from_('audio-files').get_public_url(merged_audio_path)
+    print(f"[INFO] Audio transcript URL: {audio_transcript_url}")
+    return {"merged_audio_path": merged_audio_path, "audio_transcript_url": audio_transcript_url}
+
+
+def finalize_cleanup_audio(payload, results):
+    if not results["merge_audio"]["merged_audio_path"]:
+        return {"skipped": True}
+    print(f"[INFO] Cleaning up individual audio files...")
+    cleanup_individual_audio_files(payload["user_id"], payload["interview_id"], keep_merged_audio=True)
+    return {"skipped": False}
+
+
+def finalize_save_transcript(payload, results):
+    evaluation = results["evaluate"]
+    transcript_data = {
+        "interview_id": payload["interview_id"],
+        "full_transcript": evaluation["full_transcript"],
+        "evaluation_data": evaluation["evaluation_data"]
+    }
+    require_interview_owner(payload["interview_id"], payload["user_id"])
+    action = save_interview_row('transcripts', transcript_data)
+    print(f"[INFO] Transcript and evaluation saved to database successfully ({action})")
+    return {"action": action}
+
+
+def finalize_save_feedback(payload, results):
+    evaluation = results["evaluate"]
+    feedback_data = {
+        "interview_id": payload["interview_id"],
+        "summary": evaluation["summary"],
+        "key_strengths": evaluation["key_strengths"],
+        "improvement_areas": evaluation["improvement_areas"],
+        "audio_url": results["merge_audio"]["audio_transcript_url"],
+        "metrics": evaluation["metrics"]
+    }
+    require_interview_owner(payload["interview_id"], payload["user_id"])
+    action = save_interview_row('interview_feedback', feedback_data)
+    print(f"[INFO] Interview feedback (summary, strengths, improvements) saved to database ({action})")
+    return {"action": action}
+
+
+def finalize_update_status(payload, results):
+    updated = (
+        supabase.table('interviews')
+        .update({'status': 'ENDED'})
+        .eq('id', payload['interview_id'])
+        .eq('user_id', payload['user_id'])
+        .execute()
+    )
+    if not updated.data:
+        raise RuntimeError(f"Failed to update interview status: interview {payload['interview_id']} not found")
+    print(f"[INFO] Interview status updated to ENDED successfully")
+    return {"updated": len(updated.data)}
+
+
+finalization_runner = DurableJobRunner(max_workers=int(os.getenv("FINALIZATION_WORKERS", "4")))
+finalization_runner.register(FINALIZATION_JOB, [
+    Step("evaluate", finalize_evaluate, max_attempts=3),
+    Step("merge_audio", finalize_merge_audio, max_attempts=3),
+    Step("save_transcript", finalize_save_transcript, depends_on=["evaluate"], max_attempts=5),
+    Step("cleanup_audio", finalize_cleanup_audio, depends_on=["merge_audio"], max_attempts=3),
+    Step("save_feedback", finalize_save_feedback, depends_on=["evaluate", "merge_audio", "save_transcript"], max_attempts=5),
+    Step("update_status", finalize_update_status, depends_on=["save_feedback"], max_attempts=5),
+])
+
+
+def submit_interview_finalization(interview_id, user_id, session_key):
+    """Create (or retry) the finalization job for an interview. Returns the job id."""
+    return finalization_runner.submit(
+        FINALIZATION_JOB,
+        {
+            "interview_id": interview_id,
+            "user_id": user_id,
+            "session_key": session_key
+        },
+        job_id=finalization_job_id(interview_id, user_id)
+    )
+
+
+@app.route('/api/interview-finalization-status/<interview_id>', methods=['GET'])
+@verify_supabase_token
+def interview_finalization_status(interview_id):
+    """Report progress of the background finalization job for an interview"""
+    try:
+        user_id = request.user.get('id')
+        status = finalization_runner.status(finalization_job_id(interview_id, user_id))
+        if status is None:
+            return jsonify({
+                "success": False,
+                "message": "No finalization job found for this interview"
+            }), 404
+        
+        return jsonify({
+            "success": True,
+            "message": "Finalization status retrieved",
+            "data": {
+                "status": status["status"],
+                "error": status["error"],
+                "steps": status["steps"],
+                "feedback_saved_successfully": status["status"] == "succeeded"
+            }
+        })
+    except Exception as e:
+        print(f"[ERROR] Failed to get finalization status: {e}")
+        traceback.print_exc()
+        return jsonify({
+            "success": False,
+            "message": f"Internal server error: {str(e)}"
+        }), 500
+
+
+# Pick up jobs interrupted by a previous shutdown (the lease stops two processes running the same job)
+threading.Thread(target=finalization_runner.resume_pending, daemon=True, name="resume-finalization").start()
+
 # ─────────────────────────────────────────────────────
 # Support Bot API Endpoint
 # ─────────────────────────────────────────────────────
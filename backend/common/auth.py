@@ -1,5 +1,5 @@
 import os
-import requests
+from common.http_client import http_client
 from functools import wraps
 from flask import request, jsonify
 from dotenv import load_dotenv
@@ -10,6 +10,27 @@ load_dotenv(dotenv_path=os.path.join(os.path.dirname(os.path.dirname(__file__)),
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
 
+def get_user_from_token(token):
+    """
+    Verify a Supabase JWT outside of a Flask route (e.g. Socket.IO events).
+    Returns the user dict, or None if the token is invalid.
+    """
+    try:
+        response = http_client.get(
+            f"{SUPABASE_URL}/auth/v1/user",
+            headers={
+                "Authorization": f"Bearer {token}",
+                "apikey": SUPABASE_ANON_KEY
+            },
+            timeout=10
+        )
+        if response.status_code != 200:
+            return None
+        return response.json()
+    except Exception as e:
+        print(f"Token verification error: {e}")
+        return None
+
 def verify_supabase_token(f):
     """
     Decorator to verify Supabase JWT tokens in Flask routes.
@@ -29,7 +50,7 @@ def verify_supabase_token(f):
         
         try:
             # Verify JWT token with Supabase
-            response = requests.get(
+            response = http_client.get(
                 f"{SUPABASE_URL}/auth/v1/user",
                 headers={
                     "Authorization": f"Bearer {token}",
@@ -68,7 +89,7 @@ def optional_auth(f):
             
             try:
                 # Verify JWT token with Supabase
-                response = requests.get(
+                response = http_client.get(
                     f"{SUPABASE_URL}/auth/v1/user",
                     headers={
                         "Authorization": f"Bearer {token}",
@@ -0,0 +1,307 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+# === CONFIGURATION ===
+DURABLE_JOBS_DB = os.getenv(
+    "DURABLE_JOBS_DB",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "durable_jobs.db")
+)
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "600"))
+
+PENDING, RUNNING, SUCCEEDED, FAILED = "pending", "running", "succeeded", "failed"
+
+
+class Step:
+    """
+    One idempotent unit of work in a job. `fn(payload, results)` receives the job payload
+    and a dict of results from completed steps, and must return a JSON-serializable result.
+    """
+
+    def __init__(self, name, fn, depends_on=(), max_attempts=3, backoff_seconds=2.0):
+        self.name = name
+        self.fn = fn
+        self.depends_on = list(depends_on)
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+
+
+class DurableJobRunner:
+    """
+    Small SQLite-backed job engine. Jobs are DAGs of Steps; every step result is
+    persisted, so a job interrupted by a crash or restart resumes from the first
+    unfinished step. Independent steps run in parallel. A step is retried with
+    exponential backoff up to max_attempts before the whole job is marked failed.
+    A lease on the job row keeps two processes from running the same job.
+    """
+
+    def __init__(self, db_path=DURABLE_JOBS_DB, max_workers=4, lease_seconds=JOB_LEASE_SECONDS):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.job_types = {}
+        self.step_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job-step")
+        self.job_threads = {}
+        self.lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_db(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    error TEXT,
+                    lease_owner TEXT,
+                    lease_expires REAL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_steps (
+                    job_id TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    result TEXT,
+                    error TEXT,
+                    started_at REAL,
+                    finished_at REAL,
+                    PRIMARY KEY (job_id, name)
+                )
+            """)
+
+    # === REGISTRATION / SUBMISSION ===
+
+    def register(self, kind, steps):
+        names = {step.name for step in steps}
+        for step in steps:
+            missing = [dep for dep in step.depends_on if dep not in names]
+            if missing:
+                raise ValueError(f"Step '{step.name}' depends on unknown step(s): {missing}")
+        self.job_types[kind] = {step.name: step for step in steps}
+
+    def submit(self, kind, payload, job_id=None):
+        """
+        Create a job (idempotent on job_id). Resubmitting a failed job puts it back to
+        pending so its unfinished steps are retried. Returns the job_id.
+        """
+        if kind not in self.job_types:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = job_id or uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            inserted = conn.execute(
+                """INSERT OR IGNORE INTO jobs (job_id, kind, status, payload, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (job_id, kind, PENDING, json.dumps(payload), now, now)
+            ).rowcount
+            if inserted:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO job_steps (job_id, name, status) VALUES (?, ?, ?)",
+                    [(job_id, name, PENDING) for name in self.job_types[kind]]
+                )
+            if not inserted:
+                retried = conn.execute(
+                    "UPDATE jobs SET status = ?, payload = ?, error = NULL, updated_at = ? WHERE job_id = ? AND status = ?",
+                    (PENDING, json.dumps(payload), now, job_id, FAILED)
+                ).rowcount
+                print(f"[INFO] Job {job_id} already exists - {'retrying failed steps' if retried else 'not resubmitting'}")
+        return job_id
+
+    def start(self, job_id):
+        """Run a job on a background thread (no-op if this process is already running it)"""
+        with self.lock:
+            thread = self.job_threads.get(job_id)
+            if thread is not None and thread.is_alive():
+                return thread
+            thread = threading.Thread(target=self.run_job, args=(job_id,), daemon=True, name=f"job-{job_id[:24]}")
+            self.job_threads[job_id] = thread
+            thread.start()
+            return thread
+
+    def wait(self, job_id, timeout=None):
+        with self.lock:
+            thread = self.job_threads.get(job_id)
+        if thread is not None:
+            thread.join(timeout)
+        return self.status(job_id)
+
+    def resume_pending(self):
+        """Restart every unfinished job (called at startup). Returns the resumed job ids."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT job_id, kind FROM jobs WHERE status IN (?, ?)", (PENDING, RUNNING)
+            ).fetchall()
+        resumed = []
+        for job_id, kind in rows:
+            if kind in self.job_types:
+                print(f"[INFO] Resuming unfinished job {job_id} ({kind})")
+                self.start(job_id)
+                resumed.append(job_id)
+        return resumed
+
+    # === EXECUTION ===
+
+    def _claim(self, job_id):
+        now = time.time()
+        with self._connect() as conn:
+            return conn.execute(
+                """UPDATE jobs SET lease_owner = ?, lease_expires = ?, status = ?, updated_at = ?
+                   WHERE job_id = ? AND status IN (?, ?)
+                     AND (lease_owner IS NULL OR lease_owner = ? OR lease_expires < ?)""",
+                (self.owner, now + self.lease_seconds, RUNNING, now, job_id, PENDING, RUNNING, self.owner, now)
+            ).rowcount == 1
+
+    def _renew(self, job_id):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE job_id = ? AND lease_owner = ?",
+                (time.time() + self.lease_seconds, job_id, self.owner)
+            )
+
+    def _finish_job(self, job_id, status, error=None):
+        with self._connect() as conn:
+            conn.execute(
+                """UPDATE jobs SET status = ?, error = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ?
+                   WHERE job_id = ?""",
+                (status, error, time.time(), job_id)
+            )
+
+    def _update_step(self, job_id, name, **fields):
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE job_steps SET {assignments} WHERE job_id = ? AND name = ?",
+                (*fields.values(), job_id, name)
+            )
+
+    def _run_step(self, job_id, step, payload, results, attempts_so_far):
+        """Run one step with retries. Returns (ok, result_or_error)."""
+        attempt = attempts_so_far
+        while True:
+            attempt += 1
+            self._update_step(job_id, step.name, status=RUNNING, attempts=attempt, started_at=time.time())
+            try:
+                result = step.fn(payload, dict(results))
+                self._update_step(job_id, step.name, status=SUCCEEDED, result=json.dumps(result),
+                                  error=None, finished_at=time.time())
+                return True, result
+            except Exception as e:
+                print(f"[WARNING] Job {job_id} step '{step.name}' attempt {attempt}/{step.max_attempts} failed: {e}")
+                if attempt >= step.max_attempts:
+                    self._update_step(job_id, step.name, status=FAILED, error=str(e), finished_at=time.time())
+                    return False, str(e)
+                self._update_step(job_id, step.name, status=PENDING, error=str(e))
+                time.sleep(step.backoff_seconds * (2 ** (attempt - 1)))
+
+    def run_job(self, job_id):
+        """Run a job to completion in the calling thread. Returns the final status dict."""
+        if not self._claim(job_id):
+            print(f"[INFO] Job {job_id} is finished or owned by another worker - skipping")
+            return self.status(job_id)
+
+        with self._connect() as conn:
+            kind, payload_json = conn.execute("SELECT kind, payload FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            step_rows = conn.execute(
+                "SELECT name, status, attempts, result FROM job_steps WHERE job_id = ?", (job_id,)
+            ).fetchall()
+        steps = self.job_types[kind]
+        payload = json.loads(payload_json)
+
+        results = {}
+        remaining = set()
+        for name, status, step_attempts, result in step_rows:
+            if status == SUCCEEDED:
+                results[name] = json.loads(result) if result is not None else None
+            else:
+                remaining.add(name)  # failed steps get a fresh set of attempts on resume
+
+        print(f"[INFO] Running job {job_id} ({kind}): {len(remaining)} step(s) to go")
+        running = {}
+        failure = None
+        while (remaining or running) and failure is None:
+            ready = [
+                name for name in remaining
+                if name not in running and all(dep in results for dep in steps[name].depends_on)
+            ]
+            for name in ready:
+                running[name] = self.step_executor.submit(self._run_step, job_id, steps[name], payload, results, 0)
+                remaining.discard(name)
+
+            if not running:
+                failure = f"Steps can never run (unsatisfied dependencies): {sorted(remaining)}"
+                break
+
+            done, _ = wait(list(running.values()), timeout=self.lease_seconds / 3, return_when=FIRST_COMPLETED)
+            self._renew(job_id)
+            for name in [n for n, future in running.items() if future in done]:
+                ok, value = running.pop(name).result()
+                if ok:
+                    results[name] = value
+                else:
+                    failure = f"Step '{name}' failed: {value}"
+
+        if failure is not None:
+            # Let steps already in flight finish so their results are persisted for the next attempt
+            for future in running.values():
+                future.result()
+            print(f"[ERROR] Job {job_id} failed: {failure}")
+            self._finish_job(job_id, FAILED, failure)
+        else:
+            print(f"[DONE] Job {job_id} completed")
+            self._finish_job(job_id, SUCCEEDED)
+        return self.status(job_id)
+
+    # === STATUS ===
+
+    def status(self, job_id):
+        with self._connect() as conn:
+            job = conn.execute(
+                "SELECT kind, status, error, created_at, updated_at FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if job is None:
+                return None
+            step_rows = conn.execute(
+                "SELECT name, status, attempts, error, started_at, finished_at FROM job_steps WHERE job_id = ?",
+                (job_id,)
+            ).fetchall()
+        return {
+            "job_id": job_id,
+            "kind": job[0],
+            "status": job[1],
+            "error": job[2],
+            "created_at": job[3],
+            "updated_at": job[4],
+            "steps": {
+                name: {
+                    "status": status,
+                    "attempts": attempts,
+                    "error": error,
+                    "duration_seconds": round(finished - started, 3) if started and finished else None
+                }
+                for name, status, attempts, error, started, finished in step_rows
+            }
+        }
+
+    def step_result(self, job_id, name):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT result FROM job_steps WHERE job_id = ? AND name = ? AND status = ?",
+                (job_id, name, SUCCEEDED)
+            ).fetchone()
+        return json.loads(row[0]) if row and row[0] is not None else None
@@ -0,0 +1,160 @@
+import os
+import re
+import time
+import threading
+from collections import defaultdict, deque
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from common.tracing import percentile
+
+
+# === CONFIGURATION ===
+HTTP_DEFAULT_TIMEOUT = float(os.getenv("HTTP_DEFAULT_TIMEOUT", "30"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "20"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.5"))
+# Per-host pool size overrides, e.g. "127.0.0.1:54321=50,api.example.com=10"
+HTTP_POOL_SIZES = os.getenv("HTTP_POOL_SIZES", "")
+
+# Only these are retried automatically; POSTs may not be safe to repeat
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+RETRY_STATUSES = (429, 502, 503, 504)
+LATENCY_SAMPLES = 500  # Per-endpoint latency samples kept for percentiles
+
+ID_SEGMENT = re.compile(r"^([0-9a-fA-F-]{16,}|\d+)$")
+
+
+def parse_pool_sizes(spec):
+    sizes = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        host, _, size = item.partition("=")
+        if size.isdigit():
+            sizes[host.strip()] = int(size)
+    return sizes
+
+
+def endpoint_name(method, url):
+    """'GET 127.0.0.1:54321/functions/v1/interviews/:id' - ids collapsed so metrics group by route"""
+    parts = urlsplit(url)
+    path = "/".join(":id" if ID_SEGMENT.match(seg) else seg for seg in parts.path.split("/"))
+    return f"{method.upper()} {parts.netloc}{path}"
+
+
+class HttpClient:
+    """
+    Shared HTTP client: one keep-alive requests.Session per host, with a connection
+    pool sized per host, a default timeout, retries with backoff on idempotent methods
+    and per-endpoint latency / connection-reuse metrics.
+    """
+
+    def __init__(self, timeout=HTTP_DEFAULT_TIMEOUT, pool_maxsize=HTTP_POOL_MAXSIZE,
+                 max_retries=HTTP_MAX_RETRIES, backoff=HTTP_RETRY_BACKOFF, pool_sizes=None):
+        self.timeout = timeout
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.pool_sizes = pool_sizes if pool_sizes is not None else parse_pool_sizes(HTTP_POOL_SIZES)
+        self.sessions = {}
+        self.adapters = {}
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(lambda: deque(maxlen=LATENCY_SAMPLES))
+        self.counts = defaultdict(int)
+        self.errors = defaultdict(int)
+
+    def _retry_policy(self):
+        kwargs = dict(
+            total=self.max_retries,
+            backoff_factor=self.backoff,
+            status_forcelist=RETRY_STATUSES,
+            raise_on_status=False,
+        )
+        try:
+            return Retry(allowed_methods=IDEMPOTENT_METHODS, **kwargs)
+        except TypeError:  # urllib3 < 1.26
+            return Retry(method_whitelist=IDEMPOTENT_METHODS, **kwargs)
+
+    def _session_for(self, url):
+        parts = urlsplit(url)
+        host = parts.netloc
+        with self.lock:
+            session = self.sessions.get(host)
+            if session is None:
+                size = self.pool_sizes.get(host, self.pool_maxsize)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size, max_retries=self._retry_policy())
+                session = requests.Session()
+                session.mount(f"{parts.scheme}://{host}", adapter)
+                self.sessions[host] = session
+                self.adapters[host] = adapter
+            return session
+
+    def request(self, method, url, timeout=None, **kwargs):
+        session = self._session_for(url)
+        name = endpoint_name(method, url)
+        started = time.perf_counter()
+        try:
+            response = session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+        except requests.exceptions.RequestException:
+            with self.lock:
+                self.errors[name] += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                self.counts[name] += 1
+                self.latencies[name].append(elapsed)
+        if response.status_code >= 500:
+            with self.lock:
+                self.errors[name] += 1
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+    def metrics(self):
+        """Per-endpoint latency and per-host connection reuse"""
+        with self.lock:
+            endpoints = {
+                name: {
+                    "requests": self.counts[name],
+                    "errors": self.errors.get(name, 0),
+                    "avg_ms": round(sum(samples) / len(samples) * 1000, 1) if samples else 0.0,
+                    "p50_ms": round(percentile(list(samples), 50) * 1000, 1),
+                    "p95_ms": round(percentile(list(samples), 95) * 1000, 1),
+                }
+                for name, samples in self.latencies.items()
+            }
+            adapters = dict(self.adapters)
+
+        hosts = {}
+        for host, adapter in adapters.items():
+            # urllib3 pools count new connections vs. requests served; the difference is reuse
+            opened = served = 0
+            for key in list(adapter.poolmanager.pools.keys()):
+                pool = adapter.poolmanager.pools.get(key)
+                if pool is not None:
+                    opened += pool.num_connections
+                    served += pool.num_requests
+            hosts[host] = {
+                "pool_maxsize": self.pool_sizes.get(host, self.pool_maxsize),
+                "connections_opened": opened,
+                "requests_served": served,
+                "connection_reuse_ratio": round(1 - opened / served, 3) if served else 0.0,
+            }
+        return {"endpoints": endpoints, "hosts": hosts}
+
+
+# Shared instance used across the backend
+http_client = HttpClient()
@@ -0,0 +1,169 @@
+import os
+import re
+import json
+import hashlib
+import time
+import threading
+import contextvars
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+
+# === CONFIGURATION ===
+# Directory for per-interview JSON-lines trace logs (unset = don't write logs)
+TRACE_LOG_DIR = os.getenv("TRACE_LOG_DIR", "")
+TRACE_SAMPLES = int(os.getenv("TRACE_SAMPLES", "1000"))  # Samples kept per span for percentiles
+
+current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+class Trace:
+    """Spans recorded while handling one request (one interview turn)"""
+
+    def __init__(self, name, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.spans = []  # {"name", "start_ms", "duration_ms"}
+        self.lock = threading.Lock()
+        self.duration_ms = None
+
+    def add_span(self, name, started, duration):
+        with self.lock:
+            self.spans.append({
+                "name": name,
+                "start_ms": round((started - self.started) * 1000, 2),
+                "duration_ms": round(duration * 1000, 2),
+            })
+
+    def totals(self):
+        """Total milliseconds per span name (a name can occur several times, e.g. LLM calls)"""
+        totals = defaultdict(float)
+        with self.lock:
+            for span in self.spans:
+                totals[span["name"]] += span["duration_ms"]
+        return dict(totals)
+
+    def to_dict(self):
+        return {
+            "trace": self.name,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            **self.attrs,
+            "spans": list(self.spans),
+        }
+
+
+def start_trace(name, **attrs):
+    trace = Trace(name, **attrs)
+    current_trace.set(trace)
+    return trace
+
+
+def get_trace():
+    return current_trace.get()
+
+
+def annotate(**attrs):
+    """Attach attributes (e.g. interview_id once it is known) to the active trace"""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.attrs.update(attrs)
+
+
+@contextmanager
+def span(name):
+    """Time a block as a span of the active trace (no-op outside a trace)"""
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add_span(name, started, time.perf_counter() - started)
+
+
+def record_span(name, duration):
+    """Record a span timed elsewhere (e.g. by an LLM call listener)"""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add_span(name, time.perf_counter() - duration, duration)
+
+
+def server_timing_header(trace):
+    """Server-Timing header value: one entry per span name plus the total"""
+    parts = [
+        f"{name.replace('.', '_').replace(' ', '_')};dur={duration:.1f}"
+        for name, duration in trace.totals().items()
+    ]
+    if trace.duration_ms is not None:
+        parts.append(f"total;dur={trace.duration_ms:.1f}")
+    return ", ".join(parts)
+
+
+# === AGGREGATION ===
+
+samples_lock = threading.Lock()
+span_samples = defaultdict(lambda: deque(maxlen=TRACE_SAMPLES))
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile (pct in 0-100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def trace_log_name(interview_id):
+    """
+    File name for an interview's trace log. The id comes from the request, so anything
+    other than [A-Za-z0-9_-] (path separators, "..") is replaced by a hash of the value.
+    """
+    if not interview_id:
+        return "untagged"
+    value = str(interview_id)
+    if re.fullmatch(r"[A-Za-z0-9_-]{1,128}", value):
+        return value
+    return "id-" + hashlib.sha256(value.encode("utf-8")).hexdigest()[:32]
+
+
+def finish_trace(trace):
+    """Close the trace, add it to the percentile samples and write it to the trace log"""
+    trace.duration_ms = round((time.perf_counter() - trace.started) * 1000, 2)
+    current_trace.set(None)
+
+    with samples_lock:
+        span_samples[f"{trace.name}.total"].append(trace.duration_ms)
+        for name, duration in trace.totals().items():
+            span_samples[f"{trace.name}.{name}"].append(duration)
+
+    if TRACE_LOG_DIR:
+        try:
+            os.makedirs(TRACE_LOG_DIR, exist_ok=True)
+            log_name = trace_log_name(trace.attrs.get("interview_id"))
+            with open(os.path.join(TRACE_LOG_DIR, f"{log_name}.jsonl"), "a", encoding="utf-8") as f:
+                f.write(json.dumps(trace.to_dict()) + "\n")
+        except Exception as e:
+            print(f"[WARNING] Failed to write trace log: {e}")
+    return trace
+
+
+def trace_metrics():
+    """p50/p95/p99 in milliseconds per '<trace>.<span>'"""
+    with samples_lock:
+        snapshot = {name: list(samples) for name, samples in span_samples.items()}
+    return {
+        name: {
+            "count": len(samples),
+            "p50_ms": round(percentile(samples, 50), 1),
+            "p95_ms": round(percentile(samples, 95), 1),
+            "p99_ms": round(percentile(samples, 99), 1),
+            "max_ms": round(max(samples), 1) if samples else 0.0,
+        }
+        for name, samples in sorted(snapshot.items())
+    }
@@ -0,0 +1,535 @@
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import threading
+import subprocess
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from common.tracing import percentile
+
+
+# === STT PROFILES ===
+# model: Whisper model size; compute_type: CTranslate2 weight/compute precision;
+# cpu_threads: threads per model; num_workers: concurrent decodes inside one model;
+# beam_size: decoding beam (1 = greedy). Measure with stt_benchmark/benchmark_stt.py.
+STT_PROFILES = {
+    "gpu_large": {"model": "large-v3", "compute_type": "float16", "cpu_threads": 4, "num_workers": 1, "beam_size": 5},
+    "cpu_accurate": {"model": "medium.en", "compute_type": "int8", "cpu_threads": 8, "num_workers": 1, "beam_size": 5},
+    "cpu_balanced": {"model": "small.en", "compute_type": "int8", "cpu_threads": 4, "num_workers": 1, "beam_size": 3},
+    "cpu_fast": {"model": "base.en", "compute_type": "int8", "cpu_threads": 2, "num_workers": 1, "beam_size": 1},
+    # The original setting: full-precision large-v3 wherever it runs
+    "legacy_large": {"model": "large-v3", "compute_type": "default", "cpu_threads": 4, "num_workers": 1, "beam_size": 5},
+}
+
+# === CONFIGURATION ===
+# Profile name. "auto" (opt-in) picks one from the device and core count; its thresholds
+# aren't backed by benchmark results yet, so the default stays on the original model.
+DEFAULT_WHISPER_PROFILE = "legacy_large"
+WHISPER_PROFILE = os.getenv("WHISPER_PROFILE", DEFAULT_WHISPER_PROFILE)
+# Per-field overrides on top of the profile (unset = use the profile's value)
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "")
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "")
+WHISPER_CPU_THREADS = os.getenv("WHISPER_CPU_THREADS", "")
+WHISPER_NUM_WORKERS = os.getenv("WHISPER_NUM_WORKERS", "")
+WHISPER_BEAM_SIZE = os.getenv("WHISPER_BEAM_SIZE", "")
+# Worker processes, each with its own model replica (memory grows with every worker).
+# Default 1; "auto" (opt-in) = one per cpu_threads cores on CPU and one on GPU;
+# 0 = transcribe in this process, one request at a time.
+WHISPER_WORKERS = os.getenv("WHISPER_WORKERS", "1")
+WHISPER_QUEUE_SIZE = int(os.getenv("WHISPER_QUEUE_SIZE", "32"))           # Waiting requests before rejecting
+WHISPER_TIMEOUT_SECONDS = float(os.getenv("WHISPER_TIMEOUT_SECONDS", "120"))
+WHISPER_LOAD_TIMEOUT_SECONDS = float(os.getenv("WHISPER_LOAD_TIMEOUT_SECONDS", "900"))
+
+TRANSCRIBE_OPTIONS = {"language": "en", "task": "transcribe"}  # beam_size comes from the profile
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TranscriptionError(Exception):
+    pass
+
+
+class TranscriptionQueueFull(TranscriptionError):
+    pass
+
+
+class TranscriptionTimeout(TranscriptionError):
+    pass
+
+
+def auto_profile_name(device, cpu_count=None):
+    """
+    WHISPER_PROFILE=auto: GPU nodes keep large-v3, CPU nodes get a smaller model by core
+    count. The core-count thresholds are estimates; check them with stt_benchmark first.
+    """
+    if device == "cuda":
+        return "gpu_large"
+    cpu_count = cpu_count or os.cpu_count() or 1
+    if cpu_count >= 16:
+        return "cpu_accurate"
+    if cpu_count >= 8:
+        return "cpu_balanced"
+    return "cpu_fast"
+
+
+def resolve_profile(device, name=WHISPER_PROFILE):
+    """Profile settings for `name` ("auto" allowed) with the WHISPER_* env overrides applied"""
+    name = (name or DEFAULT_WHISPER_PROFILE).strip()
+    if name == "auto":
+        name = auto_profile_name(device)
+    if name not in STT_PROFILES:
+        print(f"[WARNING] Unknown WHISPER_PROFILE '{name}', using {DEFAULT_WHISPER_PROFILE}")
+        name = DEFAULT_WHISPER_PROFILE
+    profile = {"name": name, **STT_PROFILES[name]}
+    if device != "cuda" and profile["compute_type"] == "float16":
+        profile["compute_type"] = "int8"  # float16 isn't supported by CTranslate2 on CPU
+
+    overrides = {
+        "model": WHISPER_MODEL, "compute_type": WHISPER_COMPUTE_TYPE, "cpu_threads": WHISPER_CPU_THREADS,
+        "num_workers": WHISPER_NUM_WORKERS, "beam_size": WHISPER_BEAM_SIZE,
+    }
+    for key, value in overrides.items():
+        if value:
+            profile[key] = int(value) if key in ("cpu_threads", "num_workers", "beam_size") else value
+    return profile
+
+
+def resolve_worker_count(device, workers=WHISPER_WORKERS, cpu_threads=4):
+    if str(workers).strip().lower() != "auto":
+        return max(0, int(workers))
+    if device == "cuda":
+        return 1
+    return max(1, (os.cpu_count() or 1) // max(1, cpu_threads))
+
+
+def load_whisper_model(profile, device):
+    from faster_whisper import WhisperModel
+    return WhisperModel(
+        profile["model"], device=device, compute_type=profile["compute_type"],
+        cpu_threads=profile["cpu_threads"], num_workers=profile["num_workers"],
+    )
+
+
+def run_transcription(model, audio, options):
+    """Transcribe a WAV path or a 16 kHz mono float32 array. Returns (text, info dict)."""
+    segments, info = model.transcribe(audio, **options)
+    text = " ".join(segment.text for segment in segments)
+    return text, {
+        "language": getattr(info, "language", None),
+        "language_probability": getattr(info, "language_probability", None),
+        "duration": getattr(info, "duration", None),
+    }
+
+
+def encode_audio(audio):
+    """
+    Header fields and binary payload for a worker request: a file path goes in the header,
+    an array is sent as raw 16-bit PCM after it (half the size of float32, no base64/JSON).
+    """
+    if isinstance(audio, str):
+        return {"path": audio}, b""
+    import numpy as np
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+    return {"pcm_bytes": len(pcm)}, pcm
+
+
+def decode_audio(request, payload):
+    if "pcm_bytes" in request:
+        import numpy as np
+        return np.frombuffer(payload, dtype="<i2").astype(np.float32) / 32768.0
+    return request["path"]
+
+
+class TranscriptionTask:
+    def __init__(self, audio, options, timeout):
+        self.audio = audio
+        self.options = options
+        self.submitted = time.monotonic()
+        self.deadline = self.submitted + timeout
+        self.future = Future()
+
+
+# === SERVICE ===
+
+class TranscriptionService:
+    """
+    Speech-to-text behind a bounded request queue. With workers > 0 every worker is a
+    separate process (`python -m common.transcription_service --worker`) that owns its
+    own Whisper model, so transcriptions run in parallel instead of contending for one
+    shared model. A worker that exceeds the per-request timeout or dies is killed and
+    restarted. With workers = 0 a single in-process model is used under a lock.
+
+    Results carry the id of the worker that produced them (info["worker"]); a worker
+    flagged with reload_worker(), or one that returned an error, loads a fresh model
+    before its next request.
+    """
+
+    def __init__(self, device="cpu", profile=WHISPER_PROFILE, workers=WHISPER_WORKERS,
+                 queue_size=WHISPER_QUEUE_SIZE, timeout=WHISPER_TIMEOUT_SECONDS):
+        # Whisper (CTranslate2) has no MPS backend
+        self.device = "cpu" if device == "mps" else device
+        self.profile = profile if isinstance(profile, dict) else resolve_profile(self.device, profile)
+        self.model_name = self.profile["model"]
+        self.workers = resolve_worker_count(self.device, workers, self.profile["cpu_threads"])
+        self.timeout = timeout
+        self.tasks = queue.Queue(maxsize=queue_size)
+        self.queue_size = queue_size
+        self.lock = threading.Lock()
+        self.counts = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0, "timeouts": 0, "restarts": 0, "reloads": 0}
+        self.wait_ms = deque(maxlen=1000)
+        self.run_ms = deque(maxlen=1000)
+        self.ready_workers = set()
+        self.busy_workers = set()
+        self.reload_pending = set()  # Worker ids ("local" in-process) to reload before their next request
+        self.processes = {}
+        self.started = False
+        self.stopping = False
+        self.local_model = None
+        self.local_lock = threading.Lock()
+
+    # --- lifecycle ---
+
+    def start(self):
+        if self.started:
+            return self
+        self.started = True
+        if self.workers == 0:
+            print(f"[INFO] Loading Whisper model '{self.model_name}' in-process on {self.device} "
+                  f"(profile {self.profile['name']})...")
+            try:
+                self.local_model = load_whisper_model(self.profile, self.device)
+                print(f"[DONE] Whisper model loaded on {self.device}")
+            except Exception as e:
+                print(f"[ERROR] Failed to load Whisper model: {e}")
+            threading.Thread(target=self._local_loop, daemon=True, name="whisper-local").start()
+        else:
+            print(f"[INFO] Starting {self.workers} Whisper worker process(es) "
+                  f"(profile {self.profile['name']}: '{self.model_name}' {self.profile['compute_type']} "
+                  f"on {self.device}, {self.profile['cpu_threads']} threads each)...")
+            for worker_id in range(self.workers):
+                threading.Thread(target=self._worker_loop, args=(worker_id,), daemon=True,
+                                 name=f"whisper-worker-{worker_id}").start()
+        atexit.register(self.shutdown)
+        return self
+
+    def shutdown(self):
+        self.stopping = True
+        with self.lock:
+            processes = list(self.processes.values())
+        for process in processes:
+            self._kill(process)
+
+    @property
+    def available(self):
+        if self.workers == 0:
+            return self.local_model is not None
+        with self.lock:
+            return bool(self.ready_workers)
+
+    # --- requests ---
+
+    def transcribe(self, audio, timeout=None, options=None):
+        """
+        Transcribe audio (a WAV path or a 16 kHz mono float32 array) and return (text, info).
+        info["worker"] names the worker that produced the text, for reload_worker(). Raises
+        TranscriptionQueueFull when the queue is full and TranscriptionTimeout when the
+        request isn't finished within `timeout` seconds, including time spent queued.
+        """
+        if not self.started:
+            self.start()
+        timeout = self.timeout if timeout is None else timeout
+        options = {**TRANSCRIBE_OPTIONS, "beam_size": self.profile["beam_size"], **(options or {})}
+        task = TranscriptionTask(audio, options, timeout)
+        try:
+            self.tasks.put_nowait(task)
+        except queue.Full:
+            self._count("rejected")
+            raise TranscriptionQueueFull(f"Transcription queue is full ({self.queue_size} waiting)")
+        self._count("submitted")
+
+        try:
+            return task.future.result(timeout=timeout)
+        except FutureTimeoutError:
+            task.future.cancel()
+            self._count("timeouts")
+            raise TranscriptionTimeout(f"Transcription did not finish within {timeout:g}s")
+
+    def reload_worker(self, worker_id):
+        """Make `worker_id` load a fresh model before its next request (its output looked corrupted)"""
+        if worker_id is None:
+            return
+        print(f"[INFO] Whisper worker {worker_id} will re-initialize its model before the next request")
+        with self.lock:
+            self.reload_pending.add(worker_id)
+
+    def _take_reload(self, worker_id):
+        with self.lock:
+            if worker_id not in self.reload_pending:
+                return False
+            self.reload_pending.discard(worker_id)
+            self.counts["reloads"] += 1
+            return True
+
+    def _count(self, key, n=1):
+        with self.lock:
+            self.counts[key] += n
+
+    def _next_task(self):
+        """Next task whose caller is still waiting"""
+        while not self.stopping:
+            try:
+                task = self.tasks.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            if task.future.set_running_or_notify_cancel() and time.monotonic() < task.deadline:
+                with self.lock:
+                    self.wait_ms.append((time.monotonic() - task.submitted) * 1000)
+                return task
+            if not task.future.done():
+                task.future.set_exception(TranscriptionTimeout("Request expired while queued"))
+        return None
+
+    def _finish(self, task, started, result=None, error=None):
+        with self.lock:
+            self.run_ms.append((time.monotonic() - started) * 1000)
+            self.counts["failed" if error else "completed"] += 1
+        if task.future.done():
+            return
+        if error:
+            task.future.set_exception(error if isinstance(error, Exception) else TranscriptionError(error))
+        else:
+            task.future.set_result(result)
+
+    # --- in-process mode ---
+
+    def _local_loop(self):
+        while not self.stopping:
+            task = self._next_task()
+            if task is None:
+                return
+            started = time.monotonic()
+            try:
+                with self.local_lock:
+                    if self._take_reload("local") or self.local_model is None:
+                        print("[INFO] Re-initializing Whisper model...")
+                        self.local_model = None
+                        self.local_model = load_whisper_model(self.profile, self.device)
+                    text, info = run_transcription(self.local_model, task.audio, task.options)
+                self._finish(task, started, result=(text, {**info, "worker": "local"}))
+            except Exception as e:
+                self.reload_worker("local")
+                self._finish(task, started, error=TranscriptionError(str(e)))
+
+    # --- worker process mode ---
+
+    def _spawn(self, worker_id):
+        command = [
+            sys.executable, "-m", "common.transcription_service", "--worker",
+            "--device", self.device, "--profile-json", json.dumps(self.profile),
+        ]
+        process = subprocess.Popen(
+            command, cwd=BACKEND_DIR, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        )
+        replies = queue.Queue()
+
+        def read_replies():
+            for line in process.stdout:
+                try:
+                    replies.put(json.loads(line))
+                except ValueError:
+                    continue
+            replies.put(None)  # EOF: the process exited
+
+        threading.Thread(target=read_replies, daemon=True, name=f"whisper-reader-{worker_id}").start()
+        with self.lock:
+            self.processes[worker_id] = process
+        return process, replies
+
+    def _kill(self, process):
+        try:
+            process.kill()
+            process.wait(timeout=5)
+        except Exception:
+            pass
+
+    def _worker_loop(self, worker_id):
+        """Owns one worker process: feeds it tasks and restarts it after a crash or timeout"""
+        backoff = 1.0
+        while not self.stopping:
+            process, replies = self._spawn(worker_id)
+            try:
+                reply = replies.get(timeout=WHISPER_LOAD_TIMEOUT_SECONDS)
+            except queue.Empty:
+                reply = None
+            if not reply or not reply.get("ready"):
+                error = (reply or {}).get("error", "no response")
+                print(f"[ERROR] Whisper worker {worker_id} failed to start: {error}")
+                self._kill(process)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 60.0)
+                continue
+            backoff = 1.0
+            print(f"[DONE] Whisper worker {worker_id} ready (pid {process.pid})")
+            with self.lock:
+                self.ready_workers.add(worker_id)
+                self.reload_pending.discard(worker_id)  # A new process already has a fresh model
+
+            healthy = self._serve(worker_id, process, replies)
+
+            with self.lock:
+                self.ready_workers.discard(worker_id)
+                self.busy_workers.discard(worker_id)
+            self._kill(process)
+            if not healthy and not self.stopping:
+                self._count("restarts")
+                print(f"[WARNING] Restarting Whisper worker {worker_id}")
+
+    def _serve(self, worker_id, process, replies):
+        """Run tasks on a ready worker. Returns False once the worker has to be replaced."""
+        request_id = 0
+        while not self.stopping:
+            task = self._next_task()
+            if task is None:
+                return True
+            request_id += 1
+            started = time.monotonic()
+            with self.lock:
+                self.busy_workers.add(worker_id)
+            try:
+                fields, payload = encode_audio(task.audio)
+                header = json.dumps({
+                    "id": request_id,
+                    **fields,
+                    "reload": self._take_reload(worker_id),
+                    "options": task.options,
+                })
+                process.stdin.write(header.encode("utf-8") + b"\n" + payload)
+                process.stdin.flush()
+            except (OSError, ValueError) as e:
+                self._finish(task, started, error=TranscriptionError(f"Worker {worker_id} unavailable: {e}"))
+                return False
+
+            reply = None
+            while True:
+                remaining = task.deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    reply = replies.get(timeout=remaining)
+                except queue.Empty:
+                    reply = None
+                    break
+                if reply is None or reply.get("id") == request_id:
+                    break
+
+            with self.lock:
+                self.busy_workers.discard(worker_id)
+            if reply is None:
+                # Timed out or the process died; either way this worker can't be trusted
+                if process.poll() is not None:
+                    error = TranscriptionError(f"Whisper worker {worker_id} exited with code {process.returncode}")
+                else:
+                    error = TranscriptionTimeout(f"Whisper worker {worker_id} timed out")
+                self._finish(task, started, error=error)
+                return False
+            if reply.get("ok"):
+                self._finish(task, started, result=(reply.get("text", ""), {**reply.get("info", {}), "worker": worker_id}))
+            else:
+                self.reload_worker(worker_id)
+                self._finish(task, started, error=TranscriptionError(reply.get("error", "unknown error")))
+            if process.poll() is not None:
+                return False
+        return True
+
+    # --- metrics ---
+
+    def stats(self):
+        with self.lock:
+            wait_ms = list(self.wait_ms)
+            run_ms = list(self.run_ms)
+            stats = {
+                "mode": "in_process" if self.workers == 0 else "worker_processes",
+                "profile": self.profile["name"],
+                "model": self.model_name,
+                "compute_type": self.profile["compute_type"],
+                "device": self.device,
+                "workers": self.workers,
+                "workers_ready": len(self.ready_workers) if self.workers else int(self.local_model is not None),
+                "workers_busy": len(self.busy_workers) if self.workers else int(self.local_lock.locked()),
+                "queue_depth": self.tasks.qsize(),
+                "queue_capacity": self.queue_size,
+                **self.counts,
+            }
+        stats.update({
+            "queue_wait_p50_ms": round(percentile(wait_ms, 50), 1),
+            "queue_wait_p95_ms": round(percentile(wait_ms, 95), 1),
+            "run_p50_ms": round(percentile(run_ms, 50), 1),
+            "run_p95_ms": round(percentile(run_ms, 95), 1),
+        })
+        return stats
+
+
+# === WORKER PROCESS ===
+
+def worker_main(profile, device):
+    """
+    Request loop on stdin/stdout. A request is a JSON header line followed by
+    `pcm_bytes` bytes of 16-bit PCM (none for a file path); replies are JSON lines.
+    stdout is kept for replies only; anything the model libraries print goes to stderr.
+    Exits when stdin closes (the parent went away).
+    """
+    replies = os.fdopen(os.dup(sys.stdout.fileno()), "w", buffering=1)
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    def reply(payload):
+        replies.write(json.dumps(payload) + "\n")
+        replies.flush()
+
+    try:
+        model = load_whisper_model(profile, device)
+    except Exception as e:
+        reply({"ready": False, "error": str(e)})
+        return 1
+    reply({"ready": True, "pid": os.getpid()})
+
+    requests = sys.stdin.buffer
+    while True:
+        line = requests.readline()
+        if not line:
+            break
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        payload = requests.read(request.get("pcm_bytes", 0))
+        if len(payload) < request.get("pcm_bytes", 0):
+            break  # stdin closed mid-request
+        try:
+            if request.get("reload"):
+                print(f"[INFO] Worker {os.getpid()} re-initializing Whisper model...", file=sys.stderr)
+                model = None
+                model = load_whisper_model(profile, device)
+            text, info = run_transcription(model, decode_audio(request, payload), request.get("options") or TRANSCRIBE_OPTIONS)
+            reply({"id": request.get("id"), "ok": True, "text": text, "info": info})
+        except Exception as e:
+            if model is None:
+                reply({"id": request.get("id"), "ok": False, "error": f"model reload failed: {e}"})
+                return 1
+            reply({"id": request.get("id"), "ok": False, "error": str(e)})
+    return 0
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Whisper transcription worker")
+    parser.add_argument("--worker", action="store_true", help="Run as a worker process (requests on stdin, JSON replies on stdout)")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--profile-json", help="Resolved STT profile (default: from WHISPER_PROFILE)")
+    args = parser.parse_args()
+    if not args.worker:
+        parser.error("only --worker mode is supported")
+    profile = json.loads(args.profile_json) if args.profile_json else resolve_profile(args.device)
+    sys.exit(worker_main(profile, args.device))
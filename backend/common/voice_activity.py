@@ -0,0 +1,142 @@
+import os
+import threading
+
+import numpy as np
+
+
+# === CONFIGURATION ===
+VAD_ENABLED = os.getenv("VAD_ENABLED", "true").lower() == "true"
+VAD_THRESHOLD = float(os.getenv("VAD_THRESHOLD", "0.5"))                  # Silero speech probability
+VAD_MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", "250"))            # Shorter blips are dropped
+VAD_MIN_SILENCE_MS = int(os.getenv("VAD_MIN_SILENCE_MS", "700"))          # Shorter pauses stay inside a segment
+VAD_SPEECH_PAD_MS = int(os.getenv("VAD_SPEECH_PAD_MS", "300"))            # Kept around each segment
+# Energy fallback: a frame is speech when its RMS is this many times the noise floor
+VAD_ENERGY_RATIO = float(os.getenv("VAD_ENERGY_RATIO", "3.0"))
+VAD_ENERGY_MIN_RMS = float(os.getenv("VAD_ENERGY_MIN_RMS", "0.002"))
+VAD_FRAME_MS = 30
+
+silero_available = True  # Cleared after the first failed import, so the warning is logged once
+stats_lock = threading.Lock()
+vad_stats = {
+    "requests": 0, "silent_clips": 0, "audio_seconds": 0.0, "speech_seconds": 0.0,
+    "audio_seconds_saved": 0.0, "silero": 0, "energy": 0,
+}
+
+
+def silero_speech_regions(audio, sample_rate):
+    """Speech regions as (start, end) sample indices, from the Silero VAD bundled with faster_whisper"""
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+    options = VadOptions(
+        threshold=VAD_THRESHOLD,
+        min_speech_duration_ms=VAD_MIN_SPEECH_MS,
+        min_silence_duration_ms=VAD_MIN_SILENCE_MS,
+        speech_pad_ms=VAD_SPEECH_PAD_MS,
+    )
+    return [(ts["start"], ts["end"]) for ts in get_speech_timestamps(audio, options, sampling_rate=sample_rate)]
+
+
+def energy_speech_regions(audio, sample_rate):
+    """
+    Frame-energy fallback. The threshold is relative to the clip's own noise floor, so
+    quiet but clear speech isn't dropped the way a single whole-file RMS cut-off drops it.
+    """
+    frame = int(sample_rate * VAD_FRAME_MS / 1000)
+    frame_count = len(audio) // frame
+    if frame_count == 0:
+        return []
+    frames = audio[:frame_count * frame].reshape(frame_count, frame)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    noise_floor = np.percentile(rms, 20)
+    voiced = rms > max(VAD_ENERGY_MIN_RMS, noise_floor * VAD_ENERGY_RATIO)
+
+    min_speech = max(1, VAD_MIN_SPEECH_MS // VAD_FRAME_MS)
+    min_silence = max(1, VAD_MIN_SILENCE_MS // VAD_FRAME_MS)
+    pad = int(sample_rate * VAD_SPEECH_PAD_MS / 1000)
+
+    regions = []
+    start = last_voiced = None
+    for index, is_voiced in enumerate(voiced):
+        if is_voiced:
+            if start is None:
+                start = index
+            last_voiced = index
+        elif start is not None and index - last_voiced > min_silence:
+            regions.append((start, last_voiced + 1))
+            start = None
+    if start is not None:
+        regions.append((start, last_voiced + 1))
+
+    return [
+        (max(0, s * frame - pad), min(len(audio), e * frame + pad))
+        for s, e in regions if e - s >= min_speech
+    ]
+
+
+def merge_regions(regions):
+    merged = []
+    for start, end in sorted(regions):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def trim_to_speech(audio, sample_rate=16000):
+    """
+    Keep only the speech in `audio` (mono float32). Leading/trailing silence and long
+    pauses are cut and the speech regions are joined. Returns (speech_audio, report);
+    speech_audio is empty when the clip has no speech at all.
+    """
+    audio_seconds = len(audio) / sample_rate
+    if not VAD_ENABLED or len(audio) == 0:
+        return audio, {"method": "disabled" if len(audio) else "empty", "segments": int(len(audio) > 0),
+                       "audio_seconds": round(audio_seconds, 2), "speech_seconds": round(audio_seconds, 2),
+                       "audio_seconds_saved": 0.0}
+
+    global silero_available
+    regions = None
+    if silero_available:
+        try:
+            regions, method = silero_speech_regions(audio, sample_rate), "silero"
+        except ImportError as e:
+            silero_available = False
+            print(f"[WARNING] Silero VAD unavailable, using energy VAD from now on: {e}")
+        except Exception as e:
+            print(f"[WARNING] Silero VAD failed, using energy VAD for this clip: {e}")
+    if regions is None:
+        regions, method = energy_speech_regions(audio, sample_rate), "energy"
+
+    regions = merge_regions(regions)
+    if regions:
+        speech = np.concatenate([audio[start:end] for start, end in regions]).astype(np.float32, copy=False)
+    else:
+        speech = np.zeros(0, dtype=np.float32)
+
+    speech_seconds = len(speech) / sample_rate
+    saved = audio_seconds - speech_seconds
+    with stats_lock:
+        vad_stats["requests"] += 1
+        vad_stats["silent_clips"] += int(not regions)
+        vad_stats["audio_seconds"] += audio_seconds
+        vad_stats["speech_seconds"] += speech_seconds
+        vad_stats["audio_seconds_saved"] += saved
+        vad_stats[method] += 1
+
+    return speech, {
+        "method": method,
+        "segments": len(regions),
+        "audio_seconds": round(audio_seconds, 2),
+        "speech_seconds": round(speech_seconds, 2),
+        "audio_seconds_saved": round(saved, 2),
+    }
+
+
+def vad_metrics():
+    with stats_lock:
+        stats = dict(vad_stats)
+    for key in ("audio_seconds", "speech_seconds", "audio_seconds_saved"):
+        stats[key] = round(stats[key], 2)
+    stats["enabled"] = VAD_ENABLED
+    stats["saved_ratio"] = round(stats["audio_seconds_saved"] / stats["audio_seconds"], 3) if stats["audio_seconds"] else 0.0
+    return stats
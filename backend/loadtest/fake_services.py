@@ -0,0 +1,296 @@
+"""
+Local stand-ins for the services the interview API talks to, for load testing:
+
+- Supabase: auth (/auth/v1/user), edge functions (/functions/v1/...) and storage
+  (/storage/v1/object/...). Any bearer token is accepted; the token is the user id.
+- Ollama: /api/chat with canned replies that satisfy the interview prompts, after a
+  configurable delay so the LLM cost can be simulated without a GPU.
+
+Run standalone:  python fake_services.py --supabase-port 54329 --ollama-port 11439
+"""
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from urllib.parse import urlsplit, parse_qs, unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# === FAKE DATA ===
+
+FAKE_QUESTIONS = [
+    "Tell me about a project where you designed a REST API end to end.",
+    "How did you debug the hardest production issue you have worked on?",
+    "Walk me through how you would design a rate limiter.",
+    "Describe a time you had to learn a new technology quickly.",
+    "How do you decide between SQL and NoSQL storage for a feature?",
+]
+
+FAKE_METRICS = {
+    "knowledge_depth": 7,
+    "communication_clarity": 7,
+    "confidence_tone": 6,
+    "reasoning_ability": 7,
+    "relevance_to_question": 8,
+    "motivation_indicator": 7,
+    "emotion": "confident",
+}
+
+FAKE_SUMMARY = {
+    "summary": "The candidate gave relevant answers with concrete examples and communicated clearly. Overall a solid fit, strong",
+    "key_strengths": "1. Concrete project examples\n2. Clear communication",
+    "improvement_areas": "1. Quantify impact\n2. Discuss trade-offs in more depth",
+    "overall_rating": 7.0,
+    "overall_emotion_summary": "Calm and confident throughout.",
+}
+
+# One second of 16 kHz mono silence, returned for downloads of unknown objects
+SILENT_WAV = (
+    b"RIFF" + (36 + 32000).to_bytes(4, "little") + b"WAVEfmt " + (16).to_bytes(4, "little")
+    + (1).to_bytes(2, "little") + (1).to_bytes(2, "little") + (16000).to_bytes(4, "little")
+    + (32000).to_bytes(4, "little") + (2).to_bytes(2, "little") + (16).to_bytes(2, "little")
+    + b"data" + (32000).to_bytes(4, "little") + b"\x00" * 32000
+)
+
+
+def multipart_file(body, content_type):
+    """First file part of a multipart body (storage clients upload files as multipart)"""
+    match = re.search(r"boundary=\"?([^\";]+)", content_type or "")
+    if not match:
+        return body
+    for part in body.split(b"--" + match.group(1).encode()):
+        headers, sep, content = part.partition(b"\r\n\r\n")
+        if sep and b"filename=" in headers:
+            return content[:-2] if content.endswith(b"\r\n") else content
+    return body
+
+
+def fake_llm_reply(messages, response_format=None):
+    """Canned reply matching what the prompt asks for (checked against Interview_functions prompts)"""
+    system = " ".join(m.get("content", "") for m in messages if m.get("role") == "system")
+
+    if response_format == "json":
+        label = "clear" if '"clear"' in system else "strong"
+        return json.dumps({"label": label, "followup": ""})
+    if "knowledge_depth" in system and "Respond ONLY in valid JSON" in system:
+        return json.dumps(FAKE_METRICS)
+    if "comprehensive evaluation" in system:
+        return json.dumps(FAKE_SUMMARY)
+    if "running summary" in system:
+        return "The candidate introduced themselves and discussed backend projects with clear examples."
+    if "successfully introduced themselves" in system:
+        return "continue"
+    if "Respond strictly with one word" in system and "valid" in system:
+        return "valid"
+    if "follow-up question" in system and "Only one word" in system:
+        return "strong"
+    if "want to ask something" in system:
+        return "no"
+    if "Only return one word" in system:
+        return "clear"
+    return "Thanks for sharing. Could you tell me about a challenge you solved recently and how you approached it?"
+
+
+# === SUPABASE ===
+
+class FakeSupabaseHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    objects = {}  # storage path -> bytes
+    objects_lock = threading.Lock()
+    counts = {}
+
+    def log_message(self, format, *args):
+        pass  # Keep load-test output readable
+
+    def _count(self, name):
+        with self.objects_lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, status, payload=None, raw=None, content_type="application/json", headers=None):
+        body = raw if raw is not None else json.dumps(payload if payload is not None else {}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _user_id(self):
+        auth = self.headers.get("Authorization", "")
+        return auth.split(" ", 1)[1] if auth.startswith("Bearer ") else None
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        path = parts.path
+        if path == "/auth/v1/user":
+            self._count("auth")
+            user_id = self._user_id()
+            if not user_id:
+                return self._send(401, {"message": "missing token"})
+            return self._send(200, {"id": user_id, "email": f"{user_id}@loadtest.local", "user_metadata": {}})
+
+        if path == "/functions/v1/interview-data":
+            self._count("interview-data")
+            etag = '"loadtest-config-v1"'
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304, raw=b"")
+            interview_id = parse_qs(parts.query).get("interview_id", [""])[0]
+            return self._send(200, {
+                "success": True,
+                "data": {
+                    "interview_id": interview_id,
+                    "job_description": {
+                        "title": "Backend Engineer",
+                        "description": "Build and operate Python APIs, databases and background jobs.",
+                    },
+                    "questions": [{"question_text": q, "requires_code": False} for q in FAKE_QUESTIONS],
+                },
+            }, headers={"ETag": etag})
+
+        match = re.match(r"^/storage/v1/object/(?:public/|authenticated/)?([^/]+)/(.+)$", path)
+        if match:
+            self._count("storage-download")
+            with self.objects_lock:
+                data = self.objects.get(unquote(match.group(2)), SILENT_WAV)
+            return self._send(200, raw=data, content_type="audio/wav")
+
+        if path.startswith("/functions/v1/"):
+            self._count(path)
+            return self._send(200, {"success": True, "data": {}})
+        self._send(404, {"message": f"not found: {path}"})
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        body = self._body()
+
+        if path.startswith("/storage/v1/object/list/"):
+            self._count("storage-list")
+            prefix = json.loads(body or b"{}").get("prefix", "").strip("/")
+            with self.objects_lock:
+                names = [key[len(prefix) + 1:] for key in self.objects if key.startswith(prefix + "/")]
+            return self._send(200, [{"name": name, "id": name, "metadata": {}} for name in names if "/" not in name])
+
+        match = re.match(r"^/storage/v1/object/([^/]+)/(.+)$", path)
+        if match:
+            self._count("storage-upload")
+            data = multipart_file(body, self.headers.get("Content-Type"))
+            with self.objects_lock:
+                self.objects[unquote(match.group(2))] = data
+            return self._send(200, {"Key": f"{match.group(1)}/{match.group(2)}"})
+
+        if path.startswith("/functions/v1/"):
+            self._count(path)
+            return self._send(200, {"success": True, "data": {"id": "loadtest"}})
+        self._send(404, {"message": f"not found: {path}"})
+
+    do_PUT = do_POST
+    do_PATCH = do_POST
+
+    def do_DELETE(self):
+        path = urlsplit(self.path).path
+        body = self._body()
+        if path.startswith("/storage/v1/object/"):
+            self._count("storage-remove")
+            prefixes = json.loads(body or b"{}").get("prefixes", [])
+            with self.objects_lock:
+                for key in prefixes:
+                    self.objects.pop(key, None)
+            return self._send(200, [{"name": key} for key in prefixes])
+        self._send(200, {"success": True})
+
+
+# === OLLAMA ===
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.5   # Mean seconds per chat call
+    jitter = 0.2    # +/- fraction of latency
+    calls = 0
+    calls_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        request_body = json.loads(self.rfile.read(length) or b"{}")
+        if urlsplit(self.path).path != "/api/chat":
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        with self.calls_lock:
+            FakeOllamaHandler.calls += 1
+        delay = self.latency * (1 + random.uniform(-self.jitter, self.jitter))
+        time.sleep(max(0.0, delay))
+
+        messages = request_body.get("messages", [])
+        content = fake_llm_reply(messages, request_body.get("format"))
+        prompt_chars = sum(len(m.get("content", "")) for m in messages)
+        body = json.dumps({
+            "model": request_body.get("model", "llama3"),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "message": {"role": "assistant", "content": content},
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": int(delay * 1e9),
+            "prompt_eval_count": prompt_chars // 4,
+            "eval_count": len(content) // 4,
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        # /api/tags, /api/version and friends - enough for health checks
+        body = json.dumps({"models": [{"name": "llama3:latest"}], "version": "0.0.0-loadtest"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_fake_services(supabase_port=54329, ollama_port=11439, llm_latency=0.5, llm_jitter=0.2, host="127.0.0.1"):
+    """Start both fakes on daemon threads. Returns (supabase_server, ollama_server)."""
+    FakeOllamaHandler.latency = llm_latency
+    FakeOllamaHandler.jitter = llm_jitter
+    servers = []
+    for port, handler in ((supabase_port, FakeSupabaseHandler), (ollama_port, FakeOllamaHandler)):
+        server = ThreadingHTTPServer((host, port), handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True, name=f"fake-{handler.__name__}").start()
+        servers.append(server)
+    print(f"[INFO] Fake Supabase on http://{host}:{supabase_port}, fake Ollama on http://{host}:{ollama_port} "
+          f"(LLM latency {llm_latency}s)")
+    return servers[0], servers[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run fake Supabase + Ollama services for load testing")
+    parser.add_argument("--supabase-port", type=int, default=54329)
+    parser.add_argument("--ollama-port", type=int, default=11439)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Mean seconds per LLM call")
+    parser.add_argument("--llm-jitter", type=float, default=0.2, help="Latency jitter as a fraction")
+    args = parser.parse_args()
+
+    start_fake_services(args.supabase_port, args.ollama_port, args.llm_latency, args.llm_jitter)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print("[DONE] Fake services stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Speech-to-text benchmark for the Whisper profiles in common/transcription_service.py.
+
+Every clip in the corpus (corpus/manifest.json: {"clips": [{"file", "text"}]}) is
+transcribed with each profile in this process. The report shows, per profile, the
+model load time, the real-time factor (transcription seconds / audio seconds; below
+1.0 is faster than real time) and the word error rate against the reference text.
+
+Clips are WAV/WebM recordings next to the manifest. The bundled clips are synthetic
+(espeak-ng, 16 kHz mono); missing clips can be rendered with the Piper interviewer
+voice (--synthesize). Synthetic speech is cleaner than a candidate's microphone, so
+use real recordings to judge accuracy and the synthetic ones mostly for speed.
+
+    python benchmark_stt.py                                   # every profile
+    python benchmark_stt.py --profiles cpu_fast cpu_balanced --max-rtf 0.5
+    python benchmark_stt.py --synthesize --output stt_report.json
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+from common.tracing import percentile
+from common.transcription_service import (
+    STT_PROFILES, TRANSCRIBE_OPTIONS, auto_profile_name, load_whisper_model, run_transcription
+)
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+SAMPLE_RATE = 16000
+
+
+# === SCORING ===
+
+def normalize_words(text):
+    """Lowercase words without punctuation, so WER only counts real word differences"""
+    return re.sub(r"[^a-z0-9' ]+", " ", text.lower().replace("-", " ")).split()
+
+
+def word_errors(reference, hypothesis):
+    """Word-level edit distance (substitutions + deletions + insertions)"""
+    ref, hyp = normalize_words(reference), normalize_words(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(
+                previous[j] + 1,                                # deletion
+                current[j - 1] + 1,                             # insertion
+                previous[j - 1] + (ref_word != hyp_word),       # substitution / match
+            )
+        previous = current
+    return previous[-1], len(ref)
+
+
+# === CORPUS ===
+
+def load_corpus(corpus_dir, synthesize=False):
+    with open(os.path.join(corpus_dir, "manifest.json"), "r", encoding="utf-8") as f:
+        clips = json.load(f)["clips"]
+
+    if synthesize:
+        from Piper.voiceCloner import synthesize_text_to_wav
+        for clip in clips:
+            path = os.path.join(corpus_dir, clip["file"])
+            if not os.path.exists(path):
+                print(f"[INFO] Synthesizing {clip['file']}...")
+                synthesize_text_to_wav(clip["text"], path)
+
+    from faster_whisper.audio import decode_audio
+    corpus = []
+    for clip in clips:
+        path = os.path.join(corpus_dir, clip["file"])
+        if not os.path.exists(path):
+            print(f"[WARNING] Missing clip {clip['file']} (use --synthesize or add the recording)")
+            continue
+        audio = decode_audio(path, sampling_rate=SAMPLE_RATE)
+        corpus.append({"file": clip["file"], "text": clip["text"], "audio": audio,
+                       "seconds": len(audio) / SAMPLE_RATE})
+    return corpus
+
+
+# === BENCHMARK ===
+
+def benchmark_profile(name, profile, corpus, device, warmup=True, verbose=False):
+    print(f"[INFO] Profile {name}: {profile['model']} {profile['compute_type']}, "
+          f"{profile['cpu_threads']} threads, beam {profile['beam_size']}")
+    started = time.perf_counter()
+    model = load_whisper_model(profile, device)
+    load_seconds = time.perf_counter() - started
+    options = {**TRANSCRIBE_OPTIONS, "beam_size": profile["beam_size"]}
+
+    if warmup and corpus:
+        run_transcription(model, corpus[0]["audio"], options)
+
+    errors = words = 0
+    audio_seconds = transcribe_seconds = 0.0
+    clip_rtfs = []
+    for clip in corpus:
+        started = time.perf_counter()
+        text, _ = run_transcription(model, clip["audio"], options)
+        elapsed = time.perf_counter() - started
+        clip_errors, clip_words = word_errors(clip["text"], text)
+        errors += clip_errors
+        words += clip_words
+        audio_seconds += clip["seconds"]
+        transcribe_seconds += elapsed
+        clip_rtfs.append(elapsed / clip["seconds"] if clip["seconds"] else 0.0)
+        if verbose:
+            print(f"  {clip['file']}: rtf={clip_rtfs[-1]:.2f} errors={clip_errors}/{clip_words} -> {text.strip()}")
+    del model
+
+    return {
+        "model": profile["model"],
+        "compute_type": profile["compute_type"],
+        "cpu_threads": profile["cpu_threads"],
+        "num_workers": profile["num_workers"],
+        "beam_size": profile["beam_size"],
+        "load_seconds": round(load_seconds, 2),
+        "audio_seconds": round(audio_seconds, 2),
+        "transcribe_seconds": round(transcribe_seconds, 2),
+        "rtf": round(transcribe_seconds / audio_seconds, 3) if audio_seconds else None,
+        "rtf_p95": round(percentile(clip_rtfs, 95), 3),
+        "wer": round(errors / words, 4) if words else None,
+    }
+
+
+def print_report(results, recommended):
+    print("\n=== STT PROFILE BENCHMARK ===")
+    print(f"{'profile':<14} {'model':<10} {'compute':<14} {'threads':>7} {'beam':>4} "
+          f"{'load s':>7} {'RTF':>6} {'RTF p95':>8} {'WER':>7}")
+    for name, r in results.items():
+        rtf = f"{r['rtf']:.3f}" if r["rtf"] is not None else "n/a"
+        wer = f"{r['wer'] * 100:.1f}%" if r["wer"] is not None else "n/a"  # No reference words
+        print(f"{name:<14} {r['model']:<10} {r['compute_type']:<14} {r['cpu_threads']:>7} {r['beam_size']:>4} "
+              f"{r['load_seconds']:>7.1f} {rtf:>6} {r['rtf_p95']:>8.3f} {wer:>7}")
+    if recommended:
+        print(f"\n[DONE] Recommended profile: {recommended} (lowest WER within the RTF limit)")
+    else:
+        print("\n[WARNING] No profile met the RTF limit")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Whisper STT profiles (real-time factor and WER)")
+    parser.add_argument("--profiles", nargs="*", help=f"Profiles to run (default: all of {', '.join(STT_PROFILES)})")
+    parser.add_argument("--corpus", default=CORPUS_DIR, help="Directory with manifest.json and the clips")
+    parser.add_argument("--device", default="cpu", help="cpu or cuda")
+    parser.add_argument("--cpu-threads", type=int, help="Override cpu_threads for every profile")
+    parser.add_argument("--max-rtf", type=float, default=0.5, help="RTF limit for the recommendation")
+    parser.add_argument("--synthesize", action="store_true", help="Render missing clips with the Piper voice")
+    parser.add_argument("--verbose", action="store_true", help="Print every clip's transcription")
+    parser.add_argument("--output", help="Also write the report JSON here")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus, synthesize=args.synthesize)
+    if not corpus:
+        print("[ERROR] No clips to benchmark")
+        return 1
+    print(f"[INFO] {len(corpus)} clips, {sum(c['seconds'] for c in corpus):.1f}s of audio; "
+          f"auto profile on this machine: {auto_profile_name(args.device)}")
+
+    results = {}
+    for name in args.profiles or list(STT_PROFILES):
+        if name not in STT_PROFILES:
+            print(f"[WARNING] Unknown profile {name}, skipping")
+            continue
+        profile = dict(STT_PROFILES[name])
+        if args.device != "cuda" and profile["compute_type"] == "float16":
+            profile["compute_type"] = "int8"
+        if args.cpu_threads:
+            profile["cpu_threads"] = args.cpu_threads
+        try:
+            results[name] = benchmark_profile(name, profile, corpus, args.device, verbose=args.verbose)
+        except Exception as e:
+            print(f"[ERROR] Profile {name} failed: {e}")
+
+    eligible = [name for name, r in results.items()
+                if r["rtf"] is not None and r["rtf"] <= args.max_rtf and r["wer"] is not None]
+    recommended = min(eligible, key=lambda name: results[name]["wer"]) if eligible else None
+    print_report(results, recommended)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"device": args.device, "max_rtf": args.max_rtf, "clips": len(corpus),
+                       "profiles": results, "recommended": recommended}, f, indent=2)
+        print(f"[DONE] Report written to: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
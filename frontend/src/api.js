@@ -59,12 +59,12 @@ export async function apiCall(endpoint, options = {}) {
     
     // Prepare request config
     const config = {
+      ...options,
       method: options.method || 'GET',
       headers: {
         ...headers,
         ...options.headers // Allow custom headers to override defaults
-      },
-      ...options
+      }
     };
 
     // Handle body - don't stringify FormData
@@ -94,7 +94,9 @@ export async function apiCall(endpoint, options = {}) {
           // Use default error message
         }
       }
-      throw new Error(errorMessage);
+      const httpError = new Error(errorMessage);
+      httpError.status = response.status;
+      throw httpError;
     }
     
     // Try to parse JSON response
@@ -10,6 +10,36 @@ import { useChatHistory } from '../../hooks/useChatHistory';
 import { trackEvents } from '../../services/mixpanel';
 import CodeEditorPopup from './CodeEditorPopup';
 
+// A turn is resent with the same X-Request-ID, so the backend returns the original
+// response instead of running the turn (LLM, TTS, upload) a second time
+const TURN_RETRY_ATTEMPTS = 3;
+const TURN_RETRY_STATUSES = [409, 502, 503, 504];
+
+const generateTurnRequestId = () => {
+  if (typeof crypto !== 'undefined' && crypto.randomUUID) {
+    return `turn_${crypto.randomUUID()}`;
+  }
+  return `turn_${Date.now()}_${Math.random().toString(36).substr(2, 9)}_${Math.random().toString(36).substr(2, 9)}`;
+};
+
+// Submit one interview turn, retrying network failures and busy/timeout responses
+const postInterviewTurn = async (message, interviewId) => {
+  // START_INTERVIEW already has a fixed request ID on the backend (it picks up the pre-warmed opening)
+  const headers = message === 'START_INTERVIEW' ? {} : { 'X-Request-ID': generateTurnRequestId() };
+  for (let attempt = 1; ; attempt++) {
+    try {
+      return await apiPost('/api/generate-response', { message, interview_id: interviewId }, { headers });
+    } catch (error) {
+      const retryable = error.status === undefined || TURN_RETRY_STATUSES.includes(error.status);
+      if (!retryable || attempt >= TURN_RETRY_ATTEMPTS) {
+        throw error;
+      }
+      console.warn(`⚠️ Turn request failed (${error.message}), retrying (${attempt + 1}/${TURN_RETRY_ATTEMPTS})...`);
+      await new Promise(resolve => setTimeout(resolve, 1000 * attempt));
+    }
+  }
+};
+
 function ChatWindow({ conversation, setConversation, isLoading, setIsLoading, isAudioPlaying, setIsAudioPlaying, onStateChange }) {
   const [isRecording, setIsRecording] = useState(false);
   const [isButtonDisabled, setIsButtonDisabled] = useState(false);
@@ -108,10 +138,7 @@ function ChatWindow({ conversation, setConversation, isLoading, setIsLoading, is
         return;
       }
       
-      const response = await apiPost('/api/generate-response', {
-        message: userInput,
-        interview_id: interviewId // ✅ Send interview_id to backend
-      });
+      const response = await postInterviewTurn(userInput, interviewId);
 
       console.log('📥 Interview Manager response:', response);
       
@@ -340,11 +367,8 @@ function ChatWindow({ conversation, setConversation, isLoading, setIsLoading, is
           return;
         }
         
-        // ✅ Use the same apiPost function that works for normal responses
-        const response = await apiPost('/api/generate-response', {
-          message: 'END_INTERVIEW',
-          interview_id: interviewId
-        });
+        // ✅ Same turn submission (request ID + retry) as normal responses
+        const response = await postInterviewTurn('END_INTERVIEW', interviewId);
         
         console.log('📥 End interview response:', response);
         
@@ -850,7 +874,26 @@ function ChatWindow({ conversation, setConversation, isLoading, setIsLoading, is
   // Update the useChatHistory hook usage
   const { loadChatHistory, appendToChatHistory, deleteChatHistory } = useChatHistory();
 
-  // Load chat history when component mounts
+  // ✅ NEW: Open a new interview with the interviewer's greeting. The pre-warm builds the session,
+  // greeting and audio in the background; START_INTERVIEW waits for it and returns that turn.
+  const hasRequestedStartRef = useRef(false);
+  const startInterview = async (interviewId) => {
+    if (hasRequestedStartRef.current) return; // Effects run twice in StrictMode
+    hasRequestedStartRef.current = true;
+
+    try {
+      console.log('🔥 Pre-warming interview:', interviewId);
+      await apiPost('/api/prewarm-interview', { interview_id: interviewId });
+    } catch (error) {
+      // START_INTERVIEW still works without the pre-warm, just slower
+      console.error('❌ Failed to pre-warm interview:', error);
+    }
+
+    console.log('📤 Sending START_INTERVIEW for the opening turn...');
+    await callInterviewManager('START_INTERVIEW');
+  };
+
+  // Load chat history when component mounts; a new interview starts with the opening turn
   useEffect(() => {
     const loadHistory = async () => {
       const urlParams = new URLSearchParams(window.location.search);
@@ -859,6 +902,8 @@ function ChatWindow({ conversation, setConversation, isLoading, setIsLoading, is
         const history = await loadChatHistory(interviewId);
         if (history && history.length > 0) {
           setConversation(history);
+        } else {
+          await startInterview(interviewId);
         }
       }
     };
@@ -1000,11 +1045,8 @@ function ChatWindow({ conversation, setConversation, isLoading, setIsLoading, is
         return;
       }
       
-      // ✅ Use the same apiPost function that works for normal responses
-      const response = await apiPost('/api/generate-response', {
-        message: 'END_INTERVIEW',
-        interview_id: interviewId
-      });
+      // ✅ Same turn submission (request ID + retry) as normal responses
+      const response = await postInterviewTurn('END_INTERVIEW', interviewId);
       
       // ✅ Now handle the response exactly like handleEndInterview does
       // (Copy all the logic from handleEndInterview starting from line 316)
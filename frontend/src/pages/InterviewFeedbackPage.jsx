@@ -18,8 +18,13 @@ import {
 import { useTheme } from '@/hooks/useTheme';
 import Navbar from '@/components/Navbar';
 import { supabase } from '@/supabaseClient';
+import { apiGet } from '../api';
 import { trackEvents } from '../services/mixpanel';
 
+// The backend saves feedback in a background finalization job after the interview ends
+const FINALIZATION_POLL_INTERVAL_MS = 3000;
+const FINALIZATION_POLL_LIMIT = 200; // ~10 minutes
+
 // PDF generation functions
 const generateInterviewPDF = (feedbackData, transcriptData, getOverallRating, getRatingLabel, getInterviewDuration, getQuestionsAnswered, formatKeyStrengths, formatImprovementAreas) => {
   // Import jsPDF dynamically to avoid SSR issues
@@ -245,6 +250,38 @@ function InterviewFeedbackPage() {
   // Prevent duplicate "Interview Feedback Accessed" tracking for this page visit
   const hasTrackedFeedbackAccessed = useRef(false);
   
+  // Wait until the finalization job has saved the feedback (returns at once for older interviews)
+  const waitForFinalization = async () => {
+    let sawPending = false;
+    for (let attempt = 0; attempt < FINALIZATION_POLL_LIMIT; attempt++) {
+      let status;
+      try {
+        const response = await apiGet(`/api/interview-finalization-status/${interviewId}`);
+        status = response.data?.status;
+      } catch (err) {
+        // No finalization job for this interview - the feedback is read directly
+        console.log('ℹ️ No finalization job status:', err.message);
+        return;
+      }
+
+      if (status !== 'pending' && status !== 'running') {
+        if (status === 'succeeded' && sawPending) {
+          console.log('✅ Feedback saved by the finalization job, tracking feedback generation...');
+          trackEvents.mockInterviewFeedbackGenerated({
+            interview_id: interviewId,
+            generation_timestamp: new Date().toISOString(),
+            generation_method: 'backend_confirmed'
+          });
+        }
+        return;
+      }
+
+      sawPending = true;
+      console.log(`⏳ Feedback is being prepared (${status})...`);
+      await new Promise(resolve => setTimeout(resolve, FINALIZATION_POLL_INTERVAL_MS));
+    }
+  };
+
   // Fetch feedback data from the database
   const fetchFeedbackData = async () => {
     if (!interviewId) {
@@ -257,6 +294,8 @@ function InterviewFeedbackPage() {
     setError(null);
 
     try {
+      await waitForFinalization();
+
       // Get current user session
       const { data: { session } } = await supabase.auth.getSession();
       if (!session) {